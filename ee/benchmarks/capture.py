@@ -0,0 +1,84 @@
+# isort: skip_file
+# Needs to be first to set up django environment
+from .helpers import *
+import base64
+import gzip
+import json
+import random
+import time
+
+import lzstring
+
+from posthog.lz_string import decompress_from_base64
+from posthog.utils import decompress
+
+
+def _capture_payload(event_count: int) -> bytes:
+    # Roughly the shape of a posthog-js autocapture batch
+    random.seed(42)
+    events = [
+        {
+            "event": random.choice(["$pageview", "$autocapture", "$pageleave", "signed up"]),
+            "properties": {
+                "distinct_id": f"user-{random.randint(0, 1000)}",
+                "token": "phc_benchmark",
+                "$current_url": f"https://posthog.com/docs/{random.randint(0, 100)}",
+                "$lib": "web",
+                "$lib_version": "1.50.0",
+                "$elements": [
+                    {"tag_name": "a", "nth_child": 1, "nth_of_type": 2, "attr__class": "btn btn-sm"},
+                    {"tag_name": "div", "nth_child": 1, "nth_of_type": 2, "$el_text": "💻"},
+                ],
+            },
+        }
+        for _ in range(event_count)
+    ]
+    return json.dumps(events, ensure_ascii=False).encode()
+
+
+class CaptureDecompressSuite:
+    params = [1, 50, 500]
+    param_names = ["event_count"]
+
+    def setup(self, event_count):
+        self.raw = _capture_payload(event_count)
+        self.base64 = base64.b64encode(self.raw)
+        self.gzipped = gzip.compress(self.raw)
+        self.lz64 = lzstring.LZString().compressToBase64(self.raw.decode())
+
+    def time_decompress_json(self, event_count):
+        decompress(self.raw, "")
+
+    def time_decompress_base64(self, event_count):
+        decompress(self.base64, "")
+
+    def time_decompress_gzip(self, event_count):
+        decompress(self.gzipped, "gzip-js")
+
+    def time_decompress_gzip_without_compression_flag(self, event_count):
+        decompress(self.gzipped, "")
+
+    def time_decompress_lz64(self, event_count):
+        decompress(self.lz64, "lz64")
+
+
+class LZStringDecompressSuite:
+    params = [10_000, 100_000, 1_000_000]
+    param_names = ["payload_bytes"]
+
+    def setup(self, payload_bytes):
+        raw = _capture_payload(payload_bytes // 300).decode()[:payload_bytes]
+        self.compressed = lzstring.LZString().compressToBase64(raw)
+
+    def time_decompress_reference(self, payload_bytes):
+        lzstring.LZString().decompressFromBase64(self.compressed)
+
+    def time_decompress(self, payload_bytes):
+        decompress_from_base64(self.compressed)
+
+    def track_throughput_mb_per_second(self, payload_bytes):
+        start = time.perf_counter()
+        decompress_from_base64(self.compressed)
+        return payload_bytes / (time.perf_counter() - start) / 1_000_000
+
+    track_throughput_mb_per_second.unit = "MB/s"  # type: ignore
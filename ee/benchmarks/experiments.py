@@ -0,0 +1,36 @@
+# isort: skip_file
+# Needs to be first to set up django environment
+from .helpers import *
+from ee.clickhouse.queries.experiments.funnel_experiment_result import Variant as FunnelVariant
+from ee.clickhouse.queries.experiments.funnel_experiment_result import (
+    calculate_expected_loss,
+    calculate_probability_of_winning_for_each as calculate_funnel_probabilities,
+)
+from ee.clickhouse.queries.experiments.trend_experiment_result import Variant as TrendVariant
+from ee.clickhouse.queries.experiments.trend_experiment_result import (
+    calculate_probability_of_winning_for_each as calculate_trend_probabilities,
+)
+
+
+class ExperimentSignificanceSuite:
+    params = [2, 4, 10]
+    param_names = ["variant_count"]
+
+    def setup(self, variant_count):
+        self.funnel_variants = [
+            FunnelVariant(key=f"variant_{index}", success_count=100 + 10 * index, failure_count=1000)
+            for index in range(variant_count)
+        ]
+        self.trend_variants = [
+            TrendVariant(key=f"variant_{index}", count=100 + 10 * index, exposure=1, absolute_exposure=1000)
+            for index in range(variant_count)
+        ]
+
+    def time_funnel_probability_of_winning(self, variant_count):
+        calculate_funnel_probabilities(self.funnel_variants)
+
+    def time_funnel_expected_loss(self, variant_count):
+        calculate_expected_loss(self.funnel_variants[-1], self.funnel_variants[:-1])
+
+    def time_trend_probability_of_winning(self, variant_count):
+        calculate_trend_probabilities(self.trend_variants)
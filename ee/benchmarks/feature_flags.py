@@ -0,0 +1,71 @@
+# isort: skip_file
+# Needs to be first to set up django environment
+from .helpers import *
+import time
+
+from posthog.models.feature_flag import FeatureFlag, FeatureFlagMatcher
+from posthog.models.feature_flag.flag_matching import rollout_hash_cache
+
+PERSON_PROPERTIES = {"email": "tim@posthog.com", "plan": "enterprise", "$browser": "Chrome"}
+
+
+def _feature_flags(flag_count: int):
+    # A mix of the flags teams typically have. Properties are all passed to decide, so nothing is queried.
+    feature_flags = []
+    for index in range(flag_count):
+        filters: dict = {"groups": [{"properties": [], "rollout_percentage": 30 + index % 70}]}
+        if index % 3 == 1:
+            filters["groups"] = [
+                {
+                    "properties": [
+                        {"key": "email", "value": "posthog.com", "operator": "icontains", "type": "person"},
+                        {"key": "plan", "value": ["pro", "enterprise"], "type": "person"},
+                    ],
+                    "rollout_percentage": 50,
+                },
+                {"properties": [{"key": "$browser", "value": "Firefox", "type": "person"}]},
+            ]
+        if index % 4 == 2:
+            filters["multivariate"] = {
+                "variants": [
+                    {"key": "control", "name": "Control", "rollout_percentage": 50},
+                    {"key": "test", "name": "Test", "rollout_percentage": 25},
+                    {"key": "test-2", "name": "Test 2", "rollout_percentage": 25},
+                ]
+            }
+        feature_flags.append(FeatureFlag(id=index, team_id=1, key=f"flag-{index}", filters=filters, active=True))
+    return feature_flags
+
+
+class DecideFlagsSuite:
+    params = [200, 1000]
+    param_names = ["flag_count"]
+
+    def setup(self, flag_count):
+        self.feature_flags = _feature_flags(flag_count)
+        # Parsed once per process in production, see `get_feature_flags_for_team_in_cache`
+        for feature_flag in self.feature_flags:
+            _ = (feature_flag.compiled_conditions, feature_flag.variant_lookup_table)
+        self.new_distinct_ids = (f"user-{index}" for index in range(10_000_000))
+        rollout_hash_cache.clear()
+
+    def _evaluate_flags(self, distinct_id: str):
+        FeatureFlagMatcher(self.feature_flags, distinct_id, property_value_overrides=PERSON_PROPERTIES).get_matches()
+
+    def time_evaluate_flags_for_returning_distinct_id(self, flag_count):
+        self._evaluate_flags("returning-user")
+
+    def time_evaluate_flags_for_new_distinct_id(self, flag_count):
+        self._evaluate_flags(next(self.new_distinct_ids))
+
+    def track_flags_evaluated_per_second(self, flag_count):
+        # Decide traffic: mostly returning distinct ids, with some new ones mixed in
+        distinct_ids = [
+            f"returning-user-{index % 20}" if index % 5 else next(self.new_distinct_ids) for index in range(100)
+        ]
+        start = time.perf_counter()
+        for distinct_id in distinct_ids:
+            self._evaluate_flags(distinct_id)
+        return len(distinct_ids) * flag_count / (time.perf_counter() - start)
+
+    track_flags_evaluated_per_second.unit = "flags/s"  # type: ignore
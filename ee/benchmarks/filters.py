@@ -0,0 +1,64 @@
+# isort: skip_file
+# Needs to be first to set up django environment
+from .helpers import *
+from posthog.models.filters.filter import Filter
+from posthog.models.filters.path_filter import PathFilter
+from posthog.models.filters.retention_filter import RetentionFilter
+
+COMPLEX_FILTER_DATA = {
+    "insight": "TRENDS",
+    "date_from": "-90d",
+    "interval": "week",
+    "display": "ActionsLineGraph",
+    "breakdown": "$browser",
+    "breakdown_type": "event",
+    "events": [
+        {
+            "id": f"event_{index}",
+            "order": index,
+            "math": "dau",
+            "properties": [
+                {"key": "$current_url", "value": "https://example.com", "operator": "icontains", "type": "event"},
+                {"key": "email", "value": "@posthog.com", "operator": "not_icontains", "type": "person"},
+            ],
+        }
+        for index in range(10)
+    ],
+    "properties": {
+        "type": "AND",
+        "values": [
+            {
+                "type": "OR",
+                "values": [
+                    {"key": "$os", "value": ["Mac OS X", "Windows"], "operator": "exact", "type": "event"},
+                    {"key": "$browser", "value": "Chrome", "operator": "exact", "type": "event"},
+                ],
+            }
+        ],
+    },
+}
+
+
+class FilterSuite:
+    def time_build_and_serialize_filter(self):
+        Filter(data=COMPLEX_FILTER_DATA).to_dict()
+
+    def time_query_builder_property_access(self):
+        # Query builders read the same properties many times over, interleaved between several filters
+        filters = [Filter(data=COMPLEX_FILTER_DATA) for _ in range(5)]
+        for _ in range(20):
+            for filter in filters:
+                _ = (
+                    filter.entities,
+                    filter.property_groups,
+                    filter.breakdown,
+                    filter.date_from,
+                    filter.date_to,
+                    filter.interval,
+                )
+
+    def time_build_and_serialize_retention_filter(self):
+        RetentionFilter(data={**COMPLEX_FILTER_DATA, "insight": "RETENTION"}).to_dict()
+
+    def time_build_and_serialize_path_filter(self):
+        PathFilter(data={**COMPLEX_FILTER_DATA, "insight": "PATHS"}).to_dict()
@@ -3,8 +3,7 @@ import sys
 from contextlib import contextmanager
 from functools import wraps
 from os.path import dirname
-
-from django.utils.timezone import now
+from unittest.mock import patch
 
 os.environ["POSTHOG_DB_NAME"] = "posthog_test"
 os.environ["DJANGO_SETTINGS_MODULE"] = "posthog.settings"
@@ -14,7 +13,7 @@ import django  # noqa: E402
 
 django.setup()
 
-from ee.clickhouse.materialized_columns.columns import get_materialized_columns  # noqa: E402
+from ee.clickhouse.materialized_columns.columns import materialized_columns_registry  # noqa: E402
 from posthog import client  # noqa: E402
 from posthog.clickhouse.query_tagging import reset_query_tags, tag_queries  # noqa: E402
 from posthog.models.utils import UUIDT  # noqa: E402
@@ -71,6 +70,5 @@ def benchmark_clickhouse(fn):
 @contextmanager
 def no_materialized_columns():
     "Allows running a function without any materialized columns being used in query"
-    get_materialized_columns._cache = {("events",): (now(), {}), ("person",): (now(), {})}
-    yield
-    get_materialized_columns._cache = {}
+    with patch.object(materialized_columns_registry, "get", return_value={}):
+        yield
@@ -1,7 +1,18 @@
 import copy
+from dataclasses import dataclass
 from datetime import timedelta
 from enum import Enum
-from typing import Dict, List, Mapping, Optional, Sequence, TypedDict, cast
+from types import MappingProxyType
+from typing import (
+    Dict,
+    FrozenSet,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    TypedDict,
+    cast,
+)
 
 import dateutil.parser
 from django.db.models import Q
@@ -52,12 +63,36 @@ def remove_limited_team_tokens(resource: QuotaResource, tokens: List[str]) -> No
     redis_client.zrem(f"{QUOTA_LIMITER_CACHE_KEY}{resource.value}", *tokens)
 
 
+@dataclass(frozen=True)
+class LimitedTeamTokens:
+    """
+    Snapshot of the team tokens limited for a resource, along with the timestamp each token is limited until
+    (the score in the sorted set). Membership checks are O(1) regardless of how many teams are limited.
+    """
+
+    tokens: FrozenSet[str]
+    limited_until: Mapping[str, float]
+
+    def is_limited(self, token: Optional[str]) -> bool:
+        if token not in self.tokens:
+            return False
+        # The snapshot is cached, so a limit might have expired since it was taken
+        return self.limited_until[token] >= timezone.now().timestamp()
+
+
 @cache_for(timedelta(seconds=30), background_refresh=True)
-def list_limited_team_tokens(resource: QuotaResource) -> List[str]:
+def get_limited_team_tokens(resource: QuotaResource) -> LimitedTeamTokens:
     now = timezone.now()
     redis_client = get_client()
-    results = redis_client.zrangebyscore(f"{QUOTA_LIMITER_CACHE_KEY}{resource.value}", min=now.timestamp(), max="+inf")
-    return [x.decode("utf-8") for x in results]
+    results = redis_client.zrangebyscore(
+        f"{QUOTA_LIMITER_CACHE_KEY}{resource.value}", min=now.timestamp(), max="+inf", withscores=True
+    )
+    limited_until = {token.decode("utf-8"): score for token, score in results}
+    return LimitedTeamTokens(tokens=frozenset(limited_until), limited_until=MappingProxyType(limited_until))
+
+
+def list_limited_team_tokens(resource: QuotaResource) -> List[str]:
+    return list(get_limited_team_tokens(resource).limited_until)
 
 
 class UsageCounters(TypedDict):
@@ -1,3 +1,4 @@
+from datetime import timedelta
 from uuid import uuid4
 
 from dateutil.relativedelta import relativedelta
@@ -8,6 +9,7 @@ from freezegun import freeze_time
 from ee.billing.quota_limiting import (
     QUOTA_LIMITER_CACHE_KEY,
     QuotaResource,
+    get_limited_team_tokens,
     list_limited_team_tokens,
     org_quota_limited_until,
     replace_limited_team_tokens,
@@ -208,3 +210,21 @@ class TestQuotaLimiting(BaseTest):
             self.organization.usage["events"]["usage"] = 80
             sync_org_quota_limits(self.organization)
             assert sorted(list_limited_team_tokens(QuotaResource.EVENTS)) == sorted(["1234"])
+
+    def test_get_limited_team_tokens(self):
+        with freeze_time("2021-01-01T12:59:59Z") as frozen_time:
+            now = timezone.now().timestamp()
+
+            replace_limited_team_tokens(QuotaResource.EVENTS, {"1234": now + 10, "5678": now + 10000, "9999": now - 1})
+            limited = get_limited_team_tokens(QuotaResource.EVENTS)
+
+            assert limited.tokens == frozenset(["1234", "5678"])
+            assert limited.limited_until == {"1234": now + 10, "5678": now + 10000}
+            assert limited.is_limited("1234")
+            assert not limited.is_limited("9999")
+            assert not limited.is_limited(None)
+
+            # Limits expiring after the snapshot was taken are respected
+            frozen_time.tick(delta=timedelta(seconds=11))
+            assert not limited.is_limited("1234")
+            assert limited.is_limited("5678")
@@ -1,24 +1,31 @@
+import json
 import re
-from datetime import timedelta
-from typing import Dict, List, Literal, Tuple, Union, cast
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Literal, Optional, Tuple, Union, cast
 
+import structlog
 from clickhouse_driver.errors import ServerException
 from django.utils.timezone import now
 
-from posthog.cache_utils import cache_for
 from posthog.clickhouse.kafka_engine import trim_quotes_expr
 from posthog.client import sync_execute
 from posthog.models.instance_setting import get_instance_setting
 from posthog.models.property import PropertyName, TableColumn, TableWithProperties
 from posthog.models.utils import generate_random_short_suffix
+from posthog.redis import get_client
 from posthog.settings import CLICKHOUSE_CLUSTER, CLICKHOUSE_DATABASE, TEST
 
+logger = structlog.get_logger(__name__)
+
 ColumnName = str
 DEFAULT_TABLE_COLUMN: Literal["properties"] = "properties"
 
 
 TablesWithMaterializedColumns = Union[TableWithProperties, Literal["session_recording_events"]]
 
+MaterializedColumns = Dict[Tuple[PropertyName, TableColumn], ColumnName]
+
 TRIM_AND_EXTRACT_PROPERTY = trim_quotes_expr("JSONExtractRaw({table_column}, %(property)s)")
 
 SHORT_TABLE_COLUMN_NAME = {
@@ -32,11 +39,114 @@ SHORT_TABLE_COLUMN_NAME = {
     "group4_properties": "gp4",
 }
 
+MATERIALIZED_COLUMNS_VERSION_KEY = "@posthog/materialized-columns/version"
+MATERIALIZED_COLUMNS_REGISTRY_KEY = "@posthog/materialized-columns/{version}/{table}"
+# How often each process checks whether the materialized columns changed
+MATERIALIZED_COLUMNS_VERSION_CHECK_INTERVAL = timedelta(seconds=5)
+# Columns can also be changed outside of `materialize`, so they get reloaded from ClickHouse eventually regardless
+MATERIALIZED_COLUMNS_REGISTRY_TTL = timedelta(minutes=15)
+
+
+class MaterializedColumnsRegistry:
+    """
+    Keeps the materialized columns of each table in memory, shared between processes through redis.
+
+    Processes only check a version key in redis every few seconds, and reload the columns when it changes.
+    The columns themselves are read from system.columns by a single process per version and stored in redis for the
+    others, rather than each process scanning system.columns.
+    """
 
-@cache_for(timedelta(minutes=15))
-def get_materialized_columns(
-    table: TablesWithMaterializedColumns,
-) -> Dict[Tuple[PropertyName, TableColumn], ColumnName]:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._version_checked_at: Optional[datetime] = None
+        self._columns: Dict[str, Tuple[Optional[int], datetime, MaterializedColumns]] = {}
+
+    def get(self, table: TablesWithMaterializedColumns) -> MaterializedColumns:
+        version = self._current_version()
+        cached = self._columns.get(table)
+        if cached is not None and cached[0] == version and now() - cached[1] < MATERIALIZED_COLUMNS_REGISTRY_TTL:
+            return cached[2]
+
+        columns = self._load(table, version)
+        if columns and not get_instance_setting("MATERIALIZED_COLUMNS_ENABLED"):
+            columns = {}
+        self._columns[table] = (version, now(), columns)
+        return columns
+
+    def invalidate(self) -> None:
+        "Makes every process reload the materialized columns"
+        self.clear()
+        try:
+            get_client().incr(MATERIALIZED_COLUMNS_VERSION_KEY)
+        except Exception as err:
+            logger.warning("materialized_columns_invalidation_failed", error=err)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._version = None
+            self._version_checked_at = None
+            self._columns = {}
+
+    def _current_version(self) -> Optional[int]:
+        with self._lock:
+            current_time = now()
+            if (
+                self._version_checked_at is None
+                or current_time - self._version_checked_at > MATERIALIZED_COLUMNS_VERSION_CHECK_INTERVAL
+            ):
+                try:
+                    version = get_client().get(MATERIALIZED_COLUMNS_VERSION_KEY)
+                    self._version = int(version) if version is not None else 0
+                except Exception as err:
+                    logger.warning("materialized_columns_version_check_failed", error=err)
+                self._version_checked_at = current_time
+            return self._version
+
+    def _load(self, table: TablesWithMaterializedColumns, version: Optional[int]) -> MaterializedColumns:
+        if version is None:
+            return _get_materialized_columns_from_clickhouse(table)
+
+        key = MATERIALIZED_COLUMNS_REGISTRY_KEY.format(version=version, table=table)
+        try:
+            stored = get_client().get(key)
+        except Exception as err:
+            logger.warning("materialized_columns_registry_read_failed", error=err)
+            return _get_materialized_columns_from_clickhouse(table)
+
+        if stored is not None:
+            return {(property, table_column): column_name for property, table_column, column_name in json.loads(stored)}
+
+        columns = _get_materialized_columns_from_clickhouse(table)
+        try:
+            get_client().set(
+                key,
+                json.dumps(
+                    [[property, table_column, column_name] for (property, table_column), column_name in columns.items()]
+                ),
+                ex=MATERIALIZED_COLUMNS_REGISTRY_TTL,
+            )
+        except Exception as err:
+            logger.warning("materialized_columns_registry_write_failed", error=err)
+        return columns
+
+
+materialized_columns_registry = MaterializedColumnsRegistry()
+
+
+def get_materialized_columns(table: TablesWithMaterializedColumns, use_cache: bool = not TEST) -> MaterializedColumns:
+    if not use_cache:
+        columns = _get_materialized_columns_from_clickhouse(table)
+        return columns if columns and get_instance_setting("MATERIALIZED_COLUMNS_ENABLED") else {}
+
+    return materialized_columns_registry.get(table)
+
+
+def invalidate_materialized_columns() -> None:
+    materialized_columns_registry.invalidate()
+
+
+def _get_materialized_columns_from_clickhouse(table: TablesWithMaterializedColumns) -> MaterializedColumns:
     rows = sync_execute(
         """
         SELECT comment, name
@@ -47,10 +157,7 @@ def get_materialized_columns(
     """,
         {"database": CLICKHOUSE_DATABASE, "table": table},
     )
-    if rows and get_instance_setting("MATERIALIZED_COLUMNS_ENABLED"):
-        return {_extract_property(comment): column_name for comment, column_name in rows}
-    else:
-        return {}
+    return {_extract_property(comment): column_name for comment, column_name in rows}
 
 
 def materialize(
@@ -114,6 +221,8 @@ def materialize(
     if create_minmax_index:
         add_minmax_index(table, column_name)
 
+    invalidate_materialized_columns()
+
 
 def add_minmax_index(table: TablesWithMaterializedColumns, column_name: str):
     # Note: This will be populated on backfill
@@ -192,6 +301,8 @@ def backfill_materialized_columns(
         settings=test_settings,
     )
 
+    invalidate_materialized_columns()
+
 
 def _materialized_column_name(
     table: TableWithProperties, property: PropertyName, table_column: TableColumn = DEFAULT_TABLE_COLUMN
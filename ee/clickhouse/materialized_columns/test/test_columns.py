@@ -1,13 +1,16 @@
 import random
 from datetime import timedelta
 from time import sleep
+from unittest.mock import patch
 
 from freezegun import freeze_time
 
 from ee.clickhouse.materialized_columns.columns import (
+    MaterializedColumnsRegistry,
     backfill_materialized_columns,
     get_materialized_columns,
     materialize,
+    materialized_columns_registry,
 )
 from posthog.client import sync_execute
 from posthog.conftest import create_clickhouse_tables
@@ -35,6 +38,7 @@ class TestMaterializedColumns(ClickhouseTestMixin, BaseTest):
         sync_execute(f"DROP DATABASE {CLICKHOUSE_DATABASE} SYNC")
         sync_execute(f"CREATE DATABASE {CLICKHOUSE_DATABASE}")
         create_clickhouse_tables(0)
+        materialized_columns_registry.invalidate()
 
     def test_get_columns_default(self):
         self.assertCountEqual(
@@ -70,17 +74,35 @@ class TestMaterializedColumns(ClickhouseTestMixin, BaseTest):
 
             materialize("events", "abc", create_minmax_index=True)
 
-            self.assertCountEqual(
-                [property_name for property_name, _ in get_materialized_columns("events", use_cache=True).keys()],
-                ["$foo", "$bar", *EVENTS_TABLE_DEFAULT_MATERIALIZED_COLUMNS],
-            )
-
-        with freeze_time("2020-01-04T14:00:01Z"):
+            # Materializing makes every process reload the columns, rather than waiting for the cache to expire
             self.assertCountEqual(
                 [property_name for property_name, _ in get_materialized_columns("events", use_cache=True).keys()],
                 ["$foo", "$bar", "abc", *EVENTS_TABLE_DEFAULT_MATERIALIZED_COLUMNS],
             )
 
+    def test_materializing_is_picked_up_by_other_processes(self):
+        materialize("events", "$foo", create_minmax_index=True)
+        other_process = MaterializedColumnsRegistry()
+
+        with freeze_time("2020-01-04T13:01:01Z") as frozen_time:
+            self.assertIn(("$foo", "properties"), other_process.get("events"))
+
+            materialize("events", "$bar", create_minmax_index=True)
+            self.assertNotIn(("$bar", "properties"), other_process.get("events"))
+
+            frozen_time.tick(timedelta(seconds=10))
+            self.assertIn(("$bar", "properties"), other_process.get("events"))
+
+    def test_processes_share_materialized_columns(self):
+        materialize("events", "$foo", create_minmax_index=True)
+        MaterializedColumnsRegistry().get("events")
+
+        with patch("ee.clickhouse.materialized_columns.columns.sync_execute") as sync_execute_mock:
+            columns = MaterializedColumnsRegistry().get("events")
+
+        sync_execute_mock.assert_not_called()
+        self.assertIn(("$foo", "properties"), columns)
+
     def test_materialized_column_naming(self):
         random.seed(0)
 
@@ -2,6 +2,7 @@ from dataclasses import asdict, dataclass
 from datetime import datetime
 from typing import List, Optional, Tuple, Type
 
+import numpy as np
 import pytz
 from numpy.random import default_rng
 from rest_framework.exceptions import ValidationError
@@ -216,12 +217,11 @@ def calculate_expected_loss(target_variant: Variant, variants: List[Variant]) ->
         target_variant.success_count + prior_success, target_variant.failure_count + prior_failure, simulations_count
     )
 
-    loss = 0
-    variant_conversions = list(zip(*variant_samples))
-    for i in range(simulations_count):
-        loss += max(0, max(variant_conversions[i]) - target_variant_samples[i])
+    # Best conversion rate among the other variants in each simulation
+    max_variant_conversions = np.stack(variant_samples).max(axis=0)
+    loss = np.maximum(0, max_variant_conversions - target_variant_samples)
 
-    return loss / simulations_count
+    return float(loss.mean())
 
 
 def simulate_winning_variant_for_conversion(target_variant: Variant, variants: List[Variant]) -> Probability:
@@ -243,13 +243,9 @@ def simulate_winning_variant_for_conversion(target_variant: Variant, variants: L
         target_variant.success_count + prior_success, target_variant.failure_count + prior_failure, simulations_count
     )
 
-    winnings = 0
-    variant_conversions = list(zip(*variant_samples))
-    for i in range(simulations_count):
-        if target_variant_samples[i] > max(variant_conversions[i]):
-            winnings += 1
+    max_variant_conversions = np.stack(variant_samples).max(axis=0)
 
-    return winnings / simulations_count
+    return float((target_variant_samples > max_variant_conversions).mean())
 
 
 def calculate_probability_of_winning_for_each(variants: List[Variant]) -> List[Probability]:
@@ -4,6 +4,7 @@ from functools import lru_cache
 from math import exp, lgamma, log
 from typing import List, Optional, Tuple, Type
 
+import numpy as np
 import pytz
 from numpy.random import default_rng
 from rest_framework.exceptions import ValidationError
@@ -243,13 +244,9 @@ def simulate_winning_variant_for_arrival_rates(target_variant: Variant, variants
         target_variant.count + 1, 1 / target_variant.exposure, simulations_count
     )
 
-    winnings = 0
-    variant_conversions = list(zip(*variant_samples))
-    for i in range(simulations_count):
-        if target_variant_samples[i] > max(variant_conversions[i]):
-            winnings += 1
+    max_variant_conversions = np.stack(variant_samples).max(axis=0)
 
-    return winnings / simulations_count
+    return float((target_variant_samples > max_variant_conversions).mean())
 
 
 def calculate_probability_of_winning_for_each(variants: List[Variant]) -> List[Probability]:
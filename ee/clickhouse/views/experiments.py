@@ -27,7 +27,7 @@ from posthog.permissions import (
     ProjectMembershipNecessaryPermissions,
     TeamMemberAccessPermission,
 )
-from posthog.utils import generate_cache_key, get_safe_cache
+from posthog.utils import get_safe_cache
 
 EXPERIMENT_RESULTS_CACHE_DEFAULT_TTL = 60 * 30  # 30 minutes
 
@@ -58,7 +58,7 @@ def _calculate_secondary_experiment_results(experiment: Experiment, parsed_id: i
 
 
 def _experiment_results_cached(experiment: Experiment, results_type: str, filter: Filter, calculate_func: Callable):
-    cache_key = generate_cache_key(f"experiment_{results_type}_{filter.toJSON()}_{experiment.team.pk}_{experiment.pk}")
+    cache_key = filter.cache_key(experiment.team.pk, namespace=f"experiment_{results_type}", extra=[experiment.pk])
 
     tag_queries(cache_key=cache_key)
 
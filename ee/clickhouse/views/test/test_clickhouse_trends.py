@@ -2,7 +2,6 @@ import json
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Union
-from unittest.case import skip
 from unittest.mock import ANY
 
 import pytest
@@ -1189,7 +1188,6 @@ class ClickhouseTestTrendsCaching(ClickhouseTestMixin, LicensedTestMixin, APIBas
         assert data["$action"]["2012-01-14"].value == 0
         assert data["$action"]["2012-01-15"].value == 1
 
-    @skip("Don't handle breakdowns right now")
     def test_insight_trends_merging_breakdown(self):
         set_instance_setting("STRICT_CACHING_TEAMS", "all")
 
@@ -1269,7 +1267,6 @@ class ClickhouseTestTrendsCaching(ClickhouseTestMixin, LicensedTestMixin, APIBas
         assert data["$action - 2"]["2012-01-14"].value == 0
         assert data["$action - 2"]["2012-01-15"].value == 1
 
-    @skip("Don't handle breakdowns right now")
     def test_insight_trends_merging_breakdown_multiple(self):
         set_instance_setting("STRICT_CACHING_TEAMS", "all")
 
@@ -1388,7 +1385,7 @@ class ClickhouseTestTrendsCaching(ClickhouseTestMixin, LicensedTestMixin, APIBas
         assert data["$action - 2"]["2012-01-14"].value == 0
         assert data["$action - 2"]["2012-01-15"].value == 1
 
-    # When the latest time interval in the cached result doesn't match the current interval, do not use caching pattern
+    # When the cached result is a few intervals behind, only the intervals that weren't complete are queried again
     @snapshot_clickhouse_queries
     def test_insight_trends_merging_skipped_interval(self):
         set_instance_setting("STRICT_CACHING_TEAMS", "all")
@@ -1,8 +1,9 @@
 # EE extended functions for SessionRecording model
 
+import gzip
 import json
 from datetime import timedelta
-from typing import Optional
+from typing import Dict, Generator, Iterable, Iterator, List, Optional, Union
 
 import structlog
 from django.utils import timezone
@@ -10,9 +11,22 @@ from sentry_sdk import capture_exception
 
 from posthog import settings
 from posthog.event_usage import report_team_action
-from posthog.models.session_recording.metadata import PersistedRecordingV1
+from posthog.models.session_recording.metadata import (
+    DecompressedRecordingData,
+    PersistedRecordingV1,
+    PersistedRecordingV2,
+    PersistedSnapshotDataPart,
+    SnapshotData,
+    WindowId,
+)
 from posthog.models.session_recording.session_recording import SessionRecording
-from posthog.session_recordings.session_recording_helpers import compress_to_string, decompress
+from posthog.queries.session_recordings.session_recording_events import SessionRecordingEvents
+from posthog.session_recordings.session_recording_helpers import (
+    LazyRecordingData,
+    compress_to_string,
+    decompress,
+    iter_snapshot_data_by_window_id_json,
+)
 from posthog.storage import object_storage
 
 logger = structlog.get_logger(__name__)
@@ -20,6 +34,66 @@ logger = structlog.get_logger(__name__)
 
 MINIMUM_AGE_FOR_RECORDING = timedelta(hours=24)
 
+PERSISTED_RECORDING_VERSION = "2023-03-01"
+
+# Number of snapshot chunk groups decompressed and written together as one independently readable part
+SNAPSHOT_CHUNKS_PER_PART = 20
+# Number of Clickhouse rows read at a time while persisting a recording
+SNAPSHOT_ROWS_PER_QUERY = 500
+
+
+def _build_snapshot_data_path(object_path: str) -> str:
+    return f"{object_path}-snapshots"
+
+
+class SnapshotLoadError(Exception):
+    """Raised when reading a recording's snapshots from Clickhouse fails while it is being persisted"""
+
+
+def _timed_pages(
+    pages: Iterator[LazyRecordingData], analytics_payload: Dict
+) -> Generator[LazyRecordingData, None, None]:
+    while True:
+        start_time = timezone.now()
+        try:
+            page = next(pages, None)
+        except Exception as e:
+            raise SnapshotLoadError() from e
+        analytics_payload["snapshots_load_time_ms"] += (timezone.now() - start_time).total_seconds() * 1000
+        if page is None:
+            return
+        yield page
+
+
+def _compress_snapshot_data_parts(
+    lazy_pages: Iterable[LazyRecordingData], parts: List[PersistedSnapshotDataPart], analytics_payload: Dict
+) -> Generator[bytes, None, None]:
+    """
+    Decompresses one page of snapshot chunks at a time and yields it as its own gzip member. Concatenated gzip members
+    are still a valid gzip file, and the recorded offsets let each page be range-read and decompressed on its own.
+    """
+    offset = 0
+    pages = (page for lazy_data in lazy_pages for page in lazy_data.paginate(SNAPSHOT_CHUNKS_PER_PART))
+    for page in pages:
+        content = "".join(iter_snapshot_data_by_window_id_json(page)).encode("utf-8")
+        compressed_content = gzip.compress(content)
+
+        parts.append(
+            PersistedSnapshotDataPart(
+                offset=offset, length=len(compressed_content), window_ids=list(page.chunk_groups_by_window_id)
+            )
+        )
+        offset += len(compressed_content)
+        analytics_payload["content_size_in_bytes"] += len(content)
+        analytics_payload["compressed_size_in_bytes"] += len(compressed_content)
+
+        yield compressed_content
+
+    if not parts:
+        compressed_content = gzip.compress(b"{}")
+        parts.append(PersistedSnapshotDataPart(offset=0, length=len(compressed_content), window_ids=[]))
+        yield compressed_content
+
 
 def persist_recording(recording_id: str, team_id: int) -> None:
     """Persist a recording to the S3"""
@@ -65,30 +139,34 @@ def persist_recording(recording_id: str, team_id: int) -> None:
         recording.save()
         return
 
-    recording.load_snapshots(100_000)  # TODO: Paginate rather than hardcode a limit
-    analytics_payload["snapshots_load_time_ms"] = (
-        timezone.now() - start_time
-    ).total_seconds() * 1000 - analytics_payload["metadata_load_time_ms"]
-
-    content: PersistedRecordingV1 = {
-        "version": "2022-12-22",
-        "distinct_id": recording.distinct_id,
-        "snapshot_data_by_window_id": recording.snapshot_data_by_window_id,
-        "start_and_end_times_by_window_id": recording.start_and_end_times_by_window_id,
-        "segments": recording.segments,
-    }
-
-    # TODO: This is a hack workaround for datetime conversion
-    string_content = json.dumps(content, default=str)
-    analytics_payload["content_size_in_bytes"] = len(string_content.encode("utf-8"))
-    string_content = compress_to_string(string_content)
-    analytics_payload["compressed_size_in_bytes"] = len(string_content.encode("utf-8"))
-
     logger.info("Persisting recording: writing to S3...", recording_id=recording_id, team_id=team_id)
 
     try:
         object_path = recording.build_object_storage_path()
-        object_storage.write(object_path, string_content.encode("utf-8"))
+        snapshot_data_path = _build_snapshot_data_path(object_path)
+        snapshot_data_parts: List[PersistedSnapshotDataPart] = []
+        # Snapshots are read from Clickhouse a page of rows at a time, and decompressed part by part as they are uploaded
+        lazy_pages = SessionRecordingEvents(
+            team=recording.team, session_recording_id=recording.session_id, recording_start_time=recording.start_time
+        ).iter_lazy_snapshot_pages(SNAPSHOT_ROWS_PER_QUERY)
+        object_storage.write_multipart(
+            snapshot_data_path,
+            _compress_snapshot_data_parts(
+                _timed_pages(lazy_pages, analytics_payload), snapshot_data_parts, analytics_payload
+            ),
+        )
+
+        content: PersistedRecordingV2 = {
+            "version": PERSISTED_RECORDING_VERSION,
+            "distinct_id": recording.distinct_id,
+            "start_and_end_times_by_window_id": recording.start_and_end_times_by_window_id,
+            "segments": recording.segments,
+            "snapshot_data_path": snapshot_data_path,
+            "snapshot_data_parts": snapshot_data_parts,
+        }
+
+        # TODO: This is a hack workaround for datetime conversion
+        object_storage.write(object_path, compress_to_string(json.dumps(content, default=str)).encode("utf-8"))
         recording.object_storage_path = object_path
         recording.save()
 
@@ -102,25 +180,77 @@ def persist_recording(recording_id: str, team_id: int) -> None:
         logger.error(
             "session_recording.object-storage-error", recording_id=recording.session_id, exception=ose, exc_info=True
         )
+    except SnapshotLoadError as sle:
+        capture_exception(sle.__cause__)
+        report_team_action(recording.team, "session recording persist failed", analytics_payload)
+        logger.error(
+            "session_recording.snapshot-load-error",
+            recording_id=recording.session_id,
+            exception=sle.__cause__,
+            exc_info=True,
+        )
 
 
-def load_persisted_recording(recording: SessionRecording) -> Optional[PersistedRecordingV1]:
-    """Load a persisted recording from S3"""
+def _decompress_snapshot_data_part(compressed_content: bytes) -> Dict[WindowId, List[SnapshotData]]:
+    return json.loads(gzip.decompress(compressed_content))
 
-    logger.info(
-        "Persisting recording load: reading from S3...",
-        recording_id=recording.session_id,
-        path=recording.object_storage_path,
-    )
+
+def load_persisted_snapshot_data_part(
+    snapshot_data_path: str, part: PersistedSnapshotDataPart
+) -> Dict[WindowId, List[SnapshotData]]:
+    """Range-read and decompress a single part of a persisted recording's snapshot data"""
+    compressed_content = object_storage.read_bytes(snapshot_data_path, offset=part["offset"], length=part["length"])
+    return _decompress_snapshot_data_part(compressed_content or b"")
+
+
+def load_persisted_snapshot_data_page(
+    recording: SessionRecording, part_index: int, window_id: Optional[WindowId] = None
+) -> Optional[DecompressedRecordingData]:
+    """
+    Range-reads only the `part_index`-th part of a persisted recording's snapshot data, counting only the parts with
+    snapshots of `window_id` if given. Returns None for recordings persisted before snapshot data was split into parts.
+    """
+    persisted_recording = _read_persisted_recording(recording)
+    if not persisted_recording or not persisted_recording.get("snapshot_data_path"):
+        return None
+
+    parts = [
+        part
+        for part in persisted_recording["snapshot_data_parts"]
+        if window_id is None or window_id in part["window_ids"]
+    ]
+    if part_index >= len(parts):
+        return DecompressedRecordingData(has_next=False, snapshot_data_by_window_id={})
 
     try:
-        content = object_storage.read(recording.object_storage_path)
-        decompressed = json.loads(decompress(content))
-        logger.info(
-            "Persisting recording load: loaded!", recording_id=recording.session_id, path=recording.object_storage_path
+        snapshot_data_by_window_id = load_persisted_snapshot_data_part(
+            persisted_recording["snapshot_data_path"], parts[part_index]
+        )
+    except object_storage.ObjectStorageError as ose:
+        capture_exception(ose)
+        logger.error(
+            "session_recording.object-storage-load-error",
+            recording_id=recording.session_id,
+            path=persisted_recording["snapshot_data_path"],
+            exception=ose,
+            exc_info=True,
         )
+        return None
+
+    if window_id is not None:
+        snapshot_data_by_window_id = {
+            key: value for key, value in snapshot_data_by_window_id.items() if key == window_id
+        }
+
+    return DecompressedRecordingData(
+        has_next=part_index + 1 < len(parts),
+        snapshot_data_by_window_id=snapshot_data_by_window_id,  # type: ignore
+    )
 
-        return decompressed
+
+def _read_persisted_recording(recording: SessionRecording) -> Optional[Dict]:
+    try:
+        return json.loads(decompress(object_storage.read(recording.object_storage_path)))
     except object_storage.ObjectStorageError as ose:
         capture_exception(ose)
         logger.error(
@@ -130,5 +260,27 @@ def load_persisted_recording(recording: SessionRecording) -> Optional[PersistedR
             exception=ose,
             exc_info=True,
         )
-
         return None
+
+
+def load_persisted_recording(
+    recording: SessionRecording,
+) -> Optional[Union[PersistedRecordingV1, PersistedRecordingV2]]:
+    """
+    Load a persisted recording from S3. Recordings persisted with their snapshot data split into parts only have their
+    metadata loaded, their snapshots are read a part at a time with `load_persisted_snapshot_data_page`.
+    """
+
+    logger.info(
+        "Persisting recording load: reading from S3...",
+        recording_id=recording.session_id,
+        path=recording.object_storage_path,
+    )
+
+    persisted_recording = _read_persisted_recording(recording)
+    if persisted_recording:
+        logger.info(
+            "Persisting recording load: loaded!", recording_id=recording.session_id, path=recording.object_storage_path
+        )
+
+    return persisted_recording  # type: ignore
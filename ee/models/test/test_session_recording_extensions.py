@@ -1,21 +1,31 @@
+import json
 from datetime import timedelta
 from secrets import token_urlsafe
+from typing import Dict, List
 from unittest.mock import patch
 
 from freezegun import freeze_time
 
-from ee.models.session_recording_extensions import load_persisted_recording, persist_recording
+from ee.models.session_recording_extensions import (
+    PERSISTED_RECORDING_VERSION,
+    load_persisted_recording,
+    load_persisted_snapshot_data_page,
+    load_persisted_snapshot_data_part,
+    persist_recording,
+)
 from posthog.models.session_recording.session_recording import SessionRecording
 from posthog.models.session_recording_playlist.session_recording_playlist import SessionRecordingPlaylist
 from posthog.models.session_recording_playlist_item.session_recording_playlist_item import SessionRecordingPlaylistItem
+from posthog.session_recordings.session_recording_helpers import decompress
 from posthog.session_recordings.test.test_factory import create_session_recording_events
+from posthog.storage import object_storage
 from posthog.test.base import APIBaseTest, ClickhouseTestMixin
 
 long_url = f"https://app.posthog.com/my-url?token={token_urlsafe(600)}"
 
 
 class TestSessionRecordingExtensions(ClickhouseTestMixin, APIBaseTest):
-    def create_snapshot(self, session_id, timestamp):
+    def create_snapshot(self, session_id, timestamp, chunk_size=512 * 1024):
         team_id = self.team.pk
 
         snapshot = {
@@ -32,6 +42,7 @@ class TestSessionRecordingExtensions(ClickhouseTestMixin, APIBaseTest):
             session_id=session_id,
             window_id="window_1",
             snapshots=[snapshot],
+            chunk_size=chunk_size,
         )
 
     def test_does_not_persist_too_recent_recording(self):
@@ -61,25 +72,12 @@ class TestSessionRecordingExtensions(ClickhouseTestMixin, APIBaseTest):
         assert recording.keypress_count == 0
         assert recording.start_url == "https://app.posthog.com/my-url"
 
-        assert load_persisted_recording(recording) == {
-            "version": "2022-12-22",
+        persisted = load_persisted_recording(recording)
+        assert persisted is not None
+        assert persisted["snapshot_data_path"] == f"/session_recordings/team-{self.team.pk}/session-s1-snapshots"  # type: ignore
+        assert {key: value for key, value in persisted.items() if not key.startswith("snapshot_data")} == {
+            "version": PERSISTED_RECORDING_VERSION,
             "distinct_id": "distinct_id_1",
-            "snapshot_data_by_window_id": {
-                "window_1": [
-                    {
-                        "timestamp": 1640865600000.0,
-                        "has_full_snapshot": 1,
-                        "type": 2,
-                        "data": {"source": 0, "href": long_url},
-                    },
-                    {
-                        "timestamp": 1640872800000.0,
-                        "has_full_snapshot": 1,
-                        "type": 2,
-                        "data": {"source": 0, "href": long_url},
-                    },
-                ]
-            },
             "start_and_end_times_by_window_id": {
                 "window_1": {
                     "window_id": "window_1",
@@ -97,6 +95,149 @@ class TestSessionRecordingExtensions(ClickhouseTestMixin, APIBaseTest):
                 }
             ],
         }
+        assert self._load_persisted_snapshots(recording) == [
+            {
+                "timestamp": 1640865600000.0,
+                "has_full_snapshot": 1,
+                "type": 2,
+                "data": {"source": 0, "href": long_url},
+            },
+            {
+                "timestamp": 1640872800000.0,
+                "has_full_snapshot": 1,
+                "type": 2,
+                "data": {"source": 0, "href": long_url},
+            },
+        ]
+
+    def _load_persisted_snapshots(self, recording: SessionRecording) -> List[Dict]:
+        snapshots: List[Dict] = []
+        part_index = 0
+        while True:
+            page = load_persisted_snapshot_data_page(recording, part_index)
+            assert page is not None
+            snapshots.extend(page["snapshot_data_by_window_id"].get("window_1", []))
+            if not page["has_next"]:
+                return snapshots
+            part_index += 1
+
+    def test_loading_metadata_of_persisted_recording_does_not_read_snapshots(self):
+        with freeze_time("2022-01-01T12:00:00Z"):
+            recording = SessionRecording.objects.create(team=self.team, session_id="s1")
+            self.create_snapshot(recording.session_id, recording.created_at - timedelta(hours=48))
+
+        persist_recording(recording.session_id, recording.team_id)
+        recording = SessionRecording.objects.get(pk=recording.pk)
+
+        with patch(
+            "ee.models.session_recording_extensions.object_storage.read_bytes", wraps=object_storage.read_bytes
+        ) as read_bytes:
+            assert recording.load_metadata()
+
+        assert recording.segments is not None
+        read_bytes.assert_not_called()
+
+    @patch("ee.models.session_recording_extensions.report_team_action")
+    def test_snapshot_query_errors_are_not_reported_as_object_storage_errors(self, mock_report):
+        with freeze_time("2022-01-01T12:00:00Z"):
+            recording = SessionRecording.objects.create(team=self.team, session_id="s1")
+            self.create_snapshot(recording.session_id, recording.created_at - timedelta(hours=48))
+
+        def failing_pages():
+            raise ValueError("query failed")
+            yield
+
+        with patch(
+            "ee.models.session_recording_extensions.SessionRecordingEvents.iter_lazy_snapshot_pages",
+            return_value=failing_pages(),
+        ), patch("ee.models.session_recording_extensions.logger") as mock_logger:
+            persist_recording(recording.session_id, recording.team_id)
+
+        recording.refresh_from_db()
+        assert not recording.object_storage_path
+        assert mock_report.call_args[0][1] == "session recording persist failed"
+        assert mock_logger.error.call_args[0][0] == "session_recording.snapshot-load-error"
+
+    @patch("ee.models.session_recording_extensions.SNAPSHOT_CHUNKS_PER_PART", 1)
+    def test_persists_recording_in_range_readable_parts(self):
+        with freeze_time("2022-01-01T12:00:00Z"):
+            recording = SessionRecording.objects.create(team=self.team, session_id="s1")
+            for hours in [48, 47, 46]:
+                self.create_snapshot(recording.session_id, recording.created_at - timedelta(hours=hours))
+
+        persist_recording(recording.session_id, recording.team_id)
+        recording.refresh_from_db()
+
+        persisted = json.loads(decompress(object_storage.read(recording.object_storage_path)))
+        assert persisted["snapshot_data_path"] == f"/session_recordings/team-{self.team.pk}/session-s1-snapshots"
+        assert [part["window_ids"] for part in persisted["snapshot_data_parts"]] == [["window_1"]] * 3
+        assert [part["offset"] for part in persisted["snapshot_data_parts"][1:]] == [
+            part["offset"] + part["length"] for part in persisted["snapshot_data_parts"][:-1]
+        ]
+
+        second_part = load_persisted_snapshot_data_part(
+            persisted["snapshot_data_path"], persisted["snapshot_data_parts"][1]
+        )
+        assert second_part["window_1"][0]["timestamp"] == 1640869200000.0
+
+        assert [snapshot["timestamp"] for snapshot in self._load_persisted_snapshots(recording)] == [
+            1640865600000.0,
+            1640869200000.0,
+            1640872800000.0,
+        ]
+
+    @patch("ee.models.session_recording_extensions.SNAPSHOT_ROWS_PER_QUERY", 2)
+    def test_persists_recording_reading_clickhouse_a_page_at_a_time(self):
+        with freeze_time("2022-01-01T12:00:00Z"):
+            recording = SessionRecording.objects.create(team=self.team, session_id="s1")
+            for hours in [48, 47, 46]:
+                # Every snapshot is split into chunks spanning several pages of rows
+                self.create_snapshot(
+                    recording.session_id, recording.created_at - timedelta(hours=hours), chunk_size=100
+                )
+
+        persist_recording(recording.session_id, recording.team_id)
+        recording.refresh_from_db()
+
+        assert [snapshot["timestamp"] for snapshot in self._load_persisted_snapshots(recording)] == [
+            1640865600000.0,
+            1640869200000.0,
+            1640872800000.0,
+        ]
+
+    @patch("ee.models.session_recording_extensions.SNAPSHOT_CHUNKS_PER_PART", 1)
+    def test_loads_persisted_snapshots_a_part_at_a_time(self):
+        with freeze_time("2022-01-01T12:00:00Z"):
+            recording = SessionRecording.objects.create(team=self.team, session_id="s1")
+            for hours in [48, 47]:
+                self.create_snapshot(recording.session_id, recording.created_at - timedelta(hours=hours))
+
+        persist_recording(recording.session_id, recording.team_id)
+        recording.refresh_from_db()
+
+        with patch(
+            "ee.models.session_recording_extensions.object_storage.read_bytes", wraps=object_storage.read_bytes
+        ) as read_bytes:
+            first_page = load_persisted_snapshot_data_page(recording, 0)
+            second_page = load_persisted_snapshot_data_page(recording, 1)
+
+        # Only the requested byte ranges are read
+        assert all(call.kwargs.get("length") for call in read_bytes.call_args_list)
+
+        assert first_page is not None and second_page is not None
+        assert first_page["has_next"] is True
+        assert [snapshot["timestamp"] for snapshot in first_page["snapshot_data_by_window_id"]["window_1"]] == [
+            1640865600000.0
+        ]
+        assert second_page["has_next"] is False
+        assert [snapshot["timestamp"] for snapshot in second_page["snapshot_data_by_window_id"]["window_1"]] == [
+            1640869200000.0
+        ]
+
+        assert load_persisted_snapshot_data_page(recording, 0, "other_window") == {
+            "has_next": False,
+            "snapshot_data_by_window_id": {},
+        }
 
     @patch("ee.models.session_recording_extensions.report_team_action")
     def test_persist_tracks_correct_to_posthog(self, mock_capture):
@@ -1,26 +1,124 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
+from typing import Any, List, Optional, Tuple
 
 import structlog
+from django.conf import settings
+from django.db import connection
 from django.utils import timezone
+from sentry_sdk import capture_exception
+from statshog.defaults.django import statsd
 
 from ee.models.session_recording_extensions import persist_recording
 from posthog.celery import app
 from posthog.models.session_recording.session_recording import SessionRecording
+from posthog.redis import get_client
 
 logger = structlog.get_logger(__name__)
 
+# Claims stop two overlapping runs (or a run and a single recording task) from persisting the same recording
+PERSISTENCE_CLAIM_KEY_PREFIX = "@posthog/session-recording-persistence/claim"
+PERSISTENCE_CLAIM_TTL_SECONDS = 60 * 60
+
 
 @app.task()
 def persist_single_recording(id: str, team_id: int) -> None:
-    persist_recording(id, team_id)
+    if not _claim_recordings([(id, team_id)]):
+        logger.info("Recording is already being persisted", recording_id=id, team_id=team_id)
+        return
+    _persist_claimed_recording(id, team_id)
+
+
+def _claim_key(session_id: str, team_id: int) -> str:
+    return f"{PERSISTENCE_CLAIM_KEY_PREFIX}/{team_id}/{session_id}"
+
+
+def _claim_recordings(batch: List[Tuple[str, int]]) -> List[Tuple[str, int]]:
+    redis_client = get_client()
+    pipeline = redis_client.pipeline(transaction=False)
+    for session_id, team_id in batch:
+        pipeline.set(_claim_key(session_id, team_id), 1, nx=True, ex=PERSISTENCE_CLAIM_TTL_SECONDS)
+    return [recording for recording, claimed in zip(batch, pipeline.execute()) if claimed]
+
+
+def _persist_claimed_recording(session_id: str, team_id: int) -> bool:
+    start_time = time.monotonic()
+    succeeded = False
+    try:
+        persist_recording(session_id, team_id)
+        succeeded = True
+    except Exception as e:
+        capture_exception(e)
+        logger.error("Persisting recording failed", recording_id=session_id, team_id=team_id, exc_info=True)
+    finally:
+        statsd.timing("session_recording_persistence.recording_time", (time.monotonic() - start_time) * 1000)
+        if not succeeded:
+            # Release the claim, so that the next run (or a manual one) can retry the recording right away
+            try:
+                get_client().delete(_claim_key(session_id, team_id))
+            except Exception as e:
+                capture_exception(e)
+        # Worker threads each open their own database connection, which Django won't close for us
+        connection.close()
+
+    return succeeded
 
 
 @app.task()
 def persist_finished_recordings() -> None:
+    """
+    Persists all recordings older than a day that haven't been persisted yet, oldest first. Recordings are claimed
+    in batches and persisted by a bounded pool of threads within this task, rather than as one task per recording.
+    """
     one_day_old = timezone.now() - timedelta(hours=24)
     finished_recordings = SessionRecording.objects.filter(created_at__lte=one_day_old, object_storage_path=None)
 
-    logger.info("Persisting finished recordings", count=finished_recordings.count())
+    backlog = finished_recordings.count()
+    statsd.gauge("session_recording_persistence.backlog", backlog)
+    logger.info("Persisting finished recordings", count=backlog)
+
+    start_time = time.monotonic()
+    persisted_count = failed_count = 0
+    last_seen: Optional[Tuple[Any, Any]] = None
+
+    with ThreadPoolExecutor(max_workers=settings.SESSION_RECORDING_PERSISTENCE_WORKERS) as executor:
+        while persisted_count + failed_count < settings.SESSION_RECORDING_PERSISTENCE_MAX_PER_RUN:
+            remaining = settings.SESSION_RECORDING_PERSISTENCE_MAX_PER_RUN - persisted_count - failed_count
+            # Keyset pagination, so that recordings persisted (or skipped) by earlier batches don't shift later ones
+            batch_queryset = finished_recordings.order_by("created_at", "id")
+            if last_seen is not None:
+                batch_queryset = batch_queryset.filter(created_at__gte=last_seen[0]).exclude(
+                    created_at=last_seen[0], id__lte=last_seen[1]
+                )
+            batch = list(
+                batch_queryset.values_list("created_at", "id", "session_id", "team_id")[
+                    : min(settings.SESSION_RECORDING_PERSISTENCE_BATCH_SIZE, remaining)
+                ]
+            )
+            if not batch:
+                break
+            last_seen = (batch[-1][0], batch[-1][1])
+
+            claimed = _claim_recordings([(session_id, team_id) for _, _, session_id, team_id in batch])
+            statsd.incr("session_recording_persistence.claimed", len(claimed))
+
+            for succeeded in executor.map(lambda recording: _persist_claimed_recording(*recording), claimed):
+                if succeeded:
+                    persisted_count += 1
+                else:
+                    failed_count += 1
+
+    duration_seconds = time.monotonic() - start_time
+    statsd.incr("session_recording_persistence.persisted", persisted_count)
+    statsd.incr("session_recording_persistence.failed", failed_count)
+    statsd.gauge("session_recording_persistence.backlog_remaining", max(backlog - persisted_count, 0))
+    if duration_seconds > 0:
+        statsd.gauge("session_recording_persistence.recordings_per_second", persisted_count / duration_seconds)
 
-    for recording in finished_recordings:
-        persist_single_recording.delay(recording.session_id, recording.team_id)
+    logger.info(
+        "Persisted finished recordings",
+        persisted=persisted_count,
+        failed=failed_count,
+        duration_seconds=duration_seconds,
+    )
@@ -0,0 +1,105 @@
+from datetime import timedelta
+from unittest.mock import call, patch
+from uuid import uuid4
+
+from django.utils import timezone
+
+from ee.tasks.session_recording.persistence import persist_finished_recordings, persist_single_recording
+from posthog.models.session_recording.session_recording import SessionRecording
+from posthog.test.base import APIBaseTest
+
+
+class TestPersistFinishedRecordings(APIBaseTest):
+    def _create_recording(self, age: timedelta, **kwargs) -> SessionRecording:
+        recording = SessionRecording.objects.create(team=self.team, session_id=str(uuid4()), **kwargs)
+        # created_at is auto_now_add, so it can only be backdated after creation
+        SessionRecording.objects.filter(pk=recording.pk).update(created_at=timezone.now() - age)
+        return recording
+
+    @patch("ee.tasks.session_recording.persistence.persist_recording")
+    def test_persists_finished_recordings_in_batches_oldest_first(self, mock_persist_recording):
+        oldest = self._create_recording(timedelta(days=3))
+        older = self._create_recording(timedelta(days=2))
+        self._create_recording(timedelta(days=4), object_storage_path="/already/persisted")
+        self._create_recording(timedelta(hours=1))
+
+        with self.settings(SESSION_RECORDING_PERSISTENCE_BATCH_SIZE=1, SESSION_RECORDING_PERSISTENCE_WORKERS=2):
+            persist_finished_recordings()
+
+        assert mock_persist_recording.call_args_list == [
+            call(oldest.session_id, self.team.pk),
+            call(older.session_id, self.team.pk),
+        ]
+
+    @patch("ee.tasks.session_recording.persistence.persist_recording")
+    def test_claimed_recordings_are_not_persisted_twice(self, mock_persist_recording):
+        self._create_recording(timedelta(days=2))
+
+        persist_finished_recordings()
+        persist_finished_recordings()
+
+        assert mock_persist_recording.call_count == 1
+
+    @patch("ee.tasks.session_recording.persistence.persist_recording")
+    def test_failures_dont_stop_the_run(self, mock_persist_recording):
+        mock_persist_recording.side_effect = [Exception("boom"), None]
+        self._create_recording(timedelta(days=3))
+        self._create_recording(timedelta(days=2))
+
+        with self.settings(SESSION_RECORDING_PERSISTENCE_WORKERS=1):
+            persist_finished_recordings()
+
+        assert mock_persist_recording.call_count == 2
+
+    @patch("ee.tasks.session_recording.persistence.persist_recording")
+    def test_stops_after_max_recordings_per_run(self, mock_persist_recording):
+        for days in range(2, 5):
+            self._create_recording(timedelta(days=days))
+
+        with self.settings(SESSION_RECORDING_PERSISTENCE_BATCH_SIZE=1, SESSION_RECORDING_PERSISTENCE_MAX_PER_RUN=2):
+            persist_finished_recordings()
+
+        assert mock_persist_recording.call_count == 2
+
+    @patch("ee.tasks.session_recording.persistence.persist_recording")
+    def test_max_recordings_per_run_applies_within_a_batch(self, mock_persist_recording):
+        for days in range(2, 5):
+            self._create_recording(timedelta(days=days))
+
+        with self.settings(SESSION_RECORDING_PERSISTENCE_BATCH_SIZE=10, SESSION_RECORDING_PERSISTENCE_MAX_PER_RUN=2):
+            persist_finished_recordings()
+
+        assert mock_persist_recording.call_count == 2
+
+    @patch("ee.tasks.session_recording.persistence.persist_recording")
+    def test_failed_recordings_can_be_retried_right_away(self, mock_persist_recording):
+        mock_persist_recording.side_effect = [Exception("boom"), None]
+        recording = self._create_recording(timedelta(days=2))
+
+        persist_finished_recordings()
+        persist_finished_recordings()
+
+        assert mock_persist_recording.call_args_list == [
+            call(recording.session_id, self.team.pk),
+            call(recording.session_id, self.team.pk),
+        ]
+
+    @patch("ee.tasks.session_recording.persistence.persist_recording")
+    def test_single_recordings_are_claimed_too(self, mock_persist_recording):
+        recording = self._create_recording(timedelta(days=2))
+
+        persist_single_recording(recording.session_id, self.team.pk)
+        persist_finished_recordings()
+        persist_single_recording(recording.session_id, self.team.pk)
+
+        assert mock_persist_recording.call_args_list == [call(recording.session_id, self.team.pk)]
+
+    @patch("ee.tasks.session_recording.persistence.persist_recording")
+    def test_failed_single_recordings_release_their_claim(self, mock_persist_recording):
+        mock_persist_recording.side_effect = [Exception("boom"), None]
+        recording = self._create_recording(timedelta(days=2))
+
+        persist_single_recording(recording.session_id, self.team.pk)
+        persist_finished_recordings()
+
+        assert mock_persist_recording.call_count == 2
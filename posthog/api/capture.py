@@ -3,7 +3,7 @@ import json
 import re
 import time
 from datetime import datetime
-from typing import Any, Dict, Iterator, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 
 import structlog
 from dateutil import parser
@@ -13,7 +13,7 @@ from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 from kafka.errors import KafkaError
 from kafka.producer.future import FutureRecordMetadata
-from prometheus_client import Counter
+from prometheus_client import Counter, Histogram
 from rest_framework import status
 from sentry_sdk import configure_scope
 from sentry_sdk.api import capture_exception, start_span
@@ -28,7 +28,7 @@ from posthog.api.utils import (
     safe_clickhouse_string,
 )
 from posthog.exceptions import generate_exception_response
-from posthog.kafka_client.client import KafkaProducer
+from posthog.kafka_client.client import KafkaProducer, ProduceBatchResult
 from posthog.kafka_client.topics import KAFKA_DEAD_LETTER_QUEUE, KAFKA_SESSION_RECORDING_EVENTS
 from posthog.logging.timing import timed
 from posthog.metrics import LABEL_RESOURCE_TYPE, LABEL_TEAM_ID
@@ -73,6 +73,20 @@ TOKEN_SHAPE_INVALID_COUNTER = Counter(
     labelnames=["reason"],
 )
 
+KAFKA_PRODUCE_BATCH_SIZE_HISTOGRAM = Histogram(
+    "capture_kafka_produce_batch_size",
+    "Number of Kafka records produced per capture request, per produce mode.",
+    labelnames=["mode"],
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, float("inf")),
+)
+
+KAFKA_PRODUCE_ACK_LATENCY_HISTOGRAM = Histogram(
+    "capture_kafka_produce_ack_latency_seconds",
+    "Time spent waiting for Kafka to acknowledge all records of a capture request, per produce mode.",
+    labelnames=["mode"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, float("inf")),
+)
+
 
 def parse_kafka_event_data(
     distinct_id: str,
@@ -99,16 +113,20 @@ def parse_kafka_event_data(
     }
 
 
-def log_event(data: Dict, event_name: str, partition_key: Optional[str]):
+def get_kafka_topic(event_name: str) -> str:
     # To allow for different quality of service on session recordings and
     # `$performance_event` and other events, we push to a different topic.
     # TODO: split `$performance_event` out to it's own topic.
-    kafka_topic = (
+    return (
         KAFKA_SESSION_RECORDING_EVENTS
         if event_name in SESSION_RECORDING_EVENT_NAMES
         else settings.KAFKA_EVENTS_PLUGIN_INGESTION_TOPIC
     )
 
+
+def log_event(data: Dict, event_name: str, partition_key: Optional[str]):
+    kafka_topic = get_kafka_topic(event_name)
+
     logger.debug("logging_event", event_name=event_name, kafka_topic=kafka_topic)
 
     # TODO: Handle Kafka being unavailable with exponential backoff retries
@@ -252,21 +270,26 @@ def drop_events_over_quota(
     if not settings.EE_AVAILABLE:
         return events
 
-    from ee.billing.quota_limiting import QuotaResource, list_limited_team_tokens
+    from ee.billing.quota_limiting import QuotaResource, get_limited_team_tokens
+
+    events_limited = get_limited_team_tokens(QuotaResource.EVENTS).is_limited(token)
+    recordings_limited = get_limited_team_tokens(QuotaResource.RECORDINGS).is_limited(token)
+
+    # The vast majority of requests come from teams that aren't limited, so there is no need to look at each event
+    if not events_limited and not recordings_limited:
+        return events
 
     results = []
-    limited_tokens_events = list_limited_team_tokens(QuotaResource.EVENTS)
-    limited_tokens_recordings = list_limited_team_tokens(QuotaResource.RECORDINGS)
     team_id = ingestion_context.team_id if ingestion_context else None
 
     for event in events:
         if event.get("event") in SESSION_RECORDING_EVENT_NAMES:
-            if token in limited_tokens_recordings:
+            if recordings_limited:
                 EVENTS_DROPPED_OVER_QUOTA_COUNTER.labels(resource_type="recordings", team_id=team_id, token=token).inc()
                 if settings.QUOTA_LIMITING_ENABLED:
                     continue
 
-        elif token in limited_tokens_events:
+        elif events_limited:
             EVENTS_DROPPED_OVER_QUOTA_COUNTER.labels(resource_type="events", team_id=team_id, token=token).inc()
             if settings.QUOTA_LIMITING_ENABLED:
                 continue
@@ -388,7 +411,10 @@ def get_event(request):
                 request, generate_exception_response("capture", f"Invalid payload: {e}", code="invalid_payload")
             )
 
-    futures: List[FutureRecordMetadata] = []
+    batch_produce = settings.CAPTURE_KAFKA_BATCH_PRODUCE_ENABLED
+    produce_mode = "batch" if batch_produce else "single"
+    futures: List[Union[FutureRecordMetadata, ProduceBatchResult]] = []
+    kafka_records: List[Tuple[str, Dict, Optional[str]]] = []
 
     with start_span(op="kafka.produce") as span:
         span.set_tag("event.count", len(processed_events))
@@ -416,25 +442,26 @@ def get_event(request):
                 continue
 
             try:
-                futures.append(
-                    capture_internal(
-                        event, distinct_id, ip, site_url, now, sent_at, team_id, event_uuid, token
-                    )  # type: ignore
-                )
+                if batch_produce:
+                    kafka_records.append(
+                        build_kafka_record(event, distinct_id, ip, site_url, now, sent_at, team_id, event_uuid, token)
+                    )
+                else:
+                    futures.append(
+                        capture_internal(
+                            event, distinct_id, ip, site_url, now, sent_at, team_id, event_uuid, token
+                        )  # type: ignore
+                    )
             except Exception as exc:
-                capture_exception(exc, {"data": data})
-                statsd.incr("posthog_cloud_raw_endpoint_failure", tags={"endpoint": "capture"})
-                logger.error("kafka_produce_failure", exc_info=exc)
-                return cors_response(
-                    request,
-                    generate_exception_response(
-                        "capture",
-                        "Unable to store event. Please try again. If you are the owner of this app you can check the logs for further details.",
-                        code="server_error",
-                        type="server_error",
-                        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                    ),
-                )
+                return _kafka_produce_failure_response(request, exc, data)
+
+        if kafka_records:
+            try:
+                futures.append(log_events_batch(kafka_records))
+            except Exception as exc:
+                return _kafka_produce_failure_response(request, exc, data)
+
+    KAFKA_PRODUCE_BATCH_SIZE_HISTOGRAM.labels(mode=produce_mode).observe(len(kafka_records) or len(futures))
 
     with start_span(op="kafka.wait"):
         span.set_tag("future.count", len(futures))
@@ -458,11 +485,30 @@ def get_event(request):
                         status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                     ),
                 )
+        ack_latency = time.monotonic() - start_time
+        KAFKA_PRODUCE_ACK_LATENCY_HISTOGRAM.labels(mode=produce_mode).observe(ack_latency)
+        statsd.timing("capture_kafka_produce_ack_latency", ack_latency * 1000, tags={"mode": produce_mode})
 
     statsd.incr("posthog_cloud_raw_endpoint_success", tags={"endpoint": "capture"})
     return cors_response(request, JsonResponse({"status": 1}))
 
 
+def _kafka_produce_failure_response(request, exc: Exception, data: Any):
+    capture_exception(exc, {"data": data})
+    statsd.incr("posthog_cloud_raw_endpoint_failure", tags={"endpoint": "capture"})
+    logger.error("kafka_produce_failure", exc_info=exc)
+    return cors_response(
+        request,
+        generate_exception_response(
+            "capture",
+            "Unable to store event. Please try again. If you are the owner of this app you can check the logs for further details.",
+            code="server_error",
+            type="server_error",
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        ),
+    )
+
+
 # TODO: Rename this function - it doesn't just validate events, it also processes them
 def validate_events(
     events: List[Dict[str, Any]], ingestion_context: Optional[EventIngestionContext]
@@ -505,6 +551,28 @@ def parse_event(event):
 
 
 def capture_internal(event, distinct_id, ip, site_url, now, sent_at, team_id, event_uuid=None, token=None) -> None:
+    _, parsed_event, kafka_partition_key = build_kafka_record(
+        event, distinct_id, ip, site_url, now, sent_at, team_id, event_uuid, token
+    )
+    return log_event(parsed_event, event["event"], partition_key=kafka_partition_key)
+
+
+def log_events_batch(records: List[Tuple[str, Dict, Optional[str]]]) -> ProduceBatchResult:
+    """Produce all `(topic, data, partition_key)` records of a request as a single batch."""
+    try:
+        result = KafkaProducer().produce_batch(records)
+        statsd.incr("posthog_cloud_plugin_server_ingestion", len(records))
+        return result
+    except Exception as e:
+        statsd.incr("capture_endpoint_log_event_error")
+        logger.exception("Failed to produce batch of %s events to Kafka with error", len(records))
+        raise e
+
+
+def build_kafka_record(
+    event, distinct_id, ip, site_url, now, sent_at, team_id, event_uuid=None, token=None
+) -> Tuple[str, Dict, Optional[str]]:
+    """Build the `(topic, data, partition_key)` Kafka record for a single captured event."""
     if event_uuid is None:
         event_uuid = UUIDT()
 
@@ -525,8 +593,10 @@ def capture_internal(event, distinct_id, ip, site_url, now, sent_at, team_id, ev
     # Setting the partition key to None means using random partitioning.
     kafka_partition_key = None
 
+    kafka_topic = get_kafka_topic(event["event"])
+
     if event["event"] in ("$snapshot", "$performance_event"):
-        return log_event(parsed_event, event["event"], partition_key=kafka_partition_key)
+        return kafka_topic, parsed_event, kafka_partition_key
 
     if team_id:
         candidate_partition_key = f"{team_id}:{distinct_id}"
@@ -536,7 +606,7 @@ def capture_internal(event, distinct_id, ip, site_url, now, sent_at, team_id, ev
     if is_randomly_partitioned(candidate_partition_key) is False:
         kafka_partition_key = hashlib.sha256(candidate_partition_key.encode()).hexdigest()
 
-    return log_event(parsed_event, event["event"], partition_key=kafka_partition_key)
+    return kafka_topic, parsed_event, kafka_partition_key
 
 
 def is_randomly_partitioned(candidate_partition_key: str) -> bool:
@@ -1,12 +1,15 @@
 import json
-from typing import Any, Dict, List, Optional, cast
+from typing import Any, Dict, List, Optional, Set, cast
 
+from django.core.cache import cache
 from django.db.models import QuerySet
+from django.utils.http import parse_etags, quote_etag
 from rest_framework import authentication, exceptions, request, serializers, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import SAFE_METHODS, BasePermission, IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
+from sentry_sdk.api import capture_exception
 
 from posthog.api.forbid_destroy_model import ForbidDestroyModel
 from posthog.api.routing import StructuredViewSetMixin
@@ -23,12 +26,20 @@ from posthog.models.feature_flag import (
     FeatureFlagMatcher,
     can_user_edit_feature_flag,
     get_all_feature_flags,
+    get_feature_flags_for_distinct_ids,
+    get_local_evaluation_version,
     get_user_blast_radius,
 )
+from posthog.models.feature_flag.feature_flag import FIVE_DAYS
+from posthog.models.feature_flag.flag_matching import BULK_FLAG_MATCHING_BATCH_SIZE
 from posthog.models.group_type_mapping import GroupTypeMapping
 from posthog.models.property import Property
 from posthog.permissions import ProjectMembershipNecessaryPermissions, TeamMemberAccessPermission
 from posthog.rate_limit import BurstRateThrottle
+from posthog.utils import get_safe_cache
+
+# Upper bound on distinct ids evaluated by a single bulk evaluation request, one batch of flag matching queries
+BULK_EVALUATION_MAX_DISTINCT_IDS = BULK_FLAG_MATCHING_BATCH_SIZE
 
 
 class FeatureFlagThrottle(BurstRateThrottle):
@@ -37,6 +48,16 @@ class FeatureFlagThrottle(BurstRateThrottle):
     scope = "feature_flag_evaluations"
 
 
+class FeatureFlagBulkEvaluationThrottle(BurstRateThrottle):
+    # Each bulk evaluation request does the work of many single evaluations, so it gets its own, lower, rate limit
+    scope = "feature_flag_bulk_evaluations"
+    rate = "60/minute"
+
+
+def _is_object_of_objects(value: Any) -> bool:
+    return isinstance(value, dict) and all(isinstance(nested_value, dict) for nested_value in value.values())
+
+
 class CanEditFeatureFlag(BasePermission):
     message = "You don't have edit permissions for this feature flag."
 
@@ -349,9 +370,33 @@ class FeatureFlagViewSet(TaggedItemViewSetMixin, StructuredViewSetMixin, ForbidD
 
     @action(methods=["GET"], detail=False, throttle_classes=[FeatureFlagThrottle])
     def local_evaluation(self, request: request.Request, **kwargs):
-
-        feature_flags: QuerySet[FeatureFlag] = FeatureFlag.objects.filter(team=self.team, deleted=False)
-        cohorts = {}
+        # when param set, send cohorts, for libraries that can handle evaluating them locally
+        # irrespective of complexity
+        send_cohorts = "send_cohorts" in request.GET
+
+        version = get_local_evaluation_version(self.team_id)
+        if version is None:
+            return Response(self._local_evaluation_payload(send_cohorts))
+
+        # SDKs poll this endpoint, so unchanged flags are answered from the version alone
+        etag = quote_etag(f"{version}-cohorts" if send_cohorts else version)
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+        cache_key = f"team_local_evaluation_{self.team_id}_{version}_{int(send_cohorts)}"
+        payload = get_safe_cache(cache_key)
+        if payload is None:
+            payload = self._local_evaluation_payload(send_cohorts)
+            try:
+                cache.set(cache_key, payload, FIVE_DAYS)
+            except Exception as e:
+                capture_exception(e)
+
+        return Response(payload, headers={"ETag": etag})
+
+    def _local_evaluation_payload(self, send_cohorts: bool) -> Dict[str, Any]:
+        feature_flags: QuerySet[FeatureFlag] = FeatureFlag.objects.filter(team_id=self.team_id, deleted=False)
+        cohort_ids: Set[int] = set()
 
         parsed_flags = []
         for feature_flag in feature_flags:
@@ -367,26 +412,68 @@ class FeatureFlagViewSet(TaggedItemViewSetMixin, StructuredViewSetMixin, ForbidD
 
             parsed_flags.append(feature_flag)
 
-            # when param set, send cohorts, for libraries that can handle evaluating them locally
-            # irrespective of complexity
-            if "send_cohorts" in request.GET:
-                for id in feature_flag.cohort_ids:
-                    # don't duplicate queries for already added cohorts
-                    if id not in cohorts:
-                        cohort = Cohort.objects.get(id=id)
-                        cohorts[cohort.pk] = cohort.properties.to_dict()
+            if send_cohorts:
+                cohort_ids.update(feature_flag.cohort_ids)
 
+        cohorts = {}
+        if cohort_ids:
+            cohorts = {cohort.pk: cohort.properties.to_dict() for cohort in Cohort.objects.filter(id__in=cohort_ids)}
+
+        return {
+            "flags": [
+                MinimalFeatureFlagSerializer(feature_flag, context=self.get_serializer_context()).data
+                for feature_flag in parsed_flags
+            ],
+            "group_type_mapping": {
+                str(row.group_type_index): row.group_type
+                for row in GroupTypeMapping.objects.filter(team_id=self.team_id)
+            },
+            "cohorts": cohorts,
+        }
+
+    @action(methods=["POST"], detail=False, throttle_classes=[FeatureFlagBulkEvaluationThrottle])
+    def bulk_evaluation(self, request: request.Request, **kwargs):
+
+        distinct_ids = request.data.get("distinct_ids")
+        groups = request.data.get("groups") or {}
+        person_properties = request.data.get("person_properties") or {}
+        group_properties = request.data.get("group_properties") or {}
+
+        if not isinstance(distinct_ids, list) or not distinct_ids:
+            raise exceptions.ValidationError(detail="distinct_ids must be a non-empty list")
+        if not all(isinstance(distinct_id, str) for distinct_id in distinct_ids):
+            raise exceptions.ValidationError(detail="distinct_ids must be strings")
+        if len(distinct_ids) > BULK_EVALUATION_MAX_DISTINCT_IDS:
+            raise exceptions.ValidationError(
+                detail=f"At most {BULK_EVALUATION_MAX_DISTINCT_IDS} distinct_ids can be evaluated at once"
+            )
+        if not _is_object_of_objects(groups):
+            raise exceptions.ValidationError(detail="groups must be an object keyed by distinct_id")
+        if not _is_object_of_objects(person_properties):
+            raise exceptions.ValidationError(detail="person_properties must be an object keyed by distinct_id")
+        if not _is_object_of_objects(group_properties):
+            raise exceptions.ValidationError(detail="group_properties must be an object keyed by group type")
+
+        matches = get_feature_flags_for_distinct_ids(
+            self.team_id,
+            distinct_ids,
+            groups,
+            property_value_overrides=person_properties,
+            group_property_value_overrides=group_properties,
+        )
+
+        results = {
+            distinct_id: {
+                "featureFlags": flags,
+                "featureFlagPayloads": payloads,
+                "errorsWhileComputingFlags": errors,
+            }
+            for distinct_id, (flags, _, payloads, errors) in matches.items()
+        }
         return Response(
             {
-                "flags": [
-                    MinimalFeatureFlagSerializer(feature_flag, context=self.get_serializer_context()).data
-                    for feature_flag in parsed_flags
-                ],
-                "group_type_mapping": {
-                    str(row.group_type_index): row.group_type
-                    for row in GroupTypeMapping.objects.filter(team_id=self.team_id)
-                },
-                "cohorts": cohorts,
+                "results": results,
+                "errorsWhileComputingFlags": any(result["errorsWhileComputingFlags"] for result in results.values()),
             }
         )
 
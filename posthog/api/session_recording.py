@@ -4,7 +4,7 @@ from typing import Any, List, cast
 import structlog
 from dateutil import parser
 from django.db.models import Count, Prefetch
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from rest_framework import exceptions, request, serializers, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
@@ -25,6 +25,7 @@ from posthog.permissions import ProjectMembershipNecessaryPermissions, TeamMembe
 from posthog.queries.session_recordings.session_recording_list import SessionRecordingList
 from posthog.queries.session_recordings.session_recording_properties import SessionRecordingProperties
 from posthog.rate_limit import ClickHouseBurstRateThrottle, ClickHouseSustainedRateThrottle
+from posthog.session_recordings.session_recording_helpers import stream_snapshot_data_response
 from posthog.utils import format_query_params_absolute_url
 
 DEFAULT_RECORDING_CHUNK_LIMIT = 20  # Should be tuned to find the best value
@@ -151,23 +152,49 @@ class SessionRecordingViewSet(StructuredViewSetMixin, viewsets.ViewSet):
             )
             recording.start_time = recording_start_time
 
-        recording.load_snapshots(limit, offset)
+        # Optionally only return the snapshots of a single window, paginated over that window's chunks
+        window_id = request.GET.get("window_id")
 
-        if not recording.snapshot_data_by_window_id:
+        if recording.storage == "clickhouse":
+            # Only the requested page is decompressed, and it is streamed as JSON text without being parsed
+            lazy_data = recording.load_lazy_snapshots(limit, offset, window_id)
+
+            if not lazy_data:
+                raise exceptions.NotFound("Snapshots not found")
+
+            next_url = format_query_params_absolute_url(request, offset + limit, limit) if lazy_data.has_next else None
+            return StreamingHttpResponse(
+                stream_snapshot_data_response(lazy_data, next_url), content_type="application/json"
+            )
+
+        if recording.load_persisted_snapshots_page(offset, window_id):
+            # Persisted recordings are paginated over their independently readable parts, one part per page
+            next_offset = offset + 1
+        else:
+            recording.load_snapshots(limit, offset)
+            next_offset = offset + limit
+
+        snapshot_data_by_window_id = recording.snapshot_data_by_window_id
+        if snapshot_data_by_window_id and window_id is not None:
+            snapshot_data_by_window_id = {
+                key: value for key, value in snapshot_data_by_window_id.items() if key == window_id
+            }
+
+        if not snapshot_data_by_window_id:
             raise exceptions.NotFound("Snapshots not found")
 
         if recording.can_load_more_snapshots:
-            next_url = format_query_params_absolute_url(request, offset + limit, limit) if True else None
+            next_url = format_query_params_absolute_url(request, next_offset, limit)
         else:
             next_url = None
 
         res = {
             "next": next_url,
-            "snapshot_data_by_window_id": recording.snapshot_data_by_window_id,
+            "snapshot_data_by_window_id": snapshot_data_by_window_id,
             # TODO: Remove this once the frontend is migrated to use the above values
             "result": {
                 "next": next_url,
-                "snapshot_data_by_window_id": recording.snapshot_data_by_window_id,
+                "snapshot_data_by_window_id": snapshot_data_by_window_id,
             },
         }
 
@@ -1,6 +1,6 @@
 import json
 from typing import Dict
-from unittest.mock import ANY, MagicMock
+from unittest.mock import ANY, MagicMock, patch
 
 from dateutil import parser
 from django.test import override_settings
@@ -183,6 +183,22 @@ class TestDashboard(APIBaseTest, QueryMatchingTest):
         self.assertAlmostEqual(Dashboard.objects.get().last_accessed_at, now(), delta=timezone.timedelta(seconds=5))
         self.assertEqual(response["tiles"][0]["insight"]["result"][0]["count"], 0)
 
+    def test_cached_results_are_fetched_in_one_round_trip(self):
+        dashboard = Dashboard.objects.create(team=self.team, name="dashboard")
+        for event in ["$pageview", "$autocapture", "$pageleave"]:
+            insight = Insight.objects.create(filters={"events": [{"id": event}]}, team=self.team)
+            DashboardTile.objects.create(dashboard=dashboard, insight=insight)
+
+        with patch("posthog.caching.fetch_from_cache.get_safe_cache") as patched_get_safe_cache, patch(
+            "posthog.caching.fetch_from_cache.get_safe_cache_many", return_value={}
+        ) as patched_get_safe_cache_many:
+            response = self.dashboard_api.get_dashboard(dashboard.pk)
+
+        self.assertEqual([tile["insight"]["result"] for tile in response["tiles"]], [None, None, None])
+        patched_get_safe_cache.assert_not_called()
+        patched_get_safe_cache_many.assert_called_once()
+        self.assertEqual(len(patched_get_safe_cache_many.call_args[0][0]), 3)
+
     # :KLUDGE: avoid making extra queries that are explicitly not cached in tests. Avoids false N+1-s.
     @override_settings(PERSON_ON_EVENTS_OVERRIDE=False)
     @snapshot_postgres_queries
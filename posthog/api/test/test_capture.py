@@ -493,6 +493,61 @@ class TestCapture(BaseTest):
         )
         self.assertEqual(kafka_produce.call_count, 2)
 
+    @override_settings(CAPTURE_KAFKA_BATCH_PRODUCE_ENABLED=True)
+    @patch("posthog.api.capture.log_events_batch", wraps=capture.log_events_batch)
+    def test_multiple_events_batch_produce(self, log_events_batch):
+        response = self.client.post(
+            "/track/",
+            data={
+                "data": json.dumps(
+                    [
+                        {"event": "beep", "properties": {"distinct_id": "eeee", "token": self.team.api_token}},
+                        {"event": "boop", "properties": {"distinct_id": "aaaa", "token": self.team.api_token}},
+                        {"event": "$snapshot", "properties": {"distinct_id": "aaaa", "token": self.team.api_token}},
+                    ]
+                ),
+                "api_key": self.team.api_token,
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(log_events_batch.call_count, 1)
+
+        records = log_events_batch.call_args[0][0]
+        self.assertEqual(
+            [(topic, data["distinct_id"]) for topic, data, _ in records],
+            [
+                (KAFKA_EVENTS_PLUGIN_INGESTION_TOPIC, "eeee"),
+                (KAFKA_EVENTS_PLUGIN_INGESTION_TOPIC, "aaaa"),
+                (KAFKA_SESSION_RECORDING_EVENTS, "aaaa"),
+            ],
+        )
+
+    @override_settings(CAPTURE_KAFKA_BATCH_PRODUCE_ENABLED=True)
+    @patch("posthog.kafka_client.client._KafkaProducer.produce")
+    def test_batch_produce_503_on_kafka_produce_errors(self, kafka_produce):
+        produce_future = FutureProduceResult(topic_partition=TopicPartition(KAFKA_EVENTS_PLUGIN_INGESTION_TOPIC, 1))
+        future = FutureRecordMetadata(
+            produce_future=produce_future,
+            relative_offset=0,
+            timestamp_ms=0,
+            checksum=0,
+            serialized_key_size=0,
+            serialized_value_size=0,
+            serialized_header_size=0,
+        )
+        future.failure(KafkaError("Failed to produce"))
+        kafka_produce.return_value = future
+
+        response = self.client.post(
+            "/batch/",
+            data={
+                "api_key": self.team.api_token,
+                "batch": [{"type": "capture", "event": "user signed up", "distinct_id": "2"}],
+            },
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
     @patch("posthog.kafka_client.client._KafkaProducer.produce")
     def test_emojis_in_text(self, kafka_produce):
         self.team.api_token = "xp9qT2VLY76JJg"
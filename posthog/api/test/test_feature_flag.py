@@ -1457,6 +1457,87 @@ class TestFeatureFlag(APIBaseTest):
             sorted_flags[1],
         )
 
+    @patch("posthog.api.feature_flag.report_user_action")
+    def test_local_evaluation_is_cached_until_flags_cohorts_or_group_types_change(self, mock_capture):
+        FeatureFlag.objects.all().delete()
+        cohort = Cohort.objects.create(
+            team=self.team,
+            filters={"properties": {"type": "OR", "values": [{"key": "$some_prop", "value": "a", "type": "person"}]}},
+            name="cohort1",
+        )
+        flag = FeatureFlag.objects.create(
+            team=self.team,
+            key="alpha-feature",
+            filters={"groups": [{"properties": [{"key": "id", "type": "cohort", "value": cohort.pk}]}]},
+            created_by=self.user,
+        )
+
+        personal_api_key = generate_random_token_personal()
+        PersonalAPIKey.objects.create(label="X", user=self.user, secure_value=hash_key_value(personal_api_key))
+        self.client.logout()
+
+        def get_local_evaluation(etag: Optional[str] = None):
+            headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+            return self.client.get(
+                f"/api/feature_flag/local_evaluation?token={self.team.api_token}&send_cohorts",
+                HTTP_AUTHORIZATION=f"Bearer {personal_api_key}",
+                **headers,
+            )
+
+        response = get_local_evaluation()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response["ETag"]
+
+        with capture_db_queries() as context:
+            cached_response = get_local_evaluation()
+        self.assertEqual(cached_response.json(), response.json())
+        self.assertEqual(cached_response["ETag"], etag)
+        self.assertFalse(any("posthog_featureflag" in query["sql"] for query in context.captured_queries))
+
+        response = get_local_evaluation(etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Without cohorts, the payload is different
+        response = self.client.get(
+            f"/api/feature_flag/local_evaluation?token={self.team.api_token}",
+            HTTP_AUTHORIZATION=f"Bearer {personal_api_key}",
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["cohorts"], {})
+
+        # Saving a cohort while calculating it doesn't change the payload
+        cohort.is_calculating = True
+        cohort.save()
+        cohort.count = 10
+        cohort.save(update_fields=["count"])
+        response = get_local_evaluation(etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        cohort.filters = {
+            "properties": {"type": "OR", "values": [{"key": "$some_prop", "value": "b", "type": "person"}]}
+        }
+        cohort.save()
+        response = get_local_evaluation(etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json()["cohorts"][str(cohort.pk)]["values"][0],
+            {"key": "$some_prop", "value": "b", "type": "person"},
+        )
+        etag = response["ETag"]
+
+        GroupTypeMapping.objects.create(team=self.team, group_type="organization", group_type_index=0)
+        response = get_local_evaluation(etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["group_type_mapping"], {"0": "organization"})
+        etag = response["ETag"]
+
+        flag.active = False
+        flag.save()
+        response = get_local_evaluation(etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["flags"][0]["active"], False)
+
     @patch("posthog.api.feature_flag.report_user_action")
     def test_evaluation_reasons(self, mock_capture):
         FeatureFlag.objects.all().delete()
@@ -1658,6 +1739,86 @@ class TestFeatureFlag(APIBaseTest):
             },
         )
 
+    def test_bulk_evaluation(self):
+        FeatureFlag.objects.all().delete()
+        GroupTypeMapping.objects.create(team=self.team, group_type="organization", group_type_index=0)
+        Person.objects.create(team_id=self.team.pk, distinct_ids=["1", "2"], properties={"email": "tim@posthog.com"})
+        create_group(team_id=self.team.pk, group_type_index=0, group_key="org1234", properties={"industry": "finance"})
+        FeatureFlag.objects.create(
+            key="person-feature",
+            team=self.team,
+            filters={"groups": [{"properties": [{"key": "email", "value": "tim@posthog.com", "type": "person"}]}]},
+            created_by=self.user,
+        )
+        FeatureFlag.objects.create(
+            key="group-feature",
+            team=self.team,
+            filters={
+                "aggregation_group_type_index": 0,
+                "groups": [
+                    {"properties": [{"key": "industry", "value": "finance", "type": "group", "group_type_index": 0}]}
+                ],
+            },
+            created_by=self.user,
+        )
+
+        response = self.client.post(
+            f"/api/projects/{self.team.pk}/feature_flags/bulk_evaluation",
+            {
+                "distinct_ids": ["1", "2", "3"],
+                "groups": {"2": {"organization": "org1234"}},
+                "person_properties": {},
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json(),
+            {
+                "results": {
+                    "1": {
+                        "featureFlags": {"person-feature": True, "group-feature": False},
+                        "featureFlagPayloads": {},
+                        "errorsWhileComputingFlags": False,
+                    },
+                    "2": {
+                        "featureFlags": {"person-feature": True, "group-feature": True},
+                        "featureFlagPayloads": {},
+                        "errorsWhileComputingFlags": False,
+                    },
+                    "3": {
+                        "featureFlags": {"person-feature": False, "group-feature": False},
+                        "featureFlagPayloads": {},
+                        "errorsWhileComputingFlags": False,
+                    },
+                },
+                "errorsWhileComputingFlags": False,
+            },
+        )
+
+        response = self.client.post(
+            f"/api/projects/{self.team.pk}/feature_flags/bulk_evaluation",
+            {"distinct_ids": ["1", "3"], "person_properties": {"3": {"email": "tim@posthog.com"}}},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["results"]["1"]["featureFlags"]["person-feature"], True)
+        self.assertEqual(response.json()["results"]["3"]["featureFlags"]["person-feature"], True)
+
+        for invalid_data in [
+            {},
+            {"distinct_ids": []},
+            {"distinct_ids": [1]},
+            {"distinct_ids": ["1"], "groups": []},
+            {"distinct_ids": ["1"], "person_properties": {"email": "tim@posthog.com"}},
+            {"distinct_ids": ["1"], "groups": {"1": "acme"}},
+            {"distinct_ids": ["1"], "group_properties": {"organization": "acme"}},
+        ]:
+            response = self.client.post(
+                f"/api/projects/{self.team.pk}/feature_flags/bulk_evaluation", invalid_data, format="json"
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_validation_person_properties(self):
         person_request = self._create_flag_with_properties(
             "person-flag", [{"key": "email", "type": "person", "value": "@posthog.com", "operator": "icontains"}]
@@ -1,3 +1,4 @@
+import json
 from datetime import datetime, timedelta, timezone
 from unittest.mock import ANY
 from urllib.parse import urlencode
@@ -306,7 +307,7 @@ class TestSessionRecordings(APIBaseTest, ClickhouseTestMixin, QueryMatchingTest)
             self.create_snapshot("user", "1", base_time)
 
         response = self.client.get(f"/api/projects/{self.team.id}/session_recordings/1/snapshots")
-        response_data = response.json()
+        response_data = json.loads(response.getvalue())
         self.assertEqual(len(response_data["result"]["snapshot_data_by_window_id"][""]), DEFAULT_RECORDING_CHUNK_LIMIT)
 
     def test_get_snapshots_is_compressed(self):
@@ -349,7 +350,7 @@ class TestSessionRecordings(APIBaseTest, ClickhouseTestMixin, QueryMatchingTest)
 
             for i in range(expected_num_requests):
                 response = self.client.get(next_url)
-                response_data = response.json()
+                response_data = json.loads(response.getvalue())
 
                 self.assertEqual(
                     len(response_data["result"]["snapshot_data_by_window_id"]["1"]),
@@ -366,6 +367,39 @@ class TestSessionRecordings(APIBaseTest, ClickhouseTestMixin, QueryMatchingTest)
 
                 next_url = response_data["result"]["next"]
 
+    def test_get_snapshots_for_single_window(self):
+        chunked_session_id = "chunk_id"
+        num_chunks = 10
+        snapshots_per_chunk = 2
+
+        with freeze_time("2020-09-13T12:26:40.000Z"):
+            start_time = now()
+            for index in range(num_chunks):
+                self.create_chunked_snapshots(
+                    snapshots_per_chunk,
+                    "user",
+                    chunked_session_id,
+                    start_time + relativedelta(minutes=index),
+                    window_id="1" if index % 2 == 0 else "2",
+                )
+
+            response = self.client.get(
+                f"/api/projects/{self.team.id}/session_recordings/{chunked_session_id}/snapshots?window_id=2&limit=3"
+            )
+            response_data = json.loads(response.getvalue())
+
+            self.assertEqual(list(response_data["snapshot_data_by_window_id"].keys()), ["2"])
+            self.assertEqual(len(response_data["snapshot_data_by_window_id"]["2"]), snapshots_per_chunk * 3)
+            self.assertEqual(
+                response_data["result"], {k: response_data[k] for k in ["next", "snapshot_data_by_window_id"]}
+            )
+            self.assertIsNotNone(response_data["next"])
+
+            response = self.client.get(
+                f"/api/projects/{self.team.id}/session_recordings/{chunked_session_id}/snapshots?window_id=3"
+            )
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_get_metadata_for_chunked_session_recording(self):
 
         with freeze_time("2020-09-13T12:26:40.000Z"):
@@ -492,7 +526,7 @@ class TestSessionRecordings(APIBaseTest, ClickhouseTestMixin, QueryMatchingTest)
 
         response = self.client.get(f"/api/projects/{self.team.id}/session_recordings/1/snapshots")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        response_data = response.json()
+        response_data = json.loads(response.getvalue())
 
         assert not response_data["next"]
         assert response_data["snapshot_data_by_window_id"] == {
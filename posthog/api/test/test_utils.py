@@ -4,17 +4,20 @@ from unittest.mock import patch
 
 from django.http import HttpRequest
 from django.http.response import JsonResponse
+from django.test import override_settings
 from django.test.client import RequestFactory
 from rest_framework import status
 
 from posthog.api.test.test_capture import mocked_get_ingest_context_from_token
 from posthog.api.utils import (
+    INGESTION_CONTEXT_CACHE,
     EventIngestionContext,
     PaginationMode,
     check_definition_ids_inclusion_field_sql,
     format_paginated_url,
     get_data,
     get_event_ingestion_context,
+    get_event_ingestion_context_for_token,
     get_target_entity,
     safe_clickhouse_string,
 )
@@ -73,6 +76,39 @@ class TestUtils(BaseTest):
 
         get_team_from_token_patcher.stop()
 
+    @override_settings(INGESTION_CONTEXT_CACHE_ENABLED=True)
+    def test_get_event_ingestion_context_for_token_is_cached(self):
+        INGESTION_CONTEXT_CACHE.clear()
+
+        with self.assertNumQueries(1):
+            get_event_ingestion_context_for_token(self.team.api_token)
+        with self.assertNumQueries(0):
+            context = get_event_ingestion_context_for_token(self.team.api_token)
+        self.assertEqual(context, EventIngestionContext(team_id=self.team.pk, anonymize_ips=False))
+
+        # Unknown tokens are cached too
+        with self.assertNumQueries(1):
+            self.assertIsNone(get_event_ingestion_context_for_token("unknown"))
+        with self.assertNumQueries(0):
+            self.assertIsNone(get_event_ingestion_context_for_token("unknown"))
+
+    @override_settings(INGESTION_CONTEXT_CACHE_ENABLED=True)
+    def test_get_event_ingestion_context_for_token_is_invalidated_on_team_save(self):
+        INGESTION_CONTEXT_CACHE.clear()
+        old_token = self.team.api_token
+        get_event_ingestion_context_for_token(old_token)
+        get_event_ingestion_context_for_token("new_token")
+
+        self.team.anonymize_ips = True
+        self.team.api_token = "new_token"
+        self.team.save()
+
+        self.assertIsNone(get_event_ingestion_context_for_token(old_token))
+        self.assertEqual(
+            get_event_ingestion_context_for_token("new_token"),
+            EventIngestionContext(team_id=self.team.pk, anonymize_ips=True),
+        )
+
     def test_get_data(self):
         # No data in request
         data, error_response = get_data(HttpRequest())
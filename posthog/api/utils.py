@@ -1,11 +1,13 @@
 import json
 import re
 from dataclasses import dataclass
+from datetime import timedelta
 from enum import Enum, auto
 from typing import Any, List, Literal, Optional, Tuple, Union, cast
 from uuid import UUID
 
 import structlog
+from django.conf import settings
 from django.core.exceptions import RequestDataTooBig
 from django.db.models import QuerySet
 from rest_framework import request, status
@@ -13,6 +15,7 @@ from rest_framework.exceptions import ValidationError
 from sentry_sdk import capture_exception
 from statshog.defaults.django import statsd
 
+from posthog.cache_utils import MISSING, TTLCache
 from posthog.constants import EventDefinitionType
 from posthog.exceptions import RequestParsingError, generate_exception_response
 from posthog.models import Entity, EventDefinition
@@ -309,13 +312,49 @@ def get_event_ingestion_context(
     return ingestion_context, db_error, error_response
 
 
+INGESTION_CONTEXT_CACHE: TTLCache[Optional[EventIngestionContext]] = TTLCache(
+    maxsize=settings.INGESTION_CONTEXT_CACHE_SIZE,
+    ttl=timedelta(seconds=settings.INGESTION_CONTEXT_CACHE_TTL_SECONDS),
+)
+
+
 def get_event_ingestion_context_for_token(
     token: str,
 ) -> Optional[EventIngestionContext]:
     """
     Based on a token associated with a Team, retrieve the context that is
     required to ingest events.
+
+    Lookups are cached in-process, including tokens that don't belong to any
+    team, and invalidated when the team is saved.
     """
+    if not settings.INGESTION_CONTEXT_CACHE_ENABLED:
+        return _fetch_event_ingestion_context_for_token(token)
+
+    ingestion_context = INGESTION_CONTEXT_CACHE.get(token)
+    if ingestion_context is not MISSING:
+        statsd.incr("capture_ingestion_context_cache", tags={"result": "hit"})
+        return ingestion_context
+
+    statsd.incr("capture_ingestion_context_cache", tags={"result": "miss"})
+    ingestion_context = _fetch_event_ingestion_context_for_token(token)
+    INGESTION_CONTEXT_CACHE.set(
+        token,
+        ingestion_context,
+        ttl=timedelta(seconds=settings.INGESTION_CONTEXT_CACHE_NEGATIVE_TTL_SECONDS)
+        if ingestion_context is None
+        else None,
+    )
+    return ingestion_context
+
+
+def invalidate_event_ingestion_context(token: Optional[str], team_id: int) -> None:
+    # The team's previous token, if it was just reset, is only known by the cached context
+    INGESTION_CONTEXT_CACHE.delete(token)
+    INGESTION_CONTEXT_CACHE.delete_where(lambda context: context is not None and context.team_id == team_id)
+
+
+def _fetch_event_ingestion_context_for_token(token: str) -> Optional[EventIngestionContext]:
     try:
         team_id, anonymize_ips = Team.objects.values_list("id", "anonymize_ips").get(api_token=token)
         # NOTE: Not sure why, but I needed to do this cast otherwise I got
@@ -1,7 +1,18 @@
 import threading
+import time
+from collections import OrderedDict
 from datetime import timedelta
 from functools import wraps
-from typing import no_type_check
+from typing import (
+    Any,
+    Callable,
+    Generic,
+    Hashable,
+    Optional,
+    Tuple,
+    TypeVar,
+    no_type_check,
+)
 
 from django.utils.timezone import now
 
@@ -61,3 +72,59 @@ def instance_memoize(callback):
         return memo[args]
 
     return _inner
+
+
+V = TypeVar("V")
+
+MISSING: Any = object()
+
+
+class TTLCache(Generic[V]):
+    """
+    Bounded, thread-safe, in-process LRU cache whose entries expire after a TTL.
+
+    Unlike `cache_for`, entries can be invalidated explicitly, have individual TTLs (e.g. to cache misses for
+    a shorter time than hits) and the cache never grows beyond `maxsize` entries.
+    """
+
+    def __init__(self, maxsize: int, ttl: timedelta):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: V, ttl: Optional[timedelta] = None) -> None:
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.ttl).total_seconds()
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_where(self, predicate: Callable[[V], bool]) -> None:
+        with self._lock:
+            for key in [key for key, (_, value) in self._entries.items() if predicate(value)]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Any, Optional, Union
+from typing import Any, Dict, Iterable, Optional, Union
 
 from django.utils.timezone import now
 from statshog.defaults.django import statsd
@@ -9,7 +9,7 @@ from posthog.caching.calculate_results import calculate_cache_key, calculate_res
 from posthog.caching.insight_cache import update_cached_state
 from posthog.models import DashboardTile, Insight
 from posthog.models.dashboard import Dashboard
-from posthog.utils import get_safe_cache
+from posthog.utils import get_safe_cache, get_safe_cache_many
 
 
 @dataclass(frozen=True)
@@ -32,7 +32,26 @@ class NothingInCacheResult(InsightResult):
     next_allowed_client_refresh: Optional[datetime] = None
 
 
-def fetch_cached_insight_result(target: Union[Insight, DashboardTile], refresh_frequency: timedelta) -> InsightResult:
+def prefetch_cached_insight_results(targets: Iterable[Union[Insight, DashboardTile]]) -> Dict[str, Any]:
+    """
+    Fetches the cached values for many insights or tiles with a single cache round trip, to be passed on to
+    `fetch_cached_insight_result`. Keys that aren't in the cache map to None.
+    """
+
+    cache_keys = {cache_key for cache_key in (calculate_cache_key(target) for target in targets) if cache_key}
+
+    if not cache_keys:
+        return {}
+
+    cached_results = get_safe_cache_many(list(cache_keys))
+    return {cache_key: cached_results.get(cache_key) for cache_key in cache_keys}
+
+
+def fetch_cached_insight_result(
+    target: Union[Insight, DashboardTile],
+    refresh_frequency: timedelta,
+    prefetched_results: Optional[Dict[str, Any]] = None,
+) -> InsightResult:
     """
     Returns cached value for this insight.
 
@@ -44,7 +63,10 @@ def fetch_cached_insight_result(target: Union[Insight, DashboardTile], refresh_f
     if cache_key is None:
         return NothingInCacheResult(cache_key=None)
 
-    cached_result = get_safe_cache(cache_key)
+    if prefetched_results is not None and cache_key in prefetched_results:
+        cached_result = prefetched_results[cache_key]
+    else:
+        cached_result = get_safe_cache(cache_key)
 
     if cached_result is None:
         statsd.incr("posthog_cloud_insight_cache_miss")
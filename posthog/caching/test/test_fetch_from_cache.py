@@ -1,4 +1,5 @@
 from datetime import timedelta
+from unittest.mock import patch
 
 from django.utils.timezone import now
 from freezegun import freeze_time
@@ -7,6 +8,7 @@ from posthog.caching.fetch_from_cache import (
     InsightResult,
     NothingInCacheResult,
     fetch_cached_insight_result,
+    prefetch_cached_insight_results,
     synchronously_update_cache,
 )
 from posthog.decorators import CacheType
@@ -85,6 +87,24 @@ class TestFetchFromCache(ClickhouseTestMixin, BaseTest):
             next_allowed_client_refresh=cached_result.next_allowed_client_refresh,
         )
 
+    def test_fetch_cached_insight_result_from_prefetched_results(self):
+        cached_result = synchronously_update_cache(self.insight, self.dashboard, timedelta(minutes=3))
+        other_insight = Insight.objects.create(team=self.team, filters={"events": [{"id": "$autocapture"}]})
+
+        prefetched_results = prefetch_cached_insight_results([self.dashboard_tile, other_insight])
+        assert len(prefetched_results) == 2
+
+        with patch("posthog.caching.fetch_from_cache.get_safe_cache") as patched_get_safe_cache:
+            from_cache_result = fetch_cached_insight_result(
+                self.dashboard_tile, timedelta(minutes=3), prefetched_results
+            )
+            nothing_cached_result = fetch_cached_insight_result(other_insight, timedelta(minutes=3), prefetched_results)
+
+        patched_get_safe_cache.assert_not_called()
+        assert from_cache_result.result == cached_result.result
+        assert from_cache_result.is_cached
+        assert isinstance(nothing_cached_result, NothingInCacheResult)
+
     def test_fetch_nothing_yet_cached(self):
         from_cache_result = fetch_cached_insight_result(self.dashboard_tile, timedelta(minutes=3))
 
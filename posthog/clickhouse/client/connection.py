@@ -3,9 +3,10 @@ from enum import Enum
 from functools import lru_cache
 
 from clickhouse_driver import Client as SyncClient
-from clickhouse_pool import ChPool
 from django.conf import settings
 
+from posthog.clickhouse.client.pool import InstrumentedChPool
+
 
 class Workload(Enum):
     # Default workload
@@ -28,7 +29,7 @@ def get_pool(workload: Workload):
     if (
         workload == Workload.OFFLINE or workload == Workload.DEFAULT and _default_workload == Workload.OFFLINE
     ) and settings.CLICKHOUSE_OFFLINE_CLUSTER_HOST is not None:
-        return make_ch_pool(host=settings.CLICKHOUSE_OFFLINE_CLUSTER_HOST)
+        return make_ch_pool(workload=Workload.OFFLINE, host=settings.CLICKHOUSE_OFFLINE_CLUSTER_HOST)
 
     return make_ch_pool()
 
@@ -56,8 +57,13 @@ def default_client():
 
 
 @lru_cache(maxsize=None)
-def make_ch_pool(**overrides) -> ChPool:
+def make_ch_pool(workload: Workload = Workload.ONLINE, **overrides) -> InstrumentedChPool:
     kwargs = {
+        "workload": workload.value,
+        "checkout_timeout": settings.CLICKHOUSE_CONN_POOL_OFFLINE_CHECKOUT_TIMEOUT
+        if workload == Workload.OFFLINE
+        else settings.CLICKHOUSE_CONN_POOL_CHECKOUT_TIMEOUT,
+        "adaptive_connections_max": settings.CLICKHOUSE_CONN_POOL_ADAPTIVE_MAX,
         "host": settings.CLICKHOUSE_HOST,
         "database": settings.CLICKHOUSE_DATABASE,
         "secure": settings.CLICKHOUSE_SECURE,
@@ -73,7 +79,7 @@ def make_ch_pool(**overrides) -> ChPool:
         **overrides,
     }
 
-    return ChPool(**kwargs)
+    return InstrumentedChPool(**kwargs)
 
 
 @contextmanager
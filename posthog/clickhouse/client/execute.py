@@ -3,8 +3,20 @@ import threading
 import types
 from contextlib import contextmanager
 from functools import lru_cache
+from itertools import islice
 from time import perf_counter
-from typing import Any, Dict, List, Optional, Sequence, Union
+from typing import (
+    Any,
+    Dict,
+    Generator,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    overload,
+)
 
 import sqlparse
 from clickhouse_driver import Client as SyncClient
@@ -37,6 +49,12 @@ CLICKHOUSE_SUPPORTED_JOIN_ALGORITHMS = [
 
 is_invalid_algorithm = lambda algo: algo not in CLICKHOUSE_SUPPORTED_JOIN_ALGORITHMS
 
+# Number of rows clickhouse_driver reads from the socket at a time when streaming results
+DEFAULT_STREAM_BLOCK_SIZE = 10_000
+
+# Most queries are rendered from a small set of templates, so comments are stripped once per template
+PREPARED_SQL_CACHE_SIZE = 512
+
 
 @lru_cache(maxsize=1)
 def default_settings() -> Dict:
@@ -79,24 +97,18 @@ def sync_execute(
     flush=True,
     *,
     workload: Workload = Workload.DEFAULT,
+    strip_comments: bool = True,
+    columnar: bool = False,
 ):
     if TEST and flush:
-        try:
-            from posthog.test.base import flush_persons_and_events
-
-            flush_persons_and_events()
-        except ModuleNotFoundError:  # when we run plugin server tests it tries to run above, ignore
-            pass
+        _flush_test_data()
 
     with get_pool(workload).get_client() as client:
         start_time = perf_counter()
 
-        prepared_sql, prepared_args, tags = _prepare_query(client=client, query=query, args=args, workload=workload)
-
-        query_id = validated_client_query_id()
-        core_settings = {**default_settings(), **(settings or {})}
-        tags["query_settings"] = core_settings
-        settings = {**core_settings, "log_comment": json.dumps(tags, separators=(",", ":"))}
+        prepared_sql, prepared_args, settings, query_id = _prepare_execution(
+            client, query, args, settings, workload, strip_comments
+        )
         try:
             result = client.execute(
                 prepared_sql,
@@ -104,6 +116,7 @@ def sync_execute(
                 settings=settings,
                 with_column_types=with_column_types,
                 query_id=query_id,
+                columnar=columnar,
             )
         except Exception as err:
             err = wrap_query_error(err)
@@ -111,33 +124,155 @@ def sync_execute(
 
             raise err
         finally:
-            execution_time = perf_counter() - start_time
+            _record_execution_time("clickhouse_sync_execution_time", perf_counter() - start_time)
+    return result
 
-            statsd.timing("clickhouse_sync_execution_time", execution_time * 1000.0)
 
-            if query_counter := getattr(thread_local_storage, "query_counter", None):
-                query_counter.total_query_time += execution_time
+def stream_execute(
+    query,
+    args=None,
+    settings=None,
+    flush=True,
+    *,
+    workload: Workload = Workload.DEFAULT,
+    strip_comments: bool = True,
+    columnar: bool = False,
+    block_size: int = DEFAULT_STREAM_BLOCK_SIZE,
+) -> Generator[Any, None, None]:
+    """
+    Like `sync_execute`, but streams the results instead of materialising them, so large result sets can be
+    processed in constant memory.
 
-            if app_settings.SHELL_PLUS_PRINT_SQL:
-                print("Execution time: %.6fs" % (execution_time,))  # noqa T201
-    return result
+    By default the rows are yielded one at a time. With `columnar=True`, blocks of up to `block_size` rows are
+    yielded instead, each as a dict of column name to the list of that column's values.
 
+    NOTE: The ClickHouse connection is held until the generator is exhausted or closed.
+    """
+    if TEST and flush:
+        _flush_test_data()
 
-def query_with_columns(
+    with get_pool(workload).get_client() as client:
+        start_time = perf_counter()
+
+        prepared_sql, prepared_args, settings, query_id = _prepare_execution(
+            client, query, args, settings, workload, strip_comments
+        )
+        finished = False
+        try:
+            rows = client.execute_iter(
+                prepared_sql,
+                params=prepared_args,
+                settings={**settings, "max_block_size": block_size},
+                with_column_types=True,
+                query_id=query_id,
+            )
+            # The first item holds the column names and types, the rows follow
+            columns_with_types = next(rows, None)
+            if columns_with_types is not None:
+                if columnar:
+                    column_names = [name for name, _type in columns_with_types]
+                    while block := list(islice(rows, block_size)):
+                        yield {name: list(column) for name, column in zip(column_names, zip(*block))}
+                else:
+                    yield from rows
+            finished = True
+        except GeneratorExit:
+            raise
+        except Exception as err:
+            err = wrap_query_error(err)
+            statsd.incr("clickhouse_stream_execution_failure", tags={"failed": True, "reason": type(err).__name__})
+
+            raise err
+        finally:
+            if not finished:
+                # The rest of the result is still on its way, so the connection can't be reused as is
+                client.disconnect()
+
+            _record_execution_time("clickhouse_stream_execution_time", perf_counter() - start_time)
+
+
+def stream_query_with_columns(
     query: str,
     args: Optional[QueryArgs] = None,
     columns_to_remove: Optional[Sequence[str]] = None,
     columns_to_rename: Optional[Dict[str, str]] = None,
     *,
     workload: Workload = Workload.DEFAULT,
+    block_size: int = DEFAULT_STREAM_BLOCK_SIZE,
+) -> Generator[Dict, None, None]:
+    """Streaming version of `query_with_columns`, which builds each row's dict only as it is consumed."""
+    if columns_to_remove is None:
+        columns_to_remove = []
+    if columns_to_rename is None:
+        columns_to_rename = {}
+
+    for block in stream_execute(query, args, workload=workload, columnar=True, block_size=block_size):
+        kept_columns = [
+            (columns_to_rename.get(name, name), values)
+            for name, values in block.items()
+            if name not in columns_to_remove
+        ]
+        kept_names = [name for name, _ in kept_columns]
+        for row in zip(*(values for _, values in kept_columns)):
+            yield dict(zip(kept_names, row))
+
+
+@overload
+def query_with_columns(
+    query: str,
+    args: Optional[QueryArgs] = ...,
+    columns_to_remove: Optional[Sequence[str]] = ...,
+    columns_to_rename: Optional[Dict[str, str]] = ...,
+    *,
+    workload: Workload = ...,
+    columnar: Literal[False] = ...,
 ) -> List[Dict]:
+    ...
+
+
+@overload
+def query_with_columns(
+    query: str,
+    args: Optional[QueryArgs] = ...,
+    columns_to_remove: Optional[Sequence[str]] = ...,
+    columns_to_rename: Optional[Dict[str, str]] = ...,
+    *,
+    workload: Workload = ...,
+    columnar: Literal[True],
+) -> Dict[str, Sequence]:
+    ...
+
+
+def query_with_columns(
+    query: str,
+    args: Optional[QueryArgs] = None,
+    columns_to_remove: Optional[Sequence[str]] = None,
+    columns_to_rename: Optional[Dict[str, str]] = None,
+    *,
+    workload: Workload = Workload.DEFAULT,
+    columnar: bool = False,
+) -> Union[List[Dict], Dict[str, Sequence]]:
+    """
+    Returns the query results as a list of dicts, one per row. With `columnar=True` the results are instead returned
+    as a dict of column name to that column's values, as read by clickhouse_driver, which avoids building a dict for
+    every row of large results.
+    """
     if columns_to_remove is None:
         columns_to_remove = []
     if columns_to_rename is None:
         columns_to_rename = {}
-    metrics, types = sync_execute(query, args, with_column_types=True, workload=workload)
+    metrics, types = sync_execute(query, args, with_column_types=True, workload=workload, columnar=columnar)
     type_names = [key for key, _type in types]
 
+    if columnar:
+        # clickhouse_driver returns no columns at all for an empty result
+        columns = metrics or [() for _ in type_names]
+        return {
+            columns_to_rename.get(type_name, type_name): column
+            for type_name, column in zip(type_names, columns)
+            if type_name not in columns_to_remove
+        }
+
     rows = []
     for row in metrics:
         result = {}
@@ -150,8 +285,57 @@ def query_with_columns(
     return rows
 
 
+def _flush_test_data() -> None:
+    try:
+        from posthog.test.base import flush_persons_and_events
+
+        flush_persons_and_events()
+    except ModuleNotFoundError:  # when we run plugin server tests it tries to run above, ignore
+        pass
+
+
+def _prepare_execution(
+    client: SyncClient,
+    query: str,
+    args: QueryArgs,
+    settings: Optional[Dict],
+    workload: Workload,
+    strip_comments: bool,
+) -> Tuple[str, Any, Dict, Optional[str]]:
+    prepared_sql, prepared_args, tags = _prepare_query(
+        client=client, query=query, args=args, workload=workload, strip_comments=strip_comments
+    )
+
+    query_id = validated_client_query_id()
+    core_settings = {**default_settings(), **(settings or {})}
+    tags["query_settings"] = core_settings
+    settings = {**core_settings, "log_comment": json.dumps(tags, separators=(",", ":"))}
+    return prepared_sql, prepared_args, settings, query_id
+
+
+def _record_execution_time(metric_name: str, execution_time: float) -> None:
+    statsd.timing(metric_name, execution_time * 1000.0)
+
+    if query_counter := getattr(thread_local_storage, "query_counter", None):
+        query_counter.total_query_time += execution_time
+
+    if app_settings.SHELL_PLUS_PRINT_SQL:
+        print("Execution time: %.6fs" % (execution_time,))  # noqa T201
+
+
+@lru_cache(maxsize=PREPARED_SQL_CACHE_SIZE)
+def _strip_comments(query: str) -> str:
+    return sqlparse.format(query, strip_comments=True)
+
+
 @patchable
-def _prepare_query(client: SyncClient, query: str, args: QueryArgs, workload: Workload = Workload.DEFAULT):
+def _prepare_query(
+    client: SyncClient,
+    query: str,
+    args: QueryArgs,
+    workload: Workload = Workload.DEFAULT,
+    strip_comments: bool = True,
+):
     """
     Given a string query with placeholders we do one of two things:
 
@@ -172,7 +356,15 @@ def _prepare_query(client: SyncClient, query: str, args: QueryArgs, workload: Wo
     We only want to try to substitue for SELECT queries, which
     clickhouse_driver at this moment in time decides based on the
     below predicate.
+
+    Comments are stripped from the query template before substitution, so the
+    result can be cached per template. Callers that generate SQL without any
+    comments (e.g. HogQL) can skip this with `strip_comments=False`.
     """
+    start_time = perf_counter()
+    if strip_comments:
+        query = _strip_comments(query)
+
     prepared_args: Any = QueryArgs
     if isinstance(args, (list, tuple, types.GeneratorType)):
         # If we get one of these it means we have an insert, let the clickhouse
@@ -191,12 +383,12 @@ def _prepare_query(client: SyncClient, query: str, args: QueryArgs, workload: Wo
         rendered_sql = substitute_params(query, args)
         prepared_args = None
 
-    formatted_sql = sqlparse.format(rendered_sql, strip_comments=True)
-    annotated_sql, tags = _annotate_tagged_query(formatted_sql, workload)
+    annotated_sql, tags = _annotate_tagged_query(rendered_sql, workload)
+    statsd.timing("clickhouse_prepare_query_time", (perf_counter() - start_time) * 1000.0)
 
     if app_settings.SHELL_PLUS_PRINT_SQL:
         print()  # noqa T201
-        print(format_sql(formatted_sql))  # noqa T201
+        print(format_sql(rendered_sql))  # noqa T201
 
     return annotated_sql, prepared_args, tags
 
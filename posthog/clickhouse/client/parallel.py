@@ -0,0 +1,152 @@
+# A shared, per-process executor for running several ClickHouse queries for the same request in parallel.
+#
+# Concurrency is bounded three ways: by the size of the pool, by how many queries a single call may have in flight and
+# by how many queries a single team may have in flight across all requests served by this process.
+
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Sequence, Set, TypeVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from statshog.defaults.django import statsd
+
+from posthog.clickhouse.query_tagging import get_query_tags, reset_query_tags, tag_queries
+
+T = TypeVar("T")
+
+CANCELLATION_KEY_PREFIX = "@posthog/clickhouse-parallel-query-cancelled"
+CANCELLATION_TTL_SECONDS = 10 * 60
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_pid: Optional[int] = None
+_team_semaphores: Dict[int, threading.BoundedSemaphore] = {}
+_lock = threading.Lock()
+
+
+class ParallelQueryCancelled(Exception):
+    pass
+
+
+class ParallelQueryCapacityExceeded(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_code = "capacity_exceeded"
+    default_detail = "Too many queries are running for this project at the moment, please try again shortly"
+
+
+def get_query_executor() -> ThreadPoolExecutor:
+    global _executor, _executor_pid
+
+    # Worker threads don't survive a fork, so every process needs its own pool
+    with _lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.CLICKHOUSE_PARALLEL_QUERY_WORKERS, thread_name_prefix="clickhouse-query"
+            )
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def _get_team_semaphore(team_id: int) -> threading.BoundedSemaphore:
+    with _lock:
+        if team_id not in _team_semaphores:
+            _team_semaphores[team_id] = threading.BoundedSemaphore(settings.CLICKHOUSE_PARALLEL_QUERIES_PER_TEAM)
+        return _team_semaphores[team_id]
+
+
+def _cancellation_key(team_id: int, client_query_id: str) -> str:
+    return f"{CANCELLATION_KEY_PREFIX}/{team_id}_{client_query_id}"
+
+
+def cancel_parallel_queries(team_id: int, client_query_id: str) -> None:
+    """
+    Stops queries for `client_query_id` that are still waiting for a worker from being started. Goes through the cache
+    so that it works regardless of which process is serving the original request.
+    """
+    cache.set(_cancellation_key(team_id, client_query_id), True, CANCELLATION_TTL_SECONDS)
+
+
+def _is_cancelled(query_tags: Dict) -> bool:
+    team_id, client_query_id = query_tags.get("team_id"), query_tags.get("client_query_id")
+    if team_id is None or client_query_id is None:
+        return False
+    return bool(cache.get(_cancellation_key(team_id, client_query_id)))
+
+
+def _run_task(task: Callable[[], T], query_tags: Dict, submitted_at: float) -> T:
+    started_at = perf_counter()
+    statsd.timing("clickhouse_parallel_query_queue_time", (started_at - submitted_at) * 1000)
+
+    # Pool threads are reused, so the tags of the submitting request replace whatever the last task left behind
+    reset_query_tags()
+    tag_queries(**query_tags)
+    try:
+        return task()
+    finally:
+        statsd.timing("clickhouse_parallel_query_execution_time", (perf_counter() - started_at) * 1000)
+        reset_query_tags()
+        # Tasks may touch Postgres, and pool threads outlive requests, so don't let them hold on to a connection
+        connection.close()
+
+
+def _acquire_team_slot(team_semaphore: threading.BoundedSemaphore) -> None:
+    if not team_semaphore.acquire(timeout=settings.CLICKHOUSE_PARALLEL_QUERIES_TEAM_WAIT_SECONDS):
+        statsd.incr("clickhouse_parallel_query_team_slot_timeout")
+        raise ParallelQueryCapacityExceeded()
+
+
+def run_parallel_queries(tasks: Sequence[Callable[[], T]], *, team_id: Optional[int] = None) -> List[T]:
+    """
+    Runs `tasks` on the shared query executor and returns their results in order.
+
+    The query tags of the calling thread are applied to every task. If a task fails, the tasks that haven't started
+    yet are cancelled and the error is re-raised. Raises `ParallelQueryCapacityExceeded` if the team has no free slot
+    within `CLICKHOUSE_PARALLEL_QUERIES_TEAM_WAIT_SECONDS`.
+    """
+    query_tags = dict(get_query_tags())
+    if team_id is None:
+        team_id = query_tags.get("team_id")
+    team_semaphore = _get_team_semaphore(team_id) if team_id is not None else None
+
+    executor = get_query_executor()
+    results: List[Optional[T]] = [None] * len(tasks)
+    indexes: Dict[Future, int] = {}
+    pending: Set[Future] = set()
+    next_index = 0
+
+    try:
+        while next_index < len(tasks) or pending:
+            if next_index < len(tasks) and _is_cancelled(query_tags):
+                statsd.incr("clickhouse_parallel_query_cancelled")
+                raise ParallelQueryCancelled()
+
+            while next_index < len(tasks) and len(pending) < settings.CLICKHOUSE_PARALLEL_QUERIES_PER_REQUEST:
+                submitted_at = perf_counter()
+                if team_semaphore is not None:
+                    _acquire_team_slot(team_semaphore)
+                try:
+                    future = executor.submit(_run_task, tasks[next_index], query_tags, submitted_at)
+                except Exception:
+                    if team_semaphore is not None:
+                        team_semaphore.release()
+                    raise
+                if team_semaphore is not None:
+                    # Done callbacks also run for cancelled futures, so the slot is always given back
+                    future.add_done_callback(lambda _: team_semaphore.release())  # type: ignore
+                indexes[future] = next_index
+                pending.add(future)
+                next_index += 1
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[indexes[future]] = future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+    return results  # type: ignore
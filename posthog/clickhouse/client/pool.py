@@ -0,0 +1,118 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from clickhouse_pool import ChPool
+from clickhouse_pool.pool import TooManyConnections
+from prometheus_client import Counter, Gauge, Histogram
+
+# Connections shrink back to `connections_max` once no checkout had to wait for this long
+ADAPTIVE_SIZING_COOLDOWN_SECONDS = 60
+
+CHECKOUT_WAIT_HISTOGRAM = Histogram(
+    "clickhouse_pool_checkout_wait_seconds",
+    "Time spent waiting for a ClickHouse connection to be available, per workload.",
+    labelnames=["workload"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, float("inf")),
+)
+CHECKOUT_TIMEOUTS_COUNTER = Counter(
+    "clickhouse_pool_checkout_timeouts_total",
+    "ClickHouse queries that failed as no connection became available in time, per workload.",
+    labelnames=["workload"],
+)
+CONNECTIONS_IN_USE_GAUGE = Gauge(
+    "clickhouse_pool_connections_in_use",
+    "ClickHouse connections currently checked out, per workload.",
+    labelnames=["workload"],
+    multiprocess_mode="livesum",
+)
+CONNECTIONS_MAX_GAUGE = Gauge(
+    "clickhouse_pool_connections_max",
+    "Maximum number of ClickHouse connections, per workload. Changes over time with adaptive sizing.",
+    labelnames=["workload"],
+    multiprocess_mode="livesum",
+)
+
+
+class InstrumentedChPool(ChPool):
+    """
+    ChPool reporting checkout wait time, connections in use and timeouts to prometheus, labelled by workload.
+
+    When all connections are in use, checkouts wait up to `checkout_timeout` seconds for one to be released, or fail
+    right away if it is 0. With `adaptive_connections_max` set, the pool instead grows up to that many connections while
+    checkouts are waiting, and shrinks back to `connections_max` once they no longer are.
+    """
+
+    def __init__(
+        self,
+        *,
+        workload: str,
+        checkout_timeout: float,
+        adaptive_connections_max: Optional[int] = None,
+        **kwargs,
+    ) -> None:
+        super().__init__(**kwargs)
+        self.workload = workload
+        self.checkout_timeout = checkout_timeout
+        self.base_connections_max = self.connections_max
+        self.adaptive_connections_max = adaptive_connections_max
+        self._released = threading.Condition()
+        self._last_starved_at: Optional[float] = None
+
+        CONNECTIONS_MAX_GAUGE.labels(workload=self.workload).inc(self.connections_max)
+
+    @contextmanager
+    def get_client(self, key: Optional[str] = None):
+        client = self._checkout(key)
+        CONNECTIONS_IN_USE_GAUGE.labels(workload=self.workload).inc()
+        try:
+            yield client
+        finally:
+            CONNECTIONS_IN_USE_GAUGE.labels(workload=self.workload).dec()
+            with self._released:
+                self.push(client=client)
+                self._maybe_shrink()
+                self._released.notify()
+
+    def _checkout(self, key: Optional[str]):
+        start_time = time.monotonic()
+        deadline = start_time + self.checkout_timeout
+        with self._released:
+            while True:
+                try:
+                    client = self.pull(key)
+                    break
+                except TooManyConnections:
+                    self._last_starved_at = time.monotonic()
+                    if self._maybe_grow():
+                        continue
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        CHECKOUT_TIMEOUTS_COUNTER.labels(workload=self.workload).inc()
+                        raise
+                    self._released.wait(remaining)
+
+        CHECKOUT_WAIT_HISTOGRAM.labels(workload=self.workload).observe(time.monotonic() - start_time)
+        return client
+
+    def _maybe_grow(self) -> bool:
+        if self.adaptive_connections_max is None or self.connections_max >= self.adaptive_connections_max:
+            return False
+
+        self._set_connections_max(self.connections_max + 1)
+        return True
+
+    def _maybe_shrink(self) -> None:
+        if (
+            self.connections_max > self.base_connections_max
+            and self._last_starved_at is not None
+            and time.monotonic() - self._last_starved_at > ADAPTIVE_SIZING_COOLDOWN_SECONDS
+        ):
+            # New checkouts wait until the connections in use fall below the original maximum again
+            self._set_connections_max(self.base_connections_max)
+
+    def _set_connections_max(self, connections_max: int) -> None:
+        CONNECTIONS_MAX_GAUGE.labels(workload=self.workload).inc(connections_max - self.connections_max)
+        self.connections_max = connections_max
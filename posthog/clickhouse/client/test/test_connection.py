@@ -27,6 +27,15 @@ def test_connection_pool_creation_with_offline_cluster(settings):
     assert get_pool(Workload.DEFAULT) is offline_pool
 
 
+def test_only_offline_workload_waits_for_connections(settings):
+    settings.CLICKHOUSE_OFFLINE_CLUSTER_HOST = "ch-offline.example.com"
+    settings.CLICKHOUSE_CONN_POOL_CHECKOUT_TIMEOUT = 0.0
+    settings.CLICKHOUSE_CONN_POOL_OFFLINE_CHECKOUT_TIMEOUT = 30.0
+
+    assert get_pool(Workload.ONLINE).checkout_timeout == 0
+    assert get_pool(Workload.OFFLINE).checkout_timeout == 30
+
+
 @pytest.fixture(autouse=True)
 def reset_state():
     make_ch_pool.cache_clear()
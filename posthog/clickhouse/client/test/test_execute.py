@@ -0,0 +1,117 @@
+from types import GeneratorType
+from unittest.mock import patch
+
+import sqlparse
+from clickhouse_driver.errors import ServerException
+
+from posthog.clickhouse.client.execute import (
+    _prepare_query,
+    _strip_comments,
+    query_with_columns,
+    stream_execute,
+    stream_query_with_columns,
+    sync_execute,
+)
+from posthog.test.base import BaseTest, ClickhouseTestMixin
+
+
+def test_prepare_query_strips_comments_before_substitution():
+    query = """
+        SELECT count() -- count of events
+        FROM events /* all of them */
+        WHERE team_id = %(team_id)s AND event = %(event)s
+    """
+
+    prepared_sql, prepared_args, _ = _prepare_query(
+        client=None, query=query, args={"team_id": 2, "event": "-- not a comment"}  # type: ignore
+    )
+
+    assert "count of events" not in prepared_sql
+    assert "all of them" not in prepared_sql
+    assert "team_id = 2" in prepared_sql
+    assert "event = '-- not a comment'" in prepared_sql
+    assert prepared_args is None
+
+
+def test_prepare_query_caches_comment_stripping_per_template():
+    _strip_comments.cache_clear()
+    query = "SELECT 1 -- one\nWHERE team_id = %(team_id)s"
+
+    with patch("posthog.clickhouse.client.execute.sqlparse.format", wraps=sqlparse.format) as format:
+        first_sql, _, _ = _prepare_query(client=None, query=query, args={"team_id": 1})  # type: ignore
+        second_sql, _, _ = _prepare_query(client=None, query=query, args={"team_id": 2})  # type: ignore
+
+    assert format.call_count == 1
+    assert "team_id = 1" in first_sql
+    assert "team_id = 2" in second_sql
+
+
+def test_prepare_query_can_skip_comment_stripping():
+    with patch("posthog.clickhouse.client.execute._strip_comments") as strip_comments:
+        prepared_sql, _, _ = _prepare_query(
+            client=None, query="SELECT %(value)s", args={"value": 1}, strip_comments=False  # type: ignore
+        )
+
+    strip_comments.assert_not_called()
+    assert prepared_sql == "SELECT 1"
+
+
+class TestStreamExecute(ClickhouseTestMixin, BaseTest):
+    def test_stream_execute_yields_rows(self):
+        rows = stream_execute("SELECT number, toString(number) FROM numbers(%(count)s)", {"count": 25}, block_size=10)
+
+        assert isinstance(rows, GeneratorType)
+        assert list(rows) == [(number, str(number)) for number in range(25)]
+
+    def test_stream_execute_columnar_blocks(self):
+        blocks = list(
+            stream_execute("SELECT number AS n, number * 2 AS doubled FROM numbers(25)", columnar=True, block_size=10)
+        )
+
+        assert [len(block["n"]) for block in blocks] == [10, 10, 5]
+        assert [value for block in blocks for value in block["doubled"]] == [number * 2 for number in range(25)]
+
+    def test_stream_execute_can_be_stopped_early(self):
+        rows = stream_execute("SELECT number FROM numbers(100000)", block_size=10)
+        assert next(rows) == (0,)
+        rows.close()
+
+        assert sync_execute("SELECT 1") == [(1,)]
+
+    def test_stream_execute_wraps_errors(self):
+        with self.assertRaises(ServerException) as context:
+            list(stream_execute("SELECT not_a_column FROM numbers(1)"))
+
+        assert type(context.exception).__name__ == "CHQueryErrorUnknownIdentifier"
+
+    def test_stream_query_with_columns(self):
+        rows = stream_query_with_columns(
+            "SELECT number AS n, number * 2 AS doubled, 'x' AS removed FROM numbers(3)",
+            columns_to_remove=["removed"],
+            columns_to_rename={"doubled": "double"},
+            block_size=2,
+        )
+
+        assert list(rows) == query_with_columns(
+            "SELECT number AS n, number * 2 AS doubled, 'x' AS removed FROM numbers(3)",
+            columns_to_remove=["removed"],
+            columns_to_rename={"doubled": "double"},
+        )
+
+
+class TestQueryWithColumns(ClickhouseTestMixin, BaseTest):
+    QUERY = "SELECT number AS n, number * 2 AS doubled, 'x' AS removed FROM numbers(%(count)s)"
+
+    def test_columnar_results_match_rows(self):
+        kwargs = {"columns_to_remove": ["removed"], "columns_to_rename": {"doubled": "double"}}
+
+        rows = query_with_columns(self.QUERY, {"count": 4}, **kwargs)
+        columns = query_with_columns(self.QUERY, {"count": 4}, columnar=True, **kwargs)
+
+        assert set(columns.keys()) == {"n", "double"}
+        assert [dict(zip(columns.keys(), values)) for values in zip(*columns.values())] == rows
+
+    def test_columnar_results_for_empty_query(self):
+        columns = query_with_columns(self.QUERY, {"count": 0}, columns_to_remove=["removed"], columnar=True)
+
+        assert {name: list(values) for name, values in columns.items()} == {"n": [], "doubled": []}
@@ -0,0 +1,106 @@
+import threading
+import time
+from unittest.mock import patch
+
+from django.test import override_settings
+
+from posthog.clickhouse.client import parallel
+from posthog.clickhouse.client.parallel import (
+    ParallelQueryCancelled,
+    ParallelQueryCapacityExceeded,
+    cancel_parallel_queries,
+    run_parallel_queries,
+)
+from posthog.clickhouse.query_tagging import get_query_tags, reset_query_tags, tag_queries
+from posthog.test.base import BaseTest
+
+
+class TestRunParallelQueries(BaseTest):
+    def tearDown(self):
+        reset_query_tags()
+        super().tearDown()
+
+    def test_returns_results_in_order(self):
+        def task(index):
+            time.sleep(0.01 * (5 - index))
+            return index
+
+        results = run_parallel_queries([lambda index=index: task(index) for index in range(5)], team_id=self.team.pk)
+
+        assert results == [0, 1, 2, 3, 4]
+
+    @override_settings(CLICKHOUSE_PARALLEL_QUERIES_PER_REQUEST=2)
+    def test_limits_queries_in_flight_per_request(self):
+        lock = threading.Lock()
+        in_flight = 0
+        max_in_flight = 0
+
+        def task():
+            nonlocal in_flight, max_in_flight
+            with lock:
+                in_flight += 1
+                max_in_flight = max(max_in_flight, in_flight)
+            time.sleep(0.02)
+            with lock:
+                in_flight -= 1
+
+        run_parallel_queries([task] * 6, team_id=self.team.pk)
+
+        assert max_in_flight == 2
+
+    def test_propagates_query_tags(self):
+        tag_queries(kind="request", client_query_id="abc")
+
+        results = run_parallel_queries([lambda: dict(get_query_tags())] * 2, team_id=self.team.pk)
+
+        assert results == [{"kind": "request", "client_query_id": "abc"}] * 2
+
+    def test_reraises_task_errors(self):
+        def failing_task():
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            run_parallel_queries([lambda: 1, failing_task], team_id=self.team.pk)
+
+    def test_cancelled_queries_are_not_started(self):
+        tag_queries(team_id=self.team.pk, client_query_id="to-cancel")
+        cancel_parallel_queries(self.team.pk, "to-cancel")
+        started = []
+
+        with self.assertRaises(ParallelQueryCancelled):
+            run_parallel_queries([lambda: started.append(1)] * 3, team_id=self.team.pk)
+
+        assert started == []
+
+    @override_settings(CLICKHOUSE_PARALLEL_QUERIES_PER_REQUEST=2)
+    def test_checks_cancellation_once_per_batch(self):
+        tag_queries(team_id=self.team.pk, client_query_id="not-cancelled")
+
+        with patch("posthog.clickhouse.client.parallel._is_cancelled", return_value=False) as is_cancelled:
+            run_parallel_queries([lambda: time.sleep(0.01)] * 2, team_id=self.team.pk)
+
+        assert is_cancelled.call_count == 1
+
+    @override_settings(CLICKHOUSE_PARALLEL_QUERIES_TEAM_WAIT_SECONDS=0.01)
+    def test_raises_retryable_error_when_team_has_no_free_slots(self):
+        team_semaphore = parallel._get_team_semaphore(self.team.pk)
+        acquired = 0
+        while team_semaphore.acquire(blocking=False):
+            acquired += 1
+
+        try:
+            with self.assertRaises(ParallelQueryCapacityExceeded):
+                run_parallel_queries([lambda: 1], team_id=self.team.pk)
+        finally:
+            for _ in range(acquired):
+                team_semaphore.release()
+
+    def test_releases_team_slot_when_submitting_fails(self):
+        team_semaphore = parallel._get_team_semaphore(self.team.pk)
+        free_slots = team_semaphore._value  # type: ignore
+
+        with patch.object(parallel.get_query_executor(), "submit", side_effect=RuntimeError("shutdown")):
+            with self.assertRaises(RuntimeError):
+                run_parallel_queries([lambda: 1], team_id=self.team.pk)
+
+        assert team_semaphore._value == free_slots  # type: ignore
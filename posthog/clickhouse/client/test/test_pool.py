@@ -0,0 +1,86 @@
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+from clickhouse_pool.pool import TooManyConnections
+from django.conf import settings
+from prometheus_client import REGISTRY
+
+from posthog.clickhouse.client.pool import InstrumentedChPool
+
+
+def make_pool(**kwargs) -> InstrumentedChPool:
+    return InstrumentedChPool(
+        **{
+            "workload": "TEST",
+            "checkout_timeout": 1,
+            "host": settings.CLICKHOUSE_HOST,
+            "connections_min": 0,
+            "connections_max": 1,
+            **kwargs,
+        }
+    )
+
+
+def sample(name: str) -> float:
+    return REGISTRY.get_sample_value(name, {"workload": "TEST"}) or 0
+
+
+def hold_connection(pool: InstrumentedChPool, seconds: float) -> threading.Thread:
+    checked_out = threading.Event()
+
+    def hold():
+        with pool.get_client():
+            checked_out.set()
+            time.sleep(seconds)
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    checked_out.wait()
+    return thread
+
+
+def test_checkout_waits_for_a_connection_to_be_released():
+    pool = make_pool()
+    checkouts = sample("clickhouse_pool_checkout_wait_seconds_count")
+
+    thread = hold_connection(pool, 0.05)
+    with pool.get_client():
+        assert sample("clickhouse_pool_connections_in_use") == 1
+    thread.join()
+
+    assert sample("clickhouse_pool_connections_in_use") == 0
+    assert sample("clickhouse_pool_checkout_wait_seconds_count") == checkouts + 2
+
+
+def test_checkout_times_out():
+    pool = make_pool(checkout_timeout=0.01)
+    timeouts = sample("clickhouse_pool_checkout_timeouts_total")
+
+    thread = hold_connection(pool, 0.1)
+    with pytest.raises(TooManyConnections):
+        with pool.get_client():
+            pass
+    thread.join()
+
+    assert sample("clickhouse_pool_checkout_timeouts_total") == timeouts + 1
+
+
+def test_adaptive_sizing_grows_and_shrinks_the_pool():
+    pool = make_pool(checkout_timeout=0, adaptive_connections_max=2)
+
+    thread = hold_connection(pool, 0.05)
+    with pool.get_client():
+        assert pool.connections_max == 2
+
+        with pytest.raises(TooManyConnections):
+            with pool.get_client():
+                pass
+    thread.join()
+
+    with patch("posthog.clickhouse.client.pool.ADAPTIVE_SIZING_COOLDOWN_SECONDS", 0):
+        with pool.get_client():
+            pass
+
+    assert pool.connections_max == 1
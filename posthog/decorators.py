@@ -13,7 +13,7 @@ from posthog.models import User
 from posthog.models.filters.utils import get_filter
 from posthog.utils import refresh_requested_by_client
 
-from .utils import generate_cache_key, get_safe_cache
+from .utils import get_safe_cache
 
 
 class CacheType(str, Enum):
@@ -41,7 +41,7 @@ def cached_function(f: Callable[[U, Request], T]) -> Callable[[U, Request], T]:
             return f(self, request)
 
         filter = get_filter(request=request, team=team)
-        cache_key = generate_cache_key(f"{filter.toJSON()}_{team.pk}")
+        cache_key = filter.cache_key(team.pk)
 
         tag_queries(cache_key=cache_key)
 
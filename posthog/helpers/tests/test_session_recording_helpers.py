@@ -1,3 +1,4 @@
+import json
 from datetime import datetime, timedelta, timezone
 from typing import cast
 
@@ -5,19 +6,26 @@ import pytest
 from pytest_mock import MockerFixture
 
 from posthog.session_recordings.session_recording_helpers import (
+    SNAPSHOT_COMPRESSION_GZIP_BASE64_UTF8,
     PaginatedList,
     RecordingSegment,
     SessionRecordingEventSummary,
     SnapshotData,
     SnapshotDataTaggedWithWindowId,
+    _iter_json_list,
+    chunk_string,
     compress_and_chunk_snapshots,
+    compress_to_string,
     decompress_chunked_snapshot_data,
     generate_inactive_segments_for_range,
     get_active_segments_from_event_list,
     get_events_summary_from_snapshot_data,
     is_active_event,
+    lazy_chunked_snapshot_data,
     paginate_list,
     preprocess_session_recording_events_for_clickhouse,
+    stream_compressed_chunks,
+    stream_snapshot_data_response,
 )
 
 MILLISECOND_TIMESTAMP = round(datetime(2019, 1, 1).timestamp() * 1000)
@@ -133,6 +141,37 @@ def test_decompression_results_in_same_data(raw_snapshot_events):
     ]
 
 
+@pytest.mark.parametrize("chunk_size", [10, 100, 1000, 512 * 1024])
+def test_streaming_compression_matches_legacy_format(chunk_size, mocker: MockerFixture):
+    mocker.patch("time.time", return_value=0)
+    snapshot_data = [
+        {"type": 3, "timestamp": MILLISECOND_TIMESTAMP + index, "data": {"text": "💻 héllo " * index}}
+        for index in range(200)
+    ]
+
+    assert list(stream_compressed_chunks(_iter_json_list(snapshot_data), chunk_size)) == chunk_string(
+        compress_to_string(json.dumps(snapshot_data)), chunk_size
+    )
+
+
+def test_decompression_of_utf8_chunks_results_in_same_data(raw_snapshot_events):
+    chunks = list(compress_and_chunk_snapshots(raw_snapshot_events, 50, SNAPSHOT_COMPRESSION_GZIP_BASE64_UTF8))
+    assert len(chunks) == 2
+    assert all(
+        chunk["properties"]["$snapshot_data"]["compression"] == SNAPSHOT_COMPRESSION_GZIP_BASE64_UTF8
+        for chunk in chunks
+    )
+
+    snapshot_list = [
+        SnapshotDataTaggedWithWindowId(window_id="abc123", snapshot_data=chunk["properties"]["$snapshot_data"])
+        for chunk in chunks
+    ]
+    assert decompress_chunked_snapshot_data(2, "someid", snapshot_list)["snapshot_data_by_window_id"]["abc123"] == [
+        raw_snapshot_events[0]["properties"]["$snapshot_data"],
+        raw_snapshot_events[1]["properties"]["$snapshot_data"],
+    ]
+
+
 def test_has_full_snapshot_property(raw_snapshot_events):
     compressed = list(compress_and_chunk_snapshots(raw_snapshot_events))
     assert len(compressed) == 1
@@ -236,6 +275,55 @@ def test_paginate_decompression(chunked_and_compressed_snapshot_events):
     assert len(paginated_events["snapshot_data_by_window_id"][None]) == 2
 
 
+@pytest.mark.parametrize("limit,offset,window_id", [(None, 0, None), (1, 0, None), (1, 1, None), (10, 0, "1")])
+def test_lazy_decompression_streams_same_data(chunked_and_compressed_snapshot_events, limit, offset, window_id):
+    snapshot_data = [
+        SnapshotDataTaggedWithWindowId(
+            snapshot_data=event["properties"]["$snapshot_data"], window_id=event["properties"].get("$window_id")
+        )
+        for event in chunked_and_compressed_snapshot_events
+    ]
+    expected = decompress_chunked_snapshot_data(
+        1,
+        "someid",
+        [event for event in snapshot_data if window_id is None or event["window_id"] == window_id],
+        limit,
+        offset,
+    )
+
+    lazy_data = lazy_chunked_snapshot_data(1, "someid", snapshot_data, limit, offset, window_id)
+    response = json.loads("".join(stream_snapshot_data_response(lazy_data, "next-url")))
+
+    assert lazy_data.has_next == expected["has_next"]
+    assert response["next"] == "next-url"
+    assert response["snapshot_data_by_window_id"] == json.loads(json.dumps(expected["snapshot_data_by_window_id"]))
+    assert response["result"] == {
+        "next": "next-url",
+        "snapshot_data_by_window_id": response["snapshot_data_by_window_id"],
+    }
+
+
+def test_lazy_decompression_escapes_non_ascii_text():
+    snapshots = [{"type": 3, "timestamp": MILLISECOND_TIMESTAMP, "data": {"text": "💻 héllo \ud800"}}]
+    snapshot_data = [
+        SnapshotDataTaggedWithWindowId(
+            snapshot_data={
+                "chunk_id": "chunk",
+                "chunk_index": 0,
+                "chunk_count": 1,
+                # Written without escapes, as other clients may do
+                "data": compress_to_string(json.dumps(snapshots, ensure_ascii=False)),
+            },
+            window_id="1",
+        )
+    ]
+
+    body = "".join(stream_snapshot_data_response(lazy_chunked_snapshot_data(1, "someid", snapshot_data), None))
+
+    assert body.isascii()
+    assert json.loads(body)["snapshot_data_by_window_id"] == {"1": snapshots}
+
+
 def test_decompress_empty_list(chunked_and_compressed_snapshot_events):
     paginated_events = decompress_chunked_snapshot_data(1, "someid", [])
     assert paginated_events["has_next"] is False
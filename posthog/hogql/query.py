@@ -77,6 +77,8 @@ def execute_hogql_query(
         with_column_types=True,
         query_type=query_type,
         workload=workload,
+        # HogQL never prints comments, so there's nothing to strip
+        strip_comments=False,
     )
 
     return HogQLQueryResponse(
@@ -1,10 +1,12 @@
 import json
+import threading
 from enum import Enum
 from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import kafka.errors
 from kafka import KafkaConsumer as KC
 from kafka import KafkaProducer as KP
+from kafka.errors import KafkaTimeoutError
 from kafka.producer.future import FutureProduceResult, FutureRecordMetadata, RecordMetadata
 from kafka.structs import TopicPartition
 from statshog.defaults.django import statsd
@@ -55,6 +57,51 @@ class KafkaProducerForTests:
         return
 
 
+class ProduceBatchResult:
+    """
+    Combined completion for a batch of records handed to the producer with
+    `_KafkaProducer.produce_batch`. Rather than blocking on each record future
+    in turn, callers wait once for every record to be acknowledged, or for the
+    first failure.
+    """
+
+    def __init__(self, futures: List[FutureRecordMetadata]):
+        self.futures = futures
+        self._pending = len(futures)
+        self._exception: Optional[Exception] = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+        if not futures:
+            self._done.set()
+
+        for future in futures:
+            future.add_callback(self._on_success).add_errback(self._on_failure)
+
+    def _on_success(self, _record_metadata: RecordMetadata):
+        with self._lock:
+            self._pending -= 1
+            if self._pending <= 0:
+                self._done.set()
+
+    def _on_failure(self, exc: Exception):
+        with self._lock:
+            if self._exception is None:
+                self._exception = exc
+            # Fail fast, there is no point in waiting for the remaining records
+            # if the request as a whole is going to be retried.
+            self._done.set()
+
+    def __len__(self) -> int:
+        return len(self.futures)
+
+    def get(self, timeout: Optional[float] = None) -> None:
+        if not self._done.wait(timeout=max(timeout, 0) if timeout is not None else None):
+            raise KafkaTimeoutError(f"Timed out waiting for {self._pending} of {len(self.futures)} records")
+        if self._exception is not None:
+            raise self._exception
+
+
 class KafkaConsumerForTests:
     def __init__(self, topic="test", max=0, **kwargs):
         self.max = max
@@ -144,6 +191,13 @@ class _KafkaProducer:
         future.add_callback(self.on_send_success).add_errback(lambda exc: self.on_send_failure(topic=topic, exc=exc))
         return future
 
+    def produce_batch(self, records: List[Tuple[str, Any, Any]]) -> ProduceBatchResult:
+        """
+        Hand a batch of `(topic, data, key)` records to the producer in one go
+        and return a single `ProduceBatchResult` to wait on.
+        """
+        return ProduceBatchResult([self.produce(topic=topic, data=data, key=key) for topic, data, key in records])
+
     def close(self):
         self.producer.flush()
 
@@ -2,8 +2,11 @@ from unittest.mock import patch
 
 import kafka
 from django.test import TestCase
+from kafka.errors import KafkaError, KafkaTimeoutError
+from kafka.producer.future import FutureProduceResult, FutureRecordMetadata
+from kafka.structs import TopicPartition
 
-from posthog.kafka_client.client import _KafkaProducer, build_kafka_consumer
+from posthog.kafka_client.client import ProduceBatchResult, _KafkaProducer, build_kafka_consumer
 
 
 class KafkaClientTestCase(TestCase):
@@ -20,6 +23,39 @@ class KafkaClientTestCase(TestCase):
         msg = next(consumer)
         self.assertEqual(msg, "message 1 from test_topic topic")
 
+    def test_kafka_produce_batch(self):
+        producer = _KafkaProducer(test=True)
+        result = producer.produce_batch([(self.topic, self.payload, None), (self.topic, self.payload, "key")])
+
+        self.assertEqual(len(result), 2)
+        result.get(timeout=1)
+
+    def test_produce_batch_result_raises_first_failure(self):
+        pending, failed = self._future(), self._future()
+        result = ProduceBatchResult([pending, failed])
+
+        failed.failure(KafkaError("Failed to produce"))
+
+        with self.assertRaises(KafkaError):
+            result.get(timeout=1)
+
+    def test_produce_batch_result_times_out(self):
+        result = ProduceBatchResult([self._future()])
+
+        with self.assertRaises(KafkaTimeoutError):
+            result.get(timeout=0)
+
+    def _future(self) -> FutureRecordMetadata:
+        return FutureRecordMetadata(
+            produce_future=FutureProduceResult(topic_partition=TopicPartition(self.topic, 1)),
+            relative_offset=0,
+            timestamp_ms=0,
+            checksum=0,
+            serialized_key_size=0,
+            serialized_value_size=0,
+            serialized_header_size=0,
+        )
+
     def test_kafka_produce(self):
         producer = _KafkaProducer(test=False)
         producer.produce(topic=self.topic, data=self.payload)
@@ -0,0 +1,119 @@
+"""
+Decoder for the LZ-string format used by legacy posthog-js clients (`compression=lz64`).
+
+This produces exactly the same output as `lzstring.LZString().decompressFromBase64`, but instead of reading the
+stream one bit at a time through dictionary lookups, it translates the whole payload through a lookup table once,
+reads codes through an integer bit buffer and keeps the dictionary in a list.
+"""
+from typing import List, Optional
+
+BASE64_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/="
+
+_INVALID_VALUE = 0xFF
+
+
+def _build_lookup_table() -> bytes:
+    """
+    Maps every byte to the 6-bit value of the base64 character, with the bit order reversed.
+
+    LZ-string reads the bits of each character most significant bit first, but assembles them into codes least
+    significant bit first. Reversing the bits of every character up front means codes can be read straight from the
+    bottom of an integer bit buffer.
+    """
+    table = bytearray([_INVALID_VALUE] * 256)
+    for value, character in enumerate(BASE64_ALPHABET):
+        # `=` has the value 64, of which only the lower 6 bits are ever read
+        table[ord(character)] = int(format(value & 0b111111, "06b")[::-1], 2)
+    return bytes(table)
+
+
+_LOOKUP_TABLE = _build_lookup_table()
+
+
+def decompress_from_base64(compressed: Optional[str]) -> Optional[str]:
+    """
+    Decompresses a base64 encoded LZ-string payload.
+
+    Raises ValueError if the payload contains characters outside of the base64 alphabet or is truncated, where the
+    reference implementation would raise a KeyError or IndexError respectively.
+    """
+    if compressed is None:
+        return ""
+    if compressed == "":
+        return None
+
+    # Non-ascii characters are replaced with `?`, which is not part of the alphabet
+    values = compressed.encode("ascii", "replace").translate(_LOOKUP_TABLE)
+    length = len(values)
+
+    # The bit buffer always holds at least one unread bit of the current character, mirroring the reference
+    # implementation which fetches the next character as soon as the previous one is exhausted.
+    buffer = 0
+    buffered_bits = 0
+    position = 0
+
+    def read_bits(count: int) -> int:
+        nonlocal buffer, buffered_bits, position
+        while buffered_bits <= count:
+            if position >= length:
+                raise ValueError("Truncated LZ-string payload")
+            value = values[position]
+            if value == _INVALID_VALUE:
+                raise ValueError(f"Invalid character in LZ-string payload at position {position}")
+            buffer |= value << buffered_bits
+            buffered_bits += 6
+            position += 1
+        code = buffer & ((1 << count) - 1)
+        buffer >>= count
+        buffered_bits -= count
+        return code
+
+    read_bits(0)
+
+    first = read_bits(2)
+    if first == 0:
+        character = chr(read_bits(8))
+    elif first == 1:
+        character = chr(read_bits(16))
+    elif first == 2:
+        return ""
+    else:
+        # The reference implementation fails on an unbound variable here
+        raise ValueError("Invalid LZ-string payload")
+
+    # Codes 0, 1 and 2 are reserved for control codes and never looked up
+    dictionary: List[str] = ["", "", "", character]
+    enlarge_in = 4
+    num_bits = 3
+    w = character
+    result = [character]
+
+    while True:
+        code = read_bits(num_bits)
+
+        if code < 2:
+            dictionary.append(chr(read_bits(8 if code == 0 else 16)))
+            code = len(dictionary) - 1
+            enlarge_in -= 1
+        elif code == 2:
+            return "".join(result)
+
+        if enlarge_in == 0:
+            enlarge_in = 1 << num_bits
+            num_bits += 1
+
+        if code < len(dictionary):
+            entry = dictionary[code]
+        elif code == len(dictionary):
+            entry = w + w[0]
+        else:
+            return None
+        result.append(entry)
+
+        dictionary.append(w + entry[0])
+        enlarge_in -= 1
+
+        w = entry
+        if enlarge_in == 0:
+            enlarge_in = 1 << num_bits
+            num_bits += 1
@@ -1,4 +1,3 @@
-import inspect
 from collections import Counter
 from typing import Any, Dict, Literal, Optional, Union
 
@@ -9,6 +8,7 @@ from posthog.constants import TREND_FILTER_TYPE_ACTIONS, TREND_FILTER_TYPE_EVENT
 from posthog.models.action import Action
 from posthog.models.filters.mixins.funnel import FunnelFromToStepsMixin
 from posthog.models.filters.mixins.property import PropertyMixin
+from posthog.models.filters.mixins.utils import get_decorated_method_names
 from posthog.models.filters.utils import validate_group_type_index
 from posthog.models.property import GroupTypeIndex
 from posthog.models.utils import sane_repr
@@ -158,8 +158,8 @@ class ExclusionEntity(Entity, FunnelFromToStepsMixin):
 
         ret = super().to_dict()
 
-        for _, func in inspect.getmembers(self, inspect.ismethod):
-            if hasattr(func, "include_dict"):  # provided by @include_dict decorator
-                ret.update(func())
+        # provided by @include_dict decorator
+        for name in get_decorated_method_names(type(self), "include_dict"):
+            ret.update(getattr(self, name)())
 
         return ret
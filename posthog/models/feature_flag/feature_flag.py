@@ -1,9 +1,22 @@
 import json
-from typing import Dict, List, Optional, cast
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    List,
+    Optional,
+    Tuple,
+    cast,
+)
 
 from django.core.cache import cache
 from django.db import models
-from django.db.models.signals import post_delete, post_save, pre_delete
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.utils import timezone
 from sentry_sdk.api import capture_exception
 
@@ -11,11 +24,39 @@ from posthog.constants import PropertyOperatorType
 from posthog.models.cohort import Cohort
 from posthog.models.experiment import Experiment
 from posthog.models.filters.mixins.utils import cached_property
+from posthog.models.group_type_mapping import GroupTypeMapping
 from posthog.models.property import GroupTypeIndex
 from posthog.models.property.property import Property, PropertyGroup
 from posthog.models.signals import mutable_receiver
 
 FIVE_DAYS = 60 * 60 * 24 * 5  # 5 days in seconds
+# Number of teams whose parsed flags each process keeps around
+MAX_TEAMS_IN_PROCESS_CACHE = 1000
+
+
+@dataclass(frozen=True)
+class CompiledCondition:
+    "A feature flag condition's properties, compiled into a single predicate over a dict of property values"
+
+    # Keys of the properties the condition needs to be evaluated
+    property_keys: FrozenSet[str]
+    # `is_not_set` can't be decided from overrides, as these never contain the unset properties
+    locally_evaluable: bool
+    predicate: Callable[[Dict[str, Any]], bool]
+
+    def can_compute_locally(self, property_values: Dict[str, Any]) -> bool:
+        return self.locally_evaluable and self.property_keys <= property_values.keys()
+
+    @classmethod
+    def compile(cls, properties: List[Property]) -> "CompiledCondition":
+        from posthog.queries.base import compile_property
+
+        predicates = [compile_property(property) for property in properties]
+        return cls(
+            property_keys=frozenset(property.key for property in properties),
+            locally_evaluable=all(property.operator != "is_not_set" for property in properties),
+            predicate=lambda property_values: all(predicate(property_values) for predicate in predicates),
+        )
 
 
 class FeatureFlag(models.Model):
@@ -86,6 +127,39 @@ class FeatureFlag(models.Model):
                 return variants
         return []
 
+    @cached_property
+    def condition_properties(self) -> List[List[Property]]:
+        "Properties of each condition, parsed once per flag rather than on every evaluation"
+        from posthog.models.filters import Filter
+
+        return [
+            Filter(data=condition).property_groups.flat if len(condition.get("properties", [])) > 0 else []
+            for condition in self.conditions
+        ]
+
+    @cached_property
+    def compiled_conditions(self) -> List[CompiledCondition]:
+        return [CompiledCondition.compile(properties) for properties in self.condition_properties]
+
+    @cached_property
+    def property_keys(self) -> FrozenSet[str]:
+        "Keys of all person or group properties (depending on the aggregation) the flag's conditions depend on"
+        return frozenset().union(*(condition.property_keys for condition in self.compiled_conditions))
+
+    # Define contiguous sub-domains within [0, 1].
+    # By looking up a random hash value, you can find the associated variant key.
+    # e.g. the first of two variants with 50% rollout percentage will have value_max: 0.5
+    # and the second will have value_min: 0.5 and value_max: 1.0
+    @cached_property
+    def variant_lookup_table(self) -> List[Dict]:
+        lookup_table = []
+        value_min = 0
+        for variant in self.variants:
+            value_max = value_min + variant["rollout_percentage"] / 100
+            lookup_table.append({"value_min": value_min, "value_max": value_max, "key": variant["key"]})
+            value_min = value_max
+        return lookup_table
+
     def get_filters(self):
         if "groups" in self.filters:
             return self.filters
@@ -233,11 +307,42 @@ class FeatureFlag(models.Model):
 @mutable_receiver(pre_delete, sender=Experiment)
 def delete_experiment_flags(sender, instance, **kwargs):
     FeatureFlag.objects.filter(experiment=instance).update(deleted=True)
+    clear_local_evaluation_cache(instance.team_id)
 
 
 @mutable_receiver([post_save, post_delete], sender=FeatureFlag)
 def refresh_flag_cache_on_updates(sender, instance, **kwargs):
     set_feature_flags_for_team_in_cache(instance.team_id)
+    clear_local_evaluation_cache(instance.team_id)
+
+
+# Cohort fields that end up in the local evaluation response. Cohorts are saved many times while being recalculated,
+# which shouldn't invalidate it.
+LOCAL_EVALUATION_COHORT_FIELDS = ("filters", "groups", "deleted")
+
+
+@mutable_receiver(pre_save, sender=Cohort)
+def detect_cohort_local_evaluation_changes(sender, instance: Cohort, update_fields=None, **kwargs):
+    fields = [field for field in LOCAL_EVALUATION_COHORT_FIELDS if update_fields is None or field in update_fields]
+    previous = None
+    # New cohorts can't be used by any flag yet
+    if fields and not instance._state.adding:
+        previous = Cohort.objects.filter(pk=instance.pk).values(*fields).first()
+    instance._local_evaluation_changed = previous is not None and any(  # type: ignore
+        previous[field] != getattr(instance, field) for field in fields
+    )
+
+
+@mutable_receiver(post_save, sender=Cohort)
+def clear_local_evaluation_cache_on_cohort_updates(sender, instance: Cohort, **kwargs):
+    if getattr(instance, "_local_evaluation_changed", False):
+        clear_local_evaluation_cache(instance.team_id)
+
+
+@mutable_receiver(post_delete, sender=Cohort)
+@mutable_receiver([post_save, post_delete], sender=GroupTypeMapping)
+def clear_local_evaluation_cache_on_updates(sender, instance, **kwargs):
+    clear_local_evaluation_cache(instance.team_id)
 
 
 class FeatureFlagHashKeyOverride(models.Model):
@@ -273,6 +378,42 @@ class FeatureFlagOverride(models.Model):
     team: models.ForeignKey = models.ForeignKey("Team", on_delete=models.CASCADE)
 
 
+class _ParsedFlagsCache:
+    """
+    Flags of recently seen teams, parsed from the shared cache once per version rather than on every request.
+
+    `set_feature_flags_for_team_in_cache` changes the version of the team's flags, after which each process parses
+    them again the next time they're needed.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._flags: "OrderedDict[int, Tuple[str, List[FeatureFlag]]]" = OrderedDict()
+
+    def get(self, team_id: int, version: str) -> Optional[List[FeatureFlag]]:
+        with self._lock:
+            cached = self._flags.get(team_id)
+            if cached is None or cached[0] != version:
+                return None
+            self._flags.move_to_end(team_id)
+            return cached[1]
+
+    def set(self, team_id: int, version: str, feature_flags: List[FeatureFlag]) -> None:
+        with self._lock:
+            self._flags[team_id] = (version, feature_flags)
+            self._flags.move_to_end(team_id)
+            while len(self._flags) > self.max_size:
+                self._flags.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._flags.clear()
+
+
+parsed_flags_cache = _ParsedFlagsCache(MAX_TEAMS_IN_PROCESS_CACHE)
+
+
 def set_feature_flags_for_team_in_cache(
     team_id: int, feature_flags: Optional[List[FeatureFlag]] = None
 ) -> List[FeatureFlag]:
@@ -285,13 +426,56 @@ def set_feature_flags_for_team_in_cache(
 
     serialized_flags = MinimalFeatureFlagSerializer(all_feature_flags, many=True).data
 
-    cache.set(f"team_feature_flags_{team_id}", json.dumps(serialized_flags), FIVE_DAYS)
+    cache.set_many(
+        {
+            f"team_feature_flags_{team_id}": json.dumps(serialized_flags),
+            f"team_feature_flags_version_{team_id}": uuid.uuid4().hex,
+        },
+        FIVE_DAYS,
+    )
 
     return all_feature_flags
 
 
+def get_local_evaluation_version(team_id: int) -> Optional[str]:
+    """
+    Version of the team's local evaluation payload, which changes whenever the team's flags, cohorts or group types do.
+    Returns None if the cache is unavailable.
+    """
+    key = f"team_local_evaluation_version_{team_id}"
+    try:
+        version = cache.get(key)
+        if version is None:
+            # Don't overwrite a version set by a concurrent request or change
+            cache.add(key, uuid.uuid4().hex, FIVE_DAYS)
+            version = cache.get(key)
+        return version
+    except Exception:
+        # redis is unavailable
+        return None
+
+
+def clear_local_evaluation_cache(team_id: int) -> None:
+    try:
+        cache.set(f"team_local_evaluation_version_{team_id}", uuid.uuid4().hex, FIVE_DAYS)
+    except Exception as e:
+        capture_exception(e)
+
+
 def get_feature_flags_for_team_in_cache(team_id: int) -> Optional[List[FeatureFlag]]:
+    version_key = f"team_feature_flags_version_{team_id}"
     try:
+        version = cache.get(version_key)
+        if version is not None:
+            feature_flags = parsed_flags_cache.get(team_id, version)
+            if feature_flags is not None:
+                return feature_flags
+        else:
+            # Flags cached without a version (e.g. before versions existed) get one, so they're only parsed once too.
+            # It's added before the flags are read, so flags written since come with a newer version.
+            cache.add(version_key, uuid.uuid4().hex, FIVE_DAYS)
+            version = cache.get(version_key)
+
         flag_data = cache.get(f"team_feature_flags_{team_id}")
     except Exception:
         # redis is unavailable
@@ -300,9 +484,13 @@ def get_feature_flags_for_team_in_cache(team_id: int) -> Optional[List[FeatureFl
     if flag_data is not None:
         try:
             parsed_data = json.loads(flag_data)
-            return [FeatureFlag(**flag) for flag in parsed_data]
+            feature_flags = [FeatureFlag(**flag) for flag in parsed_data]
         except Exception as e:
             capture_exception(e)
             return None
 
+        if version is not None:
+            parsed_flags_cache.set(team_id, version, feature_flags)
+        return feature_flags
+
     return None
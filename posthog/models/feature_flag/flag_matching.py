@@ -1,7 +1,10 @@
 import hashlib
+import json
+import threading
+from collections import OrderedDict, defaultdict
 from dataclasses import dataclass
 from enum import Enum
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
 
 from django.db import DatabaseError
 from django.db.models.expressions import ExpressionWrapper, RawSQL
@@ -9,15 +12,13 @@ from django.db.models.fields import BooleanField
 from django.db.models.query import QuerySet
 from sentry_sdk.api import capture_exception
 
-from posthog.models.filters import Filter
 from posthog.models.filters.mixins.utils import cached_property
 from posthog.models.group import Group
 from posthog.models.group_type_mapping import GroupTypeMapping
 from posthog.models.person import Person, PersonDistinctId
 from posthog.models.property import GroupTypeIndex, GroupTypeName
-from posthog.models.property.property import Property
 from posthog.models.utils import execute_with_timeout
-from posthog.queries.base import match_property, properties_to_Q
+from posthog.queries.base import properties_to_Q
 
 from .feature_flag import (
     FeatureFlag,
@@ -29,6 +30,16 @@ from .feature_flag import (
 __LONG_SCALE__ = float(0xFFFFFFFFFFFFFFF)
 
 FLAG_MATCHING_QUERY_TIMEOUT_MS = 1 * 1000  # 1 second. Any longer and we'll just error out.
+# Queries evaluating flags for a whole batch of distinct ids at once get more time
+BULK_FLAG_MATCHING_QUERY_TIMEOUT_MS = 10 * 1000
+BULK_FLAG_MATCHING_BATCH_SIZE = 1000
+
+# Number of identifiers (per team) each process keeps rollout hashes around for, see `get_rollout_hash`, and the number
+# of flags hashed for each of them that are kept per salt. With the two salts in use, that's at most 200k hashes.
+ROLLOUT_HASH_CACHE_IDENTIFIERS = 100
+ROLLOUT_HASH_CACHE_FLAGS_PER_IDENTIFIER = 1000
+
+FlagMatches = Tuple[Dict[str, Union[str, bool]], Dict[str, dict], Dict[str, object], bool]
 
 
 class FeatureFlagMatchReason(str, Enum):
@@ -110,6 +121,10 @@ class FeatureFlagMatcher:
         self.property_value_overrides = property_value_overrides
         self.group_property_value_overrides = group_property_value_overrides
         self.skip_experience_continuity_flags = skip_experience_continuity_flags
+        # Set when evaluating flags for many distinct ids at once, see `get_feature_flags_for_distinct_ids`
+        self.bulk_query_conditions: Optional[BulkQueryConditions] = None
+        # Cached rollout hashes of each identifier this matcher hashes, looked up once rather than for every flag
+        self._rollout_hashes: Dict[Tuple[int, Optional[str]], Dict[str, Dict[str, float]]] = {}
 
     def get_match(self, feature_flag: FeatureFlag) -> FeatureFlagMatch:
         # If aggregating flag by groups and relevant group type is not passed - flag is off!
@@ -181,11 +196,9 @@ class FeatureFlagMatcher:
         return flag_values, flag_evaluation_reasons, flag_payloads, faced_error_computing_flags
 
     def get_matching_variant(self, feature_flag: FeatureFlag) -> Optional[str]:
+        variant_hash = self.get_hash(feature_flag, salt="variant")
         for variant in self.variant_lookup_table(feature_flag):
-            if (
-                self.get_hash(feature_flag, salt="variant") >= variant["value_min"]
-                and self.get_hash(feature_flag, salt="variant") < variant["value_max"]
-            ):
+            if variant_hash >= variant["value_min"] and variant_hash < variant["value_max"]:
                 return variant["key"]
         return None
 
@@ -205,17 +218,13 @@ class FeatureFlagMatcher:
     ) -> Tuple[bool, FeatureFlagMatchReason]:
         rollout_percentage = condition.get("rollout_percentage")
         if len(condition.get("properties", [])) > 0:
-            properties = Filter(data=condition).property_groups.flat
-            if self.can_compute_locally(properties, feature_flag.aggregation_group_type_index):
+            compiled_condition = feature_flag.compiled_conditions[condition_index]
+            target_properties = self.target_properties(feature_flag.aggregation_group_type_index)
+            if compiled_condition.can_compute_locally(target_properties):
                 # :TRICKY: If overrides are enough to determine if a condition is a match,
                 # we can skip checking the query.
                 # This ensures match even if the person hasn't been ingested yet.
-                target_properties = self.property_value_overrides
-                if feature_flag.aggregation_group_type_index is not None:
-                    target_properties = self.group_property_value_overrides.get(
-                        self.cache.group_type_index_to_name[feature_flag.aggregation_group_type_index], {}
-                    )
-                condition_match = all(match_property(property, target_properties) for property in properties)
+                condition_match = compiled_condition.predicate(target_properties)
             else:
                 condition_match = self._condition_matches(feature_flag, condition_index)
 
@@ -234,22 +243,15 @@ class FeatureFlagMatcher:
             raise DatabaseError("Failed to fetch conditions for feature flag previously, not trying again.")
         return self.query_conditions.get(f"flag_{feature_flag.pk}_condition_{condition_index}", False)
 
-    # Define contiguous sub-domains within [0, 1].
-    # By looking up a random hash value, you can find the associated variant key.
-    # e.g. the first of two variants with 50% rollout percentage will have value_max: 0.5
-    # and the second will have value_min: 0.5 and value_max: 1.0
     def variant_lookup_table(self, feature_flag: FeatureFlag):
-        lookup_table = []
-        value_min = 0
-        for variant in feature_flag.variants:
-            value_max = value_min + variant["rollout_percentage"] / 100
-            lookup_table.append({"value_min": value_min, "value_max": value_max, "key": variant["key"]})
-            value_min = value_max
-        return lookup_table
+        return feature_flag.variant_lookup_table
 
     @cached_property
     def query_conditions(self) -> Dict[str, bool]:
         try:
+            if self.bulk_query_conditions is not None:
+                return self.bulk_query_conditions.for_distinct_id(self.distinct_id, self.groups)
+
             with execute_with_timeout(FLAG_MATCHING_QUERY_TIMEOUT_MS):
                 team_id = self.feature_flags[0].team_id
                 person_query: QuerySet = Person.objects.filter(
@@ -272,29 +274,12 @@ class FeatureFlagMatcher:
                 person_fields = []
 
                 for feature_flag in self.feature_flags:
-                    for index, condition in enumerate(feature_flag.conditions):
+                    for index in range(len(feature_flag.conditions)):
                         key = f"flag_{feature_flag.pk}_condition_{index}"
-                        expr: Any = None
-                        if len(condition.get("properties", {})) > 0:
-                            # Feature Flags don't support OR filtering yet
-                            target_properties = self.property_value_overrides
-                            if feature_flag.aggregation_group_type_index is not None:
-                                target_properties = self.group_property_value_overrides.get(
-                                    self.cache.group_type_index_to_name[feature_flag.aggregation_group_type_index], {}
-                                )
-                            expr = properties_to_Q(
-                                Filter(data=condition).property_groups.flat,
-                                override_property_values=target_properties,
-                            )
+                        expr = self.condition_expression(feature_flag, index)
 
                         if feature_flag.aggregation_group_type_index is None:
-                            person_query = person_query.annotate(
-                                **{
-                                    key: ExpressionWrapper(
-                                        expr if expr else RawSQL("true", []), output_field=BooleanField()
-                                    )
-                                }
-                            )
+                            person_query = person_query.annotate(**{key: expr})
                             person_fields.append(key)
                         else:
                             if feature_flag.aggregation_group_type_index not in group_query_per_group_type_mapping:
@@ -303,13 +288,7 @@ class FeatureFlagMatcher:
                             group_query, group_fields = group_query_per_group_type_mapping[
                                 feature_flag.aggregation_group_type_index
                             ]
-                            group_query = group_query.annotate(
-                                **{
-                                    key: ExpressionWrapper(
-                                        expr if expr else RawSQL("true", []), output_field=BooleanField()
-                                    )
-                                }
-                            )
+                            group_query = group_query.annotate(**{key: expr})
                             group_fields.append(key)
                             group_query_per_group_type_mapping[feature_flag.aggregation_group_type_index] = (
                                 group_query,
@@ -333,6 +312,17 @@ class FeatureFlagMatcher:
             self.failed_to_fetch_conditions = True
             raise e
 
+    def condition_expression(self, feature_flag: FeatureFlag, condition_index: int) -> ExpressionWrapper:
+        "Expression evaluating a flag condition on the person or group row it applies to"
+        expr: Any = None
+        if len(feature_flag.conditions[condition_index].get("properties", {})) > 0:
+            # Feature Flags don't support OR filtering yet
+            expr = properties_to_Q(
+                feature_flag.condition_properties[condition_index],
+                override_property_values=self.target_properties(feature_flag.aggregation_group_type_index),
+            )
+        return ExpressionWrapper(expr if expr else RawSQL("true", []), output_field=BooleanField())
+
     def hashed_identifier(self, feature_flag: FeatureFlag) -> Optional[str]:
         """
         If aggregating by people, returns distinct_id.
@@ -353,29 +343,19 @@ class FeatureFlagMatcher:
             group_key = self.groups.get(group_type_name)  # type: ignore
             return group_key
 
-    # This function takes a identifier and a feature flag key and returns a float between 0 and 1.
-    # Given the same identifier and key, it'll always return the same float. These floats are
-    # uniformly distributed between 0 and 1, so if we want to show this feature to 20% of traffic
-    # we can do _hash(key, identifier) < 0.2
     def get_hash(self, feature_flag: FeatureFlag, salt="") -> float:
-        hash_key = f"{feature_flag.key}.{self.hashed_identifier(feature_flag)}{salt}"
-        hash_val = int(hashlib.sha1(hash_key.encode("utf-8")).hexdigest()[:15], 16)
-        return hash_val / __LONG_SCALE__
-
-    def can_compute_locally(
-        self, properties: List[Property], group_type_index: Optional[GroupTypeIndex] = None
-    ) -> bool:
-        target_properties = self.property_value_overrides
-        if group_type_index is not None:
-            target_properties = self.group_property_value_overrides.get(
-                self.cache.group_type_index_to_name[group_type_index], {}
-            )
-        for property in properties:
-            if property.key not in target_properties:
-                return False
-            if property.operator == "is_not_set":
-                return False
-        return True
+        identifier = self.hashed_identifier(feature_flag)
+        cache_key = (feature_flag.team_id, identifier)
+        hashes = self._rollout_hashes.get(cache_key)
+        if hashes is None:
+            hashes = self._rollout_hashes[cache_key] = rollout_hash_cache.hashes_for(*cache_key)
+        return get_rollout_hash(feature_flag.key, identifier, salt, hashes=hashes)
+
+    def target_properties(self, group_type_index: Optional[GroupTypeIndex] = None) -> Dict[str, Any]:
+        "Property values passed in to evaluate flags with, either for the person or for the group of given type"
+        if group_type_index is None:
+            return self.property_value_overrides
+        return self.group_property_value_overrides.get(self.cache.group_type_index_to_name[group_type_index], {})
 
     def get_highest_priority_match_evaluation(
         self,
@@ -390,6 +370,153 @@ class FeatureFlagMatcher:
         return current_match, current_index
 
 
+class _RolloutHashCache:
+    """
+    Rollout hashes of the most recently seen identifiers of each team, by salt and flag key.
+
+    Every flag of the team is hashed for an identifier on each request, so keeping all of them for a few identifiers
+    works where an LRU of single hashes would be churned through by teams with many flags. Identifiers are kept per
+    team, so that one seen by many teams doesn't collect the flags of all of them.
+    """
+
+    def __init__(self, max_identifiers: int) -> None:
+        self.max_identifiers = max_identifiers
+        self._lock = threading.Lock()
+        self._hashes: "OrderedDict[Tuple[Optional[int], Optional[str]], Dict[str, Dict[str, float]]]" = OrderedDict()
+
+    def hashes_for(self, team_id: Optional[int], identifier: Optional[str]) -> Dict[str, Dict[str, float]]:
+        key = (team_id, identifier)
+        with self._lock:
+            hashes = self._hashes.get(key)
+            if hashes is None:
+                hashes = self._hashes[key] = defaultdict(dict)
+                while len(self._hashes) > self.max_identifiers:
+                    self._hashes.popitem(last=False)
+            else:
+                self._hashes.move_to_end(key)
+            return hashes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._hashes.clear()
+
+
+rollout_hash_cache = _RolloutHashCache(ROLLOUT_HASH_CACHE_IDENTIFIERS)
+
+
+# This function takes a identifier and a feature flag key and returns a float between 0 and 1.
+# Given the same identifier and key, it'll always return the same float. These floats are
+# uniformly distributed between 0 and 1, so if we want to show this feature to 20% of traffic
+# we can do _hash(key, identifier) < 0.2
+# :TRICKY: The same identifiers come back on request after request, and each of them is hashed for every flag of the
+# team, so recent hashes are kept around rather than running SHA1 again.
+def get_rollout_hash(
+    feature_flag_key: str,
+    identifier: Optional[str],
+    salt: str = "",
+    team_id: Optional[int] = None,
+    hashes: Optional[Dict[str, Dict[str, float]]] = None,
+) -> float:
+    "`hashes` are the cached hashes of `identifier` in the flag's team, if already looked up"
+    if hashes is None:
+        hashes = rollout_hash_cache.hashes_for(team_id, identifier)
+    salted_hashes = hashes[salt]
+    rollout_hash = salted_hashes.get(feature_flag_key)
+    if rollout_hash is None:
+        hash_key = f"{feature_flag_key}.{identifier}{salt}"
+        hash_val = int(hashlib.sha1(hash_key.encode("utf-8")).hexdigest()[:15], 16)
+        rollout_hash = hash_val / __LONG_SCALE__
+        if len(salted_hashes) < ROLLOUT_HASH_CACHE_FLAGS_PER_IDENTIFIER:
+            salted_hashes[feature_flag_key] = rollout_hash
+    return rollout_hash
+
+
+class BulkQueryConditions:
+    """
+    Evaluates the conditions that need the database for many matchers at once, with a single query for persons and
+    one per group type, rather than with a query per matcher.
+
+    The matchers must all evaluate the same flags, with the same overrides for the properties of the conditions that
+    aren't evaluated locally.
+    """
+
+    def __init__(self, team_id: int, matchers: List[FeatureFlagMatcher]):
+        self.team_id = team_id
+        self.matchers = matchers
+        self.failed_to_fetch_conditions = False
+
+    def for_distinct_id(self, distinct_id: str, groups: Dict[GroupTypeName, str]) -> Dict[str, bool]:
+        if self.failed_to_fetch_conditions:
+            raise DatabaseError("Failed to fetch conditions for feature flags previously, not trying again.")
+
+        try:
+            person_conditions, group_conditions = self._conditions
+        except Exception as err:
+            self.failed_to_fetch_conditions = True
+            raise err
+
+        all_conditions = {**person_conditions.get(distinct_id, {})}
+        for group_type, group_key in groups.items():
+            group_type_index = self._cache.group_types_to_indexes.get(group_type)
+            if group_type_index is not None:
+                all_conditions.update(group_conditions.get((group_type_index, group_key), {}))
+        return all_conditions
+
+    @property
+    def _cache(self) -> FlagsMatcherCache:
+        return self.matchers[0].cache
+
+    @cached_property
+    def _conditions(
+        self,
+    ) -> Tuple[Dict[str, Dict[str, bool]], Dict[Tuple[GroupTypeIndex, str], Dict[str, bool]]]:
+        matcher = self.matchers[0]
+        expressions: Dict[Optional[GroupTypeIndex], Dict[str, ExpressionWrapper]] = defaultdict(dict)
+        for feature_flag in matcher.feature_flags:
+            for index in range(len(feature_flag.conditions)):
+                expressions[feature_flag.aggregation_group_type_index][
+                    f"flag_{feature_flag.pk}_condition_{index}"
+                ] = matcher.condition_expression(feature_flag, index)
+
+        group_keys: Dict[GroupTypeIndex, Set[str]] = defaultdict(set)
+        for group_matcher in self.matchers:
+            for group_type, group_key in group_matcher.groups.items():
+                group_type_index = self._cache.group_types_to_indexes.get(group_type)
+                if group_type_index is not None:
+                    group_keys[group_type_index].add(group_key)
+
+        person_conditions: Dict[str, Dict[str, bool]] = {}
+        group_conditions: Dict[Tuple[GroupTypeIndex, str], Dict[str, bool]] = {}
+        with execute_with_timeout(BULK_FLAG_MATCHING_QUERY_TIMEOUT_MS):
+            if expressions.get(None):
+                person_query = (
+                    Person.objects.filter(
+                        team_id=self.team_id,
+                        persondistinctid__distinct_id__in=[
+                            person_matcher.distinct_id for person_matcher in self.matchers
+                        ],
+                        persondistinctid__team_id=self.team_id,
+                    )
+                    .annotate(**expressions[None])
+                    .values("persondistinctid__distinct_id", *expressions[None].keys())
+                )
+                for row in person_query:
+                    person_conditions[row.pop("persondistinctid__distinct_id")] = row
+
+            for group_type_index, keys in group_keys.items():
+                if not expressions.get(group_type_index):
+                    continue
+                group_query = (
+                    Group.objects.filter(team_id=self.team_id, group_type_index=group_type_index, group_key__in=keys)
+                    .annotate(**expressions[group_type_index])
+                    .values("group_key", *expressions[group_type_index].keys())
+                )
+                for row in group_query:
+                    group_conditions[(group_type_index, row.pop("group_key"))] = row
+
+        return person_conditions, group_conditions
+
+
 def hash_key_overrides(team_id: int, person_id: int) -> Dict[str, str]:
     feature_flag_to_key_overrides = {}
     with execute_with_timeout(FLAG_MATCHING_QUERY_TIMEOUT_MS):
@@ -531,6 +658,111 @@ def get_all_feature_flags(
     )
 
 
+def get_feature_flags_for_distinct_ids(
+    team_id: int,
+    distinct_ids: List[str],
+    groups: Dict[str, Dict[GroupTypeName, str]] = {},
+    property_value_overrides: Dict[str, Dict[str, Union[str, int]]] = {},
+    group_property_value_overrides: Dict[str, Dict[str, Union[str, int]]] = {},
+) -> Dict[str, FlagMatches]:
+    """
+    Evaluates all flags for each of `distinct_ids`, with the same results as `get_all_feature_flags` for each of them.
+    Like `groups`, `property_value_overrides` is keyed by distinct_id.
+
+    Persons, groups and hash key overrides are fetched for batches of distinct ids at once. Unlike
+    `get_all_feature_flags`, this never writes hash key overrides for experience continuity flags.
+    """
+    all_feature_flags = get_feature_flags_for_team_in_cache(team_id)
+    if all_feature_flags is None:
+        all_feature_flags = set_feature_flags_for_team_in_cache(team_id)
+
+    distinct_ids = list(dict.fromkeys(distinct_ids))
+    if not all_feature_flags:
+        return {distinct_id: ({}, {}, {}, False) for distinct_id in distinct_ids}
+
+    flags_have_experience_continuity_enabled = any(
+        feature_flag.ensure_experience_continuity for feature_flag in all_feature_flags
+    )
+    cache = FlagsMatcherCache(team_id)
+
+    results: Dict[str, FlagMatches] = {}
+    for start in range(0, len(distinct_ids), BULK_FLAG_MATCHING_BATCH_SIZE):
+        batch = distinct_ids[start : start + BULK_FLAG_MATCHING_BATCH_SIZE]
+
+        overrides: Dict[str, Dict[str, str]] = {}
+        skip_experience_continuity_flags = False
+        if flags_have_experience_continuity_enabled:
+            try:
+                overrides = hash_key_overrides_for_distinct_ids(team_id, batch)
+            except DatabaseError:
+                # Same as for a single distinct id, this sets 'errorsWhileComputingFlags' to True.
+                skip_experience_continuity_flags = True
+
+        matchers = [
+            FeatureFlagMatcher(
+                all_feature_flags,
+                distinct_id,
+                groups.get(distinct_id) or {},
+                cache,
+                overrides.get(distinct_id, {}),
+                property_value_overrides.get(distinct_id) or {},
+                group_property_value_overrides,
+                skip_experience_continuity_flags,
+            )
+            for distinct_id in batch
+        ]
+
+        # Property overrides are part of the condition expressions, so matchers are queried together when they share the
+        # overrides their queried conditions read. Usually that's all of them, whatever other properties they were given.
+        matchers_by_overrides: Dict[str, List[FeatureFlagMatcher]] = defaultdict(list)
+        for matcher in matchers:
+            matchers_by_overrides[_queried_overrides_key(matcher)].append(matcher)
+        for same_overrides_matchers in matchers_by_overrides.values():
+            bulk_query_conditions = BulkQueryConditions(team_id, same_overrides_matchers)
+            for matcher in same_overrides_matchers:
+                matcher.bulk_query_conditions = bulk_query_conditions
+
+        for matcher in matchers:
+            results[matcher.distinct_id] = matcher.get_matches()
+
+    return results
+
+
+def _queried_overrides_key(matcher: FeatureFlagMatcher) -> str:
+    "The person property overrides read by the conditions `matcher` can't evaluate locally, as a grouping key"
+    overrides = matcher.property_value_overrides
+    queried_overrides: Dict[str, Optional[List[Any]]] = {}
+    for feature_flag in matcher.feature_flags:
+        if feature_flag.aggregation_group_type_index is not None:
+            # Group property overrides are the same for all distinct ids
+            continue
+        for properties, compiled_condition in zip(feature_flag.condition_properties, feature_flag.compiled_conditions):
+            if not properties or compiled_condition.can_compute_locally(overrides):
+                continue
+            if any(property.type == "cohort" for property in properties):
+                # The overrides of the cohort's own properties are read too, and these aren't known without loading it
+                return json.dumps(overrides, sort_keys=True, default=str)
+            for key in compiled_condition.property_keys:
+                queried_overrides[key] = [overrides[key]] if key in overrides else None
+    return json.dumps(queried_overrides, sort_keys=True, default=str)
+
+
+def hash_key_overrides_for_distinct_ids(team_id: int, distinct_ids: List[str]) -> Dict[str, Dict[str, str]]:
+    with execute_with_timeout(BULK_FLAG_MATCHING_QUERY_TIMEOUT_MS):
+        person_ids = dict(
+            PersonDistinctId.objects.filter(distinct_id__in=distinct_ids, team_id=team_id).values_list(
+                "distinct_id", "person_id"
+            )
+        )
+        overrides_by_person_id: Dict[int, Dict[str, str]] = defaultdict(dict)
+        for person_id, feature_flag, override in FeatureFlagHashKeyOverride.objects.filter(
+            person_id__in=set(person_ids.values()), team=team_id
+        ).values_list("person_id", "feature_flag_key", "hash_key"):
+            overrides_by_person_id[person_id][feature_flag] = override
+
+    return {distinct_id: overrides_by_person_id.get(person_id, {}) for distinct_id, person_id in person_ids.items()}
+
+
 def set_feature_flag_hash_key_overrides(
     feature_flags: List[FeatureFlag], team_id: int, person_id: int, hash_key_override: str
 ) -> None:
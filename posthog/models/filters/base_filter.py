@@ -1,13 +1,13 @@
-import inspect
 import json
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Sequence
 
 from rest_framework import request
 
 from posthog.models.filters.mixins.common import BaseParamMixin
 from posthog.models.filters.mixins.hogql import HogQLParamMixin
+from posthog.models.filters.mixins.utils import cached_property, get_decorated_method_names
 from posthog.models.utils import sane_repr
-from posthog.utils import encode_get_request_params
+from posthog.utils import encode_get_request_params, generate_cache_key
 
 
 class BaseFilter(BaseParamMixin, HogQLParamMixin):
@@ -33,18 +33,32 @@ class BaseFilter(BaseParamMixin, HogQLParamMixin):
     def to_dict(self) -> Dict[str, Any]:
         ret = {}
 
-        for _, func in inspect.getmembers(self, inspect.ismethod):
-            if hasattr(func, "include_dict"):  # provided by @include_dict decorator
-                ret.update(func())
+        # provided by @include_dict decorator
+        for name in get_decorated_method_names(type(self), "include_dict"):
+            ret.update(getattr(self, name)())
 
         return ret
 
     def to_params(self) -> Dict[str, str]:
         return encode_get_request_params(data=self.to_dict())
 
-    def toJSON(self):
+    @cached_property
+    def _json(self) -> str:
         return json.dumps(self.to_dict(), default=lambda o: o.__dict__, sort_keys=True, indent=4)
 
+    def toJSON(self) -> str:
+        return self._json
+
+    def cache_key(self, team_id: int, *, namespace: Optional[str] = None, extra: Sequence[Any] = ()) -> str:
+        """
+        Returns the key to cache results computed for this filter under, e.g. `filter.cache_key(team.pk)`.
+
+        :TRICKY: The key is built from the indented JSON (rather than a compact one) to match the keys of results
+        already cached and the `filters_hash` stored for insights and dashboard tiles.
+        """
+        parts = [*([namespace] if namespace else []), self.toJSON(), str(team_id), *(str(part) for part in extra)]
+        return generate_cache_key("_".join(parts))
+
     def shallow_clone(self, overrides: Dict[str, Any]):
         "Clone the filter's data while sharing the HogQL context"
         return type(self)(data={**self._data, **overrides}, **{**self.kwargs, "hogql_context": self.hogql_context})
@@ -52,9 +66,9 @@ class BaseFilter(BaseParamMixin, HogQLParamMixin):
     def query_tags(self) -> Dict[str, Any]:
         ret = {}
 
-        for _, func in inspect.getmembers(self, inspect.ismethod):
-            if hasattr(func, "include_query_tags"):  # provided by @include_query_tags decorator
-                ret.update(func())
+        # provided by @include_query_tags decorator
+        for name in get_decorated_method_names(type(self), "include_query_tags"):
+            ret.update(getattr(self, name)())
 
         return ret
 
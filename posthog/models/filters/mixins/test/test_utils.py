@@ -0,0 +1,59 @@
+import gc
+import weakref
+from unittest.mock import patch
+
+from posthog.models import Filter
+from posthog.models.filters.mixins.utils import cached_property
+
+
+class Counter:
+    def __init__(self, value: int) -> None:
+        self.value = value
+        self.calls = 0
+
+    @cached_property
+    def doubled(self) -> int:
+        self.calls += 1
+        return self.value * 2
+
+
+def test_cached_property_is_computed_once_per_instance():
+    first, second = Counter(1), Counter(2)
+
+    for _ in range(3):
+        assert first.doubled == 2
+        assert second.doubled == 4
+
+    assert first.calls == 1
+    assert second.calls == 1
+
+
+def test_cached_property_does_not_keep_instances_alive():
+    counter = Counter(1)
+    assert counter.doubled == 2
+    reference = weakref.ref(counter)
+
+    del counter
+    gc.collect()
+
+    assert reference() is None
+
+
+def test_filter_properties_are_computed_once_across_interleaved_filters():
+    filters = [Filter(data={"interval": "day"}), Filter(data={"interval": "week"})]
+
+    with patch("posthog.models.filters.mixins.interval.IntervalMixin.interval.func", autospec=True) as interval:
+        interval.side_effect = lambda filter: filter._data["interval"]
+
+        for _ in range(3):
+            assert [filter.interval for filter in filters] == ["day", "week"]
+
+    assert interval.call_count == 2
+
+
+def test_hogql_context_is_kept_per_filter():
+    first, second = Filter(data={"events": []}), Filter(data={"events": []})
+
+    context = first.hogql_context
+    assert second.hogql_context is not context
+    assert first.hogql_context is context
@@ -1,13 +1,52 @@
+import inspect
 from functools import lru_cache
-from typing import Callable, Optional, TypeVar, Union
+from typing import (
+    Any,
+    Callable,
+    Generic,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+    overload,
+)
 
 from posthog.utils import str_to_bool
 
 T = TypeVar("T")
 
-# can't use cached_property directly from functools because of 3.7 compatibilty
-def cached_property(func: Callable[..., T]) -> T:
-    return property(lru_cache(maxsize=1)(func))  # type: ignore
+
+class cached_property(Generic[T]):
+    """
+    Computes the value once per instance and stores it on the instance, so it lives and dies with it.
+
+    Unlike `functools.cached_property` this doesn't take a lock shared by every instance of the class. Two threads
+    reading the same property of the same instance for the first time may both compute it, which is fine for the
+    pure functions of the instance's data this is used for.
+    """
+
+    def __init__(self, func: Callable[[Any], T]) -> None:
+        self.func = func
+        self.attrname = func.__name__
+        self.__doc__ = func.__doc__
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.attrname = name
+
+    @overload
+    def __get__(self, instance: None, owner: Optional[type] = None) -> "cached_property[T]":
+        ...
+
+    @overload
+    def __get__(self, instance: object, owner: Optional[type] = None) -> T:
+        ...
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        # Being a non-data descriptor, the stored value shadows this descriptor on every later lookup
+        value = instance.__dict__[self.attrname] = self.func(instance)
+        return value
 
 
 def include_dict(f):
@@ -26,6 +65,16 @@ def include_query_tags(f):
     return f
 
 
+@lru_cache(maxsize=None)
+def get_decorated_method_names(cls: type, marker: str) -> Tuple[str, ...]:
+    """
+    Returns the names of the methods of `cls` marked by `include_dict` or `include_query_tags`, in the same order
+    as `inspect.getmembers` lists them. Inspecting the class once is much cheaper than calling `inspect.getmembers`
+    on every instance, which also evaluates all of its properties.
+    """
+    return tuple(name for name, member in inspect.getmembers(cls, inspect.isfunction) if hasattr(member, marker))
+
+
 def process_bool(bool_to_test: Optional[Union[str, bool]]) -> bool:
     if isinstance(bool_to_test, bool):
         return bool_to_test
@@ -1,11 +1,13 @@
 import datetime
 import json
 from typing import Any, Callable, Dict, List, Optional, cast
+from unittest.mock import patch
 
 from django.db.models import Q
 
 from posthog.constants import FILTER_TEST_ACCOUNTS
 from posthog.models import Cohort, Filter, Person, Team
+from posthog.models.filters.mixins.utils import get_decorated_method_names
 from posthog.models.property import Property
 from posthog.queries.base import properties_to_Q, property_group_to_Q
 from posthog.test.base import (
@@ -15,6 +17,7 @@ from posthog.test.base import (
     flush_persons_and_events,
     snapshot_postgres_queries,
 )
+from posthog.utils import generate_cache_key
 
 
 class TestFilter(BaseTest):
@@ -58,6 +61,39 @@ class TestFilter(BaseTest):
             ],
         )
 
+    def test_to_dict_only_includes_decorated_methods(self):
+        filter = Filter(data={"events": [{"id": "$pageview"}], "client_query_id": "123"})
+
+        names = get_decorated_method_names(Filter, "include_dict")
+
+        self.assertIn("entities_to_dict", names)
+        self.assertNotIn("to_dict", names)
+        self.assertIn("client_query_tags", get_decorated_method_names(Filter, "include_query_tags"))
+        self.assertEqual(filter.query_tags()["client_query_id"], "123")
+        self.assertNotIn("client_query_id", filter.to_dict())
+
+    def test_cache_key(self):
+        filter = Filter(data={"events": [{"id": "$pageview"}], "date_from": "-7d"})
+
+        self.assertEqual(filter.cache_key(self.team.pk), generate_cache_key(f"{filter.toJSON()}_{self.team.pk}"))
+        self.assertEqual(
+            filter.cache_key(self.team.pk, namespace="experiment_funnel", extra=[42]),
+            generate_cache_key(f"experiment_funnel_{filter.toJSON()}_{self.team.pk}_42"),
+        )
+        self.assertEqual(
+            filter.cache_key(self.team.pk),
+            Filter(data={"date_from": "-7d", "events": [{"id": "$pageview"}]}).cache_key(self.team.pk),
+        )
+        self.assertNotEqual(filter.cache_key(self.team.pk), filter.cache_key(self.team.pk + 1))
+
+    def test_to_json_is_computed_once(self):
+        filter = Filter(data={"events": [{"id": "$pageview"}]})
+
+        with patch.object(Filter, "to_dict", autospec=True, side_effect=lambda filter: {"events": []}) as to_dict:
+            self.assertEqual(filter.toJSON(), filter.toJSON())
+
+        self.assertEqual(to_dict.call_count, 1)
+
     def test_simplify_test_accounts(self):
         self.team.test_account_filters = [
             {"key": "email", "value": "@posthog.com", "operator": "not_icontains", "type": "person"}
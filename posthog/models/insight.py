@@ -169,7 +169,7 @@ def generate_insight_cache_key(insight: Insight, dashboard: Optional[Dashboard])
             return generate_cache_key("{}_{}".format(q, insight.team_id))
 
         dashboard_insight_filter = get_filter(data=insight.dashboard_filters(dashboard=dashboard), team=insight.team)
-        candidate_filters_hash = generate_cache_key("{}_{}".format(dashboard_insight_filter.toJSON(), insight.team_id))
+        candidate_filters_hash = dashboard_insight_filter.cache_key(insight.team_id)
         return candidate_filters_hash
     except Exception as e:
         logger.error(
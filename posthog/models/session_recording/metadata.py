@@ -69,3 +69,19 @@ class PersistedRecordingV1(TypedDict):
     distinct_id: str
     segments: List[RecordingSegment]
     start_and_end_times_by_window_id: Dict[WindowId, RecordingSegment]
+
+
+class PersistedSnapshotDataPart(TypedDict):
+    # Byte range of an independently gzipped `snapshot_data_by_window_id` JSON object within the snapshot data file
+    offset: int
+    length: int
+    window_ids: List[WindowId]
+
+
+class PersistedRecordingV2(TypedDict):
+    version: str  # "2023-03-01"
+    distinct_id: str
+    segments: List[RecordingSegment]
+    start_and_end_times_by_window_id: Dict[WindowId, RecordingSegment]
+    snapshot_data_path: str
+    snapshot_data_parts: List[PersistedSnapshotDataPart]
@@ -1,4 +1,4 @@
-from typing import Any, List, Optional
+from typing import TYPE_CHECKING, Any, List, Optional
 
 from django.db import models
 from django.db.models import Count
@@ -16,6 +16,9 @@ from posthog.models.session_recording_event.session_recording_event import Sessi
 from posthog.models.team.team import Team
 from posthog.models.utils import UUIDModel
 
+if TYPE_CHECKING:
+    from posthog.session_recordings.session_recording_helpers import LazyRecordingData
+
 
 class SessionRecording(UUIDModel):
     class Meta:
@@ -100,6 +103,40 @@ class SessionRecording(UUIDModel):
 
             self._snapshots = snapshots
 
+    def load_persisted_snapshots_page(self, part_index: int, window_id=None) -> bool:
+        """
+        For recordings in object storage whose snapshot data is stored in parts, only loads the `part_index`-th part.
+        Returns False if the recording's snapshots can't be loaded a part at a time.
+        """
+        if not self.object_storage_path:
+            return False
+
+        try:
+            from ee.models.session_recording_extensions import load_persisted_snapshot_data_page
+        except ImportError:
+            return False
+
+        snapshots = load_persisted_snapshot_data_page(self, part_index, window_id)
+        if snapshots is None:
+            return False
+
+        self._snapshots = snapshots
+        return True
+
+    def load_lazy_snapshots(self, limit=20, offset=0, window_id=None) -> Optional["LazyRecordingData"]:
+        """
+        Like `load_snapshots`, but for Clickhouse backed recordings the page of snapshots is only decompressed once
+        it is iterated. Recordings in object storage are already decompressed, so this returns None for them.
+        """
+        from posthog.queries.session_recordings.session_recording_events import SessionRecordingEvents
+
+        if self.object_storage_path:
+            return None
+
+        return SessionRecordingEvents(
+            team=self.team, session_recording_id=self.session_id, recording_start_time=self.start_time
+        ).get_lazy_snapshots(limit, offset, window_id)
+
     def load_object_data(self) -> None:
         try:
             from ee.models.session_recording_extensions import load_persisted_recording
@@ -117,10 +154,13 @@ class SessionRecording(UUIDModel):
             "segments": data["segments"],
         }
 
-        self._snapshots = {
-            "has_next": False,
-            "snapshot_data_by_window_id": data["snapshot_data_by_window_id"],
-        }
+        # Only recordings persisted before snapshot data was split into parts have it inline, later ones are read a part
+        # at a time, see `load_persisted_snapshots_page`
+        if "snapshot_data_by_window_id" in data:
+            self._snapshots = {
+                "has_next": False,
+                "snapshot_data_by_window_id": data["snapshot_data_by_window_id"],
+            }
 
     # S3 / Clickhouse backed fields
     @property
@@ -301,12 +301,18 @@ class Team(UUIDClassicModel):
 
 @mutable_receiver(post_save, sender=Team)
 def put_team_in_cache_on_save(sender, instance: Team, **kwargs):
+    from posthog.api.utils import invalidate_event_ingestion_context
+
     set_team_in_cache(instance.api_token, instance)
+    invalidate_event_ingestion_context(instance.api_token, instance.pk)
 
 
 @mutable_receiver(post_delete, sender=Team)
 def delete_team_in_cache_on_delete(sender, instance: Team, **kwargs):
+    from posthog.api.utils import invalidate_event_ingestion_context
+
     set_team_in_cache(instance.api_token, None)
+    invalidate_event_ingestion_context(instance.api_token, instance.pk)
 
 
 def groups_on_events_querying_enabled():
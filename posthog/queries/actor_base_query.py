@@ -120,10 +120,10 @@ class ActorBaseQuery:
             and session_id in %(session_ids)s
         """
         params = {"team_id": self._team.pk, "session_ids": list(session_ids)}
-        raw_result = insight_sync_execute(
-            query, params, query_type="actors_session_ids_with_recordings", filter=self._filter
+        session_id_column = insight_sync_execute(
+            query, params, query_type="actors_session_ids_with_recordings", filter=self._filter, columnar=True
         )
-        return {row[0] for row in raw_result}
+        return set(session_id_column[0]) if session_id_column else set()
 
     def add_matched_recordings_to_serialized_actors(
         self, serialized_actors: Union[List[SerializedGroup], List[SerializedPerson]], raw_result
@@ -86,92 +86,107 @@ def handle_compare(filter, func: Callable, team: Team, **kwargs) -> List:
 def match_property(property: Property, override_property_values: Dict[str, Any]) -> bool:
     # only looks for matches where key exists in override_property_values
     # doesn't support operator is_not_set
+    return compile_property(property)(override_property_values)
 
-    if property.key not in override_property_values:
-        raise ValidationError("can't match properties without an override value")
 
-    if property.operator == "is_not_set":
-        raise ValidationError("can't match properties with operator is_not_set")
+PropertyPredicate = Callable[[Dict[str, Any]], bool]
+
+
+def compile_property(property: Property) -> PropertyPredicate:
+    """
+    Returns a predicate matching `property` against a dict of property values, like `match_property` does.
 
+    Everything that only depends on the property (parsing the operator, compiling regexes, parsing dates) is done once
+    here, so the predicate can be kept around and evaluated many times cheaply.
+    """
     key = property.key
+    match_value = _compile_value_matcher(property)
+
+    def predicate(override_property_values: Dict[str, Any]) -> bool:
+        if key not in override_property_values:
+            raise ValidationError("can't match properties without an override value")
+        return match_value(override_property_values[key])
+
+    return predicate
+
+
+def _compile_value_matcher(property: Property) -> Callable[[Any], bool]:
     operator = property.operator or "exact"
     value = property.value
-    override_value = override_property_values[key]
+
+    if operator == "is_not_set":
+
+        def is_not_set(override_value: Any) -> bool:
+            raise ValidationError("can't match properties with operator is_not_set")
+
+        return is_not_set
 
     if operator == "exact":
         if isinstance(value, list):
-            return override_value in value
-        return value == override_value
+            return lambda override_value: override_value in value
+        return lambda override_value: value == override_value
 
     if operator == "is_not":
         if isinstance(value, list):
-            return override_value not in value
-        return value != override_value
+            return lambda override_value: override_value not in value
+        return lambda override_value: value != override_value
 
     if operator == "is_set":
-        return key in override_property_values
-
-    if operator == "icontains":
-        return str(value).lower() in str(override_value).lower()
+        return lambda override_value: True
 
-    if operator == "not_icontains":
-        return str(value).lower() not in str(override_value).lower()
+    if operator in ("icontains", "not_icontains"):
+        lowercase_value = str(value).lower()
+        if operator == "icontains":
+            return lambda override_value: lowercase_value in str(override_value).lower()
+        return lambda override_value: lowercase_value not in str(override_value).lower()
 
     if operator in ("regex", "not_regex"):
         try:
             pattern = re.compile(str(value))
-            match = pattern.search(str(override_value))
-
-            if operator == "regex":
-                return match is not None
-            else:
-                return match is None
-
         except re.error:
-            return False
+            return lambda override_value: False
+
+        if operator == "regex":
+            return lambda override_value: pattern.search(str(override_value)) is not None
+        return lambda override_value: pattern.search(str(override_value)) is None
 
     if operator == "gt":
-        return type(override_value) == type(value) and override_value > value
+        return lambda override_value: type(override_value) is type(value) and override_value > value
 
     if operator == "gte":
-        return type(override_value) == type(value) and override_value >= value
+        return lambda override_value: type(override_value) is type(value) and override_value >= value
 
     if operator == "lt":
-        return type(override_value) == type(value) and override_value < value
+        return lambda override_value: type(override_value) is type(value) and override_value < value
 
     if operator == "lte":
-        return type(override_value) == type(value) and override_value <= value
+        return lambda override_value: type(override_value) is type(value) and override_value <= value
 
     if operator in ["is_date_before", "is_date_after"]:
         try:
-            parsed_date = parser.parse(str(value))
-            parsed_date = convert_to_datetime_aware(parsed_date)
+            parsed_date = convert_to_datetime_aware(parser.parse(str(value)))
         except Exception:
+            return lambda override_value: False
+
+        is_before = operator == "is_date_before"
+
+        def match_date(override_value: Any) -> bool:
+            if isinstance(override_value, datetime.datetime):
+                override_date = convert_to_datetime_aware(override_value)
+                return override_date < parsed_date if is_before else override_date > parsed_date
+            elif isinstance(override_value, datetime.date):
+                return override_value < parsed_date.date() if is_before else override_value > parsed_date.date()
+            elif isinstance(override_value, str):
+                try:
+                    override_date = convert_to_datetime_aware(parser.parse(override_value))
+                except Exception:
+                    return False
+                return override_date < parsed_date if is_before else override_date > parsed_date
             return False
 
-        if isinstance(override_value, datetime.datetime):
-            override_date = convert_to_datetime_aware(override_value)
-            if operator == "is_date_before":
-                return override_date < parsed_date
-            else:
-                return override_date > parsed_date
-        elif isinstance(override_value, datetime.date):
-            if operator == "is_date_before":
-                return override_value < parsed_date.date()
-            else:
-                return override_value > parsed_date.date()
-        elif isinstance(override_value, str):
-            try:
-                override_date = parser.parse(override_value)
-                override_date = convert_to_datetime_aware(override_date)
-                if operator == "is_date_before":
-                    return override_date < parsed_date
-                else:
-                    return override_date > parsed_date
-            except Exception:
-                return False
+        return match_date
 
-    return False
+    return lambda override_value: False
 
 
 def empty_or_null_with_value_q(
@@ -1,6 +1,7 @@
 import json
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple, cast
+from collections import Counter
+from typing import Dict, Generator, List, Optional, Tuple, cast
 
 from statshog.defaults.django import statsd
 
@@ -16,9 +17,11 @@ from posthog.models.session_recording.metadata import (
     WindowId,
 )
 from posthog.session_recordings.session_recording_helpers import (
+    LazyRecordingData,
     decompress_chunked_snapshot_data,
     generate_inactive_segments_for_range,
     get_active_segments_from_event_list,
+    lazy_chunked_snapshot_data,
     parse_snapshot_timestamp,
 )
 from posthog.utils import flatten
@@ -45,6 +48,19 @@ class SessionRecordingEvents:
         {limit_param}
     """
 
+    # Keyset paginated over (timestamp, uuid), so that pages don't overlap even if rows share a timestamp
+    _recording_snapshot_page_query = """
+        SELECT window_id, snapshot_data, timestamp, uuid
+        FROM session_recording_events
+        PREWHERE
+            team_id = %(team_id)s
+            AND session_id = %(session_id)s
+            {date_clause}
+        {after_clause}
+        ORDER BY timestamp, uuid
+        LIMIT %(limit)s
+    """
+
     def get_recording_snapshot_date_clause(self) -> Tuple[str, Dict]:
         if self._recording_start_time:
             # If we can, we want to limit the time range being queried.
@@ -94,13 +110,16 @@ class SessionRecordingEvents:
         )
         return bool(response)
 
-    def get_snapshots(self, limit, offset) -> Optional[DecompressedRecordingData]:
-        all_snapshots = [
+    def _get_all_snapshots(self) -> List[SnapshotDataTaggedWithWindowId]:
+        return [
             SnapshotDataTaggedWithWindowId(
                 window_id=recording_snapshot["window_id"], snapshot_data=recording_snapshot["snapshot_data"]
             )
             for recording_snapshot in self._query_recording_snapshots(include_snapshots=True)
         ]
+
+    def get_snapshots(self, limit, offset) -> Optional[DecompressedRecordingData]:
+        all_snapshots = self._get_all_snapshots()
         decompressed = decompress_chunked_snapshot_data(
             self._team.pk, self._session_recording_id, all_snapshots, limit, offset
         )
@@ -109,6 +128,61 @@ class SessionRecordingEvents:
             return None
         return decompressed
 
+    def get_lazy_snapshots(self, limit, offset, window_id: Optional[WindowId] = None) -> Optional[LazyRecordingData]:
+        lazy_data = lazy_chunked_snapshot_data(
+            self._team.pk, self._session_recording_id, self._get_all_snapshots(), limit, offset, window_id
+        )
+
+        if lazy_data.chunk_groups_by_window_id == {}:
+            return None
+        return lazy_data
+
+    def iter_lazy_snapshot_pages(self, rows_per_page: int) -> Generator[LazyRecordingData, None, None]:
+        """
+        Like `get_lazy_snapshots` for the whole recording, but reads at most `rows_per_page` rows from Clickhouse at a
+        time. Chunk groups that continue on the next page of rows are held back until they are complete.
+        """
+        date_clause, date_clause_params = self.get_recording_snapshot_date_clause()
+        pending_snapshots: List[SnapshotDataTaggedWithWindowId] = []
+        after: Optional[Tuple[datetime, str]] = None
+
+        while True:
+            params = {
+                "team_id": self._team.id,
+                "session_id": self._session_recording_id,
+                "limit": rows_per_page,
+                **date_clause_params,
+            }
+            after_clause = ""
+            if after is not None:
+                after_clause = (
+                    "WHERE (timestamp, uuid) > (toDateTime64(%(after_timestamp)s, 6, 'UTC'), toUUID(%(after_uuid)s))"
+                )
+                params["after_timestamp"] = after[0].isoformat().replace("+00:00", "")
+                params["after_uuid"] = after[1]
+
+            rows = sync_execute(
+                self._recording_snapshot_page_query.format(date_clause=date_clause, after_clause=after_clause), params
+            )
+            is_last_page = len(rows) < rows_per_page
+            if rows:
+                after = (rows[-1][2], str(rows[-1][3]))
+
+            snapshots = pending_snapshots + [
+                SnapshotDataTaggedWithWindowId(window_id=row[0], snapshot_data=json.loads(row[1])) for row in rows
+            ]
+            if is_last_page:
+                complete_snapshots, pending_snapshots = snapshots, []
+            else:
+                complete_snapshots, pending_snapshots = _split_incomplete_chunk_groups(snapshots)
+
+            lazy_data = lazy_chunked_snapshot_data(self._team.pk, self._session_recording_id, complete_snapshots)
+            if lazy_data.chunk_groups_by_window_id:
+                yield lazy_data
+
+            if is_last_page:
+                return
+
     def get_metadata(self) -> Optional[RecordingMetadata]:
         snapshots = self._query_recording_snapshots(include_snapshots=False)
 
@@ -290,3 +364,20 @@ class SessionRecordingEvents:
             keypress_count=keypress_count,
             urls=urls,
         )
+
+
+def _split_incomplete_chunk_groups(
+    snapshots: List[SnapshotDataTaggedWithWindowId],
+) -> Tuple[List[SnapshotDataTaggedWithWindowId], List[SnapshotDataTaggedWithWindowId]]:
+    chunk_counts = Counter(
+        snapshot["snapshot_data"]["chunk_id"] for snapshot in snapshots if "chunk_id" in snapshot["snapshot_data"]
+    )
+    complete: List[SnapshotDataTaggedWithWindowId] = []
+    incomplete: List[SnapshotDataTaggedWithWindowId] = []
+    for snapshot in snapshots:
+        snapshot_data = snapshot["snapshot_data"]
+        if "chunk_id" in snapshot_data and chunk_counts[snapshot_data["chunk_id"]] < snapshot_data["chunk_count"]:
+            incomplete.append(snapshot)
+        else:
+            complete.append(snapshot)
+    return complete, incomplete
@@ -8,7 +8,7 @@ from rest_framework.exceptions import ValidationError
 
 from posthog.models.filters.path_filter import PathFilter
 from posthog.models.property.property import Property
-from posthog.queries.base import match_property
+from posthog.queries.base import compile_property, match_property
 from posthog.test.base import APIBaseTest
 
 
@@ -223,3 +223,25 @@ class TestMatchProperties(TestCase):
         self.assertTrue(match_property(property_d, {"key": "2022-04-05 12:34:11 CET"}))
 
         self.assertFalse(match_property(property_d, {"key": "2022-04-05 12:34:13 CET"}))
+
+    def test_compiled_property_is_reusable(self):
+        pattern = re.compile(r"\.com$")
+        with patch("re.compile", return_value=pattern) as mock_compile:
+            predicate = compile_property(Property(key="key", value=r"\.com$", operator="regex"))
+
+            self.assertTrue(predicate({"key": "value.com"}))
+            self.assertFalse(predicate({"key": "value.org"}))
+            self.assertTrue(predicate({"key": "other.com", "other_key": 1}))
+
+        mock_compile.assert_called_once_with(r"\.com$")
+
+        with patch("posthog.queries.base.parser.parse", wraps=parser.parse) as mock_parse:
+            predicate = compile_property(Property(key="key", value="2022-05-01", operator="is_date_before"))
+
+            self.assertTrue(predicate({"key": datetime.date(2022, 4, 30)}))
+            self.assertFalse(predicate({"key": datetime.date(2022, 5, 30)}))
+
+        mock_parse.assert_called_once_with("2022-05-01")
+
+        with self.assertRaises(ValidationError):
+            predicate({"other_key": "value"})
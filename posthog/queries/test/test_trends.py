@@ -5,8 +5,6 @@ from unittest.mock import patch
 from urllib.parse import parse_qsl, urlparse
 
 import pytz
-from django.conf import settings
-from django.core.cache import cache
 from django.utils import timezone
 from freezegun import freeze_time
 from rest_framework.exceptions import ValidationError
@@ -30,7 +28,7 @@ from posthog.models import (
     Person,
 )
 from posthog.models.group.util import create_group
-from posthog.models.instance_setting import get_instance_setting, override_instance_config, set_instance_setting
+from posthog.models.instance_setting import get_instance_setting, override_instance_config
 from posthog.models.person.util import create_person_distinct_id
 from posthog.queries.trends.trends import Trends
 from posthog.test.base import (
@@ -44,7 +42,6 @@ from posthog.test.base import (
     snapshot_clickhouse_queries,
 )
 from posthog.test.test_journeys import journeys_for
-from posthog.utils import generate_cache_key
 
 
 def breakdown_label(entity: Entity, value: Union[str, int]) -> Dict[str, Optional[Union[str, int]]]:
@@ -6264,204 +6261,3 @@ class TestTrends(ClickhouseTestMixin, APIBaseTest):
             res = self._get_trend_people(filter, entity)
 
             self.assertEqual(res[0]["distinct_ids"], ["person1"])
-
-
-class TestTrendUtils(ClickhouseTestMixin, APIBaseTest):
-    maxDiff = None
-
-    def test_get_cached_result_no_cache(self):
-        set_instance_setting("STRICT_CACHING_TEAMS", "all")
-
-        filter = Filter(
-            data={
-                "date_to": "2020-11-01 10:26:00",
-                "events": [{"id": "sign up", "name": "sign up"}],
-                "interval": "hour",
-            },
-            team=self.team,
-        )
-
-        is_present = Trends().get_cached_result(filter, self.team)
-        self.assertIsNone(is_present)
-
-    def test_get_cached_result_bad_cache(self):
-        set_instance_setting("STRICT_CACHING_TEAMS", "all")
-
-        fake_cached = {
-            "result": [{"days": ["2020-11-01 05:20:00", "2020-11-01 10:22:00", "2020-11-01 10:25:00"], "data": []}]
-        }
-
-        filter = Filter(
-            data={
-                "date_to": "2020-11-01 10:26:00",
-                "events": [{"id": "sign up", "name": "sign up"}],
-                "interval": "hour",
-            },
-            team=self.team,
-        )
-        cache_key = generate_cache_key(f"{filter.toJSON()}_{self.team.pk}")
-        cache.set(cache_key, fake_cached, settings.CACHED_RESULTS_TTL)
-
-        is_present = Trends().get_cached_result(filter, self.team)
-        self.assertIsNone(is_present)
-
-    def test_get_cached_result_hour(self):
-        set_instance_setting("STRICT_CACHING_TEAMS", "all")
-
-        fake_cached = {
-            "result": [
-                {"days": ["2020-11-01 05:20:00", "2020-11-01 10:22:00", "2020-11-01 10:25:00"], "data": [0.0, 0.0, 0.0]}
-            ]
-        }
-
-        filter = Filter(
-            data={
-                "date_to": "2020-11-01 10:26:00",
-                "events": [{"id": "sign up", "name": "sign up"}],
-                "interval": "hour",
-            },
-            team=self.team,
-        )
-        cache_key = generate_cache_key(f"{filter.toJSON()}_{self.team.pk}")
-        cache.set(cache_key, fake_cached, settings.CACHED_RESULTS_TTL)
-
-        res = Trends().get_cached_result(filter, self.team)
-        self.assertIsNotNone(res)
-
-        filter = Filter(
-            data={
-                "date_to": "2020-11-02 05:26:00",
-                "events": [{"id": "sign up", "name": "sign up"}],
-                "interval": "hour",
-            },
-            team=self.team,
-        )
-
-        res = Trends().get_cached_result(filter, self.team)
-        self.assertIsNone(res)
-
-    def test_get_cached_result_day(self):
-        set_instance_setting("STRICT_CACHING_TEAMS", "all")
-        fake_cached = {"result": [{"days": ["2020-01-02", "2020-01-03", "2020-01-04"], "data": [0.0, 0.0, 0.0]}]}
-        filter = Filter(
-            data={"date_from": "2020-01-02", "date_to": "2020-01-04", "events": [{"id": "sign up", "name": "sign up"}]},
-            team=self.team,
-        )
-        cache_key = generate_cache_key(f"{filter.toJSON()}_{self.team.pk}")
-        cache.set(cache_key, fake_cached, settings.CACHED_RESULTS_TTL)
-
-        res = Trends().get_cached_result(filter, self.team)
-        self.assertTrue(res)
-
-        fake_cached = {"result": [{"days": ["2020-01-01", "2020-01-02", "2020-01-03"], "data": [0.0, 0.0, 0.0]}]}
-
-        cache.set(cache_key, fake_cached, settings.CACHED_RESULTS_TTL)
-
-        res = Trends().get_cached_result(filter, self.team)
-        self.assertFalse(res)
-
-    def test_get_cached_result_week(self):
-        set_instance_setting("STRICT_CACHING_TEAMS", "all")
-
-        fake_cached = {"result": [{"days": ["2020-11-01", "2020-11-08", "2020-11-15"], "data": [0.0, 0.0, 0.0]}]}
-
-        filter = Filter(
-            data={"date_to": "2020-11-16", "events": [{"id": "sign up", "name": "sign up"}], "interval": "week"},
-            team=self.team,
-        )
-        cache_key = generate_cache_key(f"{filter.toJSON()}_{self.team.pk}")
-        cache.set(cache_key, fake_cached, settings.CACHED_RESULTS_TTL)
-
-        res = Trends().get_cached_result(filter, self.team)
-        self.assertTrue(res)
-
-        filter = Filter(
-            data={"date_to": "2020-11-23", "events": [{"id": "sign up", "name": "sign up"}], "interval": "week"},
-            team=self.team,
-        )
-
-        res = Trends().get_cached_result(filter, self.team)
-        self.assertFalse(res)
-
-    def test_get_cached_result_month(self):
-        set_instance_setting("STRICT_CACHING_TEAMS", "all")
-
-        fake_cached = {"result": [{"days": ["2020-09-01", "2020-10-01", "2020-11-01"], "data": [0.0, 0.0, 0.0]}]}
-
-        filter = Filter(
-            data={"date_to": "2020-11-16", "events": [{"id": "sign up", "name": "sign up"}], "interval": "month"},
-            team=self.team,
-        )
-        cache_key = generate_cache_key(f"{filter.toJSON()}_{self.team.pk}")
-        cache.set(cache_key, fake_cached, settings.CACHED_RESULTS_TTL)
-
-        res = Trends().get_cached_result(filter, self.team)
-        self.assertTrue(res)
-
-        filter = Filter(
-            data={"date_to": "2020-12-01", "events": [{"id": "sign up", "name": "sign up"}], "interval": "week"},
-            team=self.team,
-        )
-
-        res = Trends().get_cached_result(filter, self.team)
-        self.assertFalse(res)
-
-    def test_merge_result(self):
-        set_instance_setting("STRICT_CACHING_TEAMS", "all")
-        fake_cached = {
-            "sign up - Chrome_0": {
-                "label": "sign up - Chrome",
-                "days": ["2020-01-02", "2020-01-03", "2020-01-04"],
-                "data": [23.0, 15.0, 1.0],
-            }
-        }
-        filter = Filter(
-            data={"date_from": "2020-01-02", "date_to": "2020-01-04", "events": [{"id": "sign up", "name": "sign up"}]},
-            team=self.team,
-        )
-        result = [{"label": "sign up - Chrome", "data": [15.0, 12.0]}]
-
-        merged_result, _ = Trends().merge_results(result, fake_cached, 0, filter, self.team)
-        self.assertEqual(merged_result[0]["data"], [23.0, 15.0, 12.0])
-
-    def test_merge_result_no_cache(self):
-
-        filter = Filter(
-            data={"date_from": "2020-01-02", "date_to": "2020-01-04", "events": [{"id": "sign up", "name": "sign up"}]},
-            team=self.team,
-        )
-
-        result = [{"label": "sign up - Chrome", "data": [15.0, 12.0]}]
-
-        merged_result, _ = Trends().merge_results(result, {}, 0, filter, self.team)
-
-        self.assertEqual(merged_result[0]["data"], [15.0, 12.0])
-
-    def test_merge_result_multiple(self):
-        set_instance_setting("STRICT_CACHING_TEAMS", "all")
-        fake_cached = {
-            "sign up - Chrome_0": {
-                "label": "sign up - Chrome",
-                "days": ["2020-01-02", "2020-01-03", "2020-01-04"],
-                "data": [23.0, 15.0, 1.0],
-            },
-            "sign up - Safari_0": {
-                "label": "sign up - Safari",
-                "days": ["2020-01-02", "2020-01-03", "2020-01-04"],
-                "data": [12.0, 11.0, 8.0],
-            },
-        }
-        filter = Filter(
-            data={"date_from": "2020-01-02", "date_to": "2020-01-04", "events": [{"id": "sign up", "name": "sign up"}]},
-            team=self.team,
-        )
-
-        result = [
-            {"label": "sign up - Chrome", "data": [15.0, 12.0]},
-            {"label": "sign up - Safari", "data": [15.0, 9.0]},
-        ]
-
-        merged_result, _ = Trends().merge_results(result, fake_cached, 0, filter, self.team)
-
-        self.assertEqual(merged_result[0]["data"], [23.0, 15.0, 12.0])
-        self.assertEqual(merged_result[1]["data"], [12.0, 11.0, 9.0])
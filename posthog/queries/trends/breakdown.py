@@ -76,6 +76,7 @@ class TrendsBreakdown:
         team: Team,
         column_optimizer: Optional[ColumnOptimizer] = None,
         person_on_events_mode: PersonOnEventsMode = PersonOnEventsMode.DISABLED,
+        breakdown_values: Optional[List[Any]] = None,
     ):
         self.entity = entity
         self.filter = filter
@@ -84,6 +85,8 @@ class TrendsBreakdown:
         self.params: Dict[str, Any] = {"team_id": team.pk}
         self.column_optimizer = column_optimizer or ColumnOptimizer(self.filter, self.team_id)
         self.person_on_events_mode = person_on_events_mode
+        # Breakdown values to use instead of the top values in the date range, e.g. when refreshing incrementally
+        self.breakdown_values = breakdown_values
 
     @cached_property
     def _person_properties_mode(self) -> PersonPropertiesMode:
@@ -99,6 +102,17 @@ class TrendsBreakdown:
             return "e.distinct_id"
         return f"{'e' if self._person_properties_mode == PersonPropertiesMode.DIRECT_ON_EVENTS else 'pdi'}.person_id"
 
+    @cached_property
+    def _math(self) -> Tuple[str, str, Dict[str, Any]]:
+        return process_math(
+            self.entity,
+            self.team,
+            event_table_alias="e",
+            person_id_alias=f"person_id"
+            if self.person_on_events_mode != PersonOnEventsMode.DISABLED
+            else f"{self.DISTINCT_ID_TABLE_ALIAS}.person_id",
+        )
+
     @cached_property
     def _props_to_filter(self) -> Tuple[str, Dict]:
         props_to_filter = self.filter.property_groups.combine_property_group(
@@ -135,14 +149,7 @@ class TrendsBreakdown:
 
         prop_filters, prop_filter_params = self._props_to_filter
 
-        aggregate_operation, _, math_params = process_math(
-            self.entity,
-            self.team,
-            event_table_alias="e",
-            person_id_alias=f"person_id"
-            if self.person_on_events_mode != PersonOnEventsMode.DISABLED
-            else f"{self.DISTINCT_ID_TABLE_ALIAS}.person_id",
-        )
+        aggregate_operation, _, math_params = self._math
 
         action_query = ""
         action_params: Dict = {}
@@ -184,14 +191,7 @@ class TrendsBreakdown:
         if self.filter.breakdown_type == "cohort":
             _params, breakdown_filter, _breakdown_filter_params, breakdown_value = self._breakdown_cohort_params()
         else:
-            aggregate_operation_for_breakdown_init = (
-                "count(*)"
-                if self.entity.math == "dau" or self.entity.math in COUNT_PER_ACTOR_MATH_FUNCTIONS
-                else aggregate_operation
-            )
-            _params, breakdown_filter, _breakdown_filter_params, breakdown_value = self._breakdown_prop_params(
-                aggregate_operation_for_breakdown_init, math_params
-            )
+            _params, breakdown_filter, _breakdown_filter_params, breakdown_value = self._breakdown_prop_params()
 
         if len(_params["values"]) == 0:
             # If there are no breakdown values, we are sure that there's no relevant events, so instead of adjusting
@@ -388,17 +388,27 @@ class TrendsBreakdown:
 
         return params, breakdown_filter, breakdown_filter_params, "value"
 
-    def _breakdown_prop_params(self, aggregate_operation: str, math_params: Dict):
-        values_arr = get_breakdown_prop_values(
+    def get_top_breakdown_values(self) -> List[Any]:
+        """Returns the top breakdown values in the date range, i.e. the series of the query without `breakdown_values`."""
+        aggregate_operation, _, math_params = self._math
+        aggregate_operation_for_breakdown_init = (
+            "count(*)"
+            if self.entity.math == "dau" or self.entity.math in COUNT_PER_ACTOR_MATH_FUNCTIONS
+            else aggregate_operation
+        )
+        return get_breakdown_prop_values(
             self.filter,
             self.entity,
-            aggregate_operation,
+            aggregate_operation_for_breakdown_init,
             self.team,
             extra_params=math_params,
             column_optimizer=self.column_optimizer,
             person_properties_mode=self._person_properties_mode,
         )
 
+    def _breakdown_prop_params(self):
+        values_arr = self.breakdown_values if self.breakdown_values is not None else self.get_top_breakdown_values()
+
         # :TRICKY: We only support string breakdown for event/person properties
         assert isinstance(self.filter.breakdown, str)
 
@@ -0,0 +1,272 @@
+"""
+Incremental refresh of trends time series.
+
+Every interval of a time series trend is computed independently of the others, so once an interval is over (and late
+events had a chance to arrive) its value doesn't change. For teams with strict caching enabled we keep the per-interval
+results of each series around, and on refresh only query ClickHouse for the intervals that weren't complete yet.
+
+The results of all series of an insight are kept under one cache key, so that they are loaded and saved once per
+insight rather than once per series.
+"""
+
+import datetime
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import pytz
+from dateutil import parser
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from posthog.constants import (
+    NON_TIME_SERIES_DISPLAY_TYPES,
+    TRENDS_CUMULATIVE,
+    TRENDS_LIFECYCLE,
+    UNIQUE_GROUPS,
+    UNIQUE_USERS,
+)
+from posthog.models.entity import Entity
+from posthog.models.filters import Filter
+from posthog.models.instance_setting import get_instance_setting
+from posthog.models.team import Team
+from posthog.queries.query_date_range import QueryDateRange
+from posthog.queries.trends.breakdown import TrendsBreakdown
+from posthog.utils import get_safe_cache
+
+INCREMENTAL_STATE_VERSION = 2
+
+INTERVAL_DELTAS = {
+    "hour": relativedelta(hours=1),
+    "day": relativedelta(days=1),
+    "week": relativedelta(weeks=1),
+    "month": relativedelta(months=1),
+}
+
+
+@dataclass
+class IncrementalState:
+    # Where the per-interval results of the insight are kept, None if the team doesn't use strict caching
+    cache_key: Optional[str] = None
+    computed_at: Optional[datetime.datetime] = None
+    # Cached series by entity index, and the series computed since loading that are to be saved
+    cached: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    fresh: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+
+@dataclass
+class IncrementalRefresh:
+    # The filter to actually query with, covering only the intervals that have to be computed again
+    query_filter: Filter
+    # The state the results are recorded in, None if the query can't be refreshed incrementally
+    state: Optional[IncrementalState] = None
+    entity_key: str = ""
+    # Cached intervals that are reused as they are, and the cached series restricted to those intervals
+    reused_days: List[str] = field(default_factory=list)
+    reused_series: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    # Breakdown values to query, so that the refreshed intervals have the same series as the cached ones
+    breakdown_values: Optional[List[Any]] = None
+
+
+def supports_incremental_refresh(filter: Filter, team: Team, entity: Entity) -> bool:
+    if not team.strict_caching_enabled:
+        return False
+
+    return not (
+        filter.display in NON_TIME_SERIES_DISPLAY_TYPES
+        or filter.shown_as == TRENDS_LIFECYCLE
+        or filter.formula
+        # The value of these intervals depends on the intervals before them
+        or filter.smoothing_intervals > 1
+        or (filter.display == TRENDS_CUMULATIVE and entity.math in (UNIQUE_USERS, UNIQUE_GROUPS))
+        # Histogram buckets are computed from the whole date range
+        or (filter.breakdown and filter.using_histogram)
+        # Explicit dates aren't rounded, so the first interval of the range may only be partially counted
+        or filter.use_explicit_dates
+        or filter.interval not in INTERVAL_DELTAS
+    )
+
+
+def load_incremental_state(
+    filter: Filter, team: Team, loaded: Optional[Dict[str, IncrementalState]] = None
+) -> IncrementalState:
+    """
+    Loads the cached series of every entity of `filter`. States already in `loaded` are reused rather than read from
+    the cache again, and newly loaded ones are added to it.
+    """
+    if not team.strict_caching_enabled:
+        return IncrementalState()
+
+    cache_key = filter.cache_key(team.pk, namespace="trends_incremental")
+    if loaded is not None and cache_key in loaded:
+        return loaded[cache_key]
+
+    state = IncrementalState(cache_key=cache_key)
+    cached = get_safe_cache(cache_key)
+    if _is_usable_state(cached, team):
+        state.computed_at = cached["computed_at"]
+        state.cached = cached["entities"]
+    if loaded is not None:
+        loaded[cache_key] = state
+    return state
+
+
+def plan_incremental_refresh(
+    filter: Filter, team: Team, entity: Entity, state: IncrementalState, use_cache: bool = True
+) -> IncrementalRefresh:
+    if state.cache_key is None or not supports_incremental_refresh(filter, team, entity):
+        return IncrementalRefresh(query_filter=filter)
+
+    refresh = IncrementalRefresh(query_filter=filter, state=state, entity_key=str(entity.index))
+
+    cached = state.cached.get(refresh.entity_key) if use_cache else None
+    if state.computed_at is None or not _is_usable_entity_state(cached, filter):
+        return refresh
+
+    days: List[str] = cached["days"]
+    date_range = QueryDateRange(filter, team)
+    range_start = _to_team_time(date_range.date_from_param, team)
+    range_end = _to_team_time(date_range.date_to_param, team)
+    lookback = datetime.timedelta(hours=get_instance_setting("STRICT_CACHING_LOOKBACK_HOURS"))
+    complete_until = _to_team_time(state.computed_at - lookback, team)
+
+    first: Optional[int] = None
+    last: Optional[int] = None
+    for index, day in enumerate(days):
+        bucket_start = parser.parse(day)
+        bucket_end = bucket_start + INTERVAL_DELTAS[filter.interval]
+        if bucket_end <= range_start:
+            continue
+        # Always leave at least one interval to query, and never reuse an interval that may still change
+        if bucket_end > complete_until or bucket_end > range_end:
+            break
+        if first is None:
+            if bucket_start > range_start:
+                # The cached intervals don't cover the start of the date range
+                break
+            first = index
+        last = index
+
+    if first is None or last is None:
+        return refresh
+
+    next_bucket_start = parser.parse(days[last]) + INTERVAL_DELTAS[filter.interval]
+    query_filter = filter.shallow_clone({"date_from": _format_day(next_bucket_start, filter.interval)})
+
+    breakdown_values: Optional[List[Any]] = None
+    if filter.breakdown and filter.breakdown_type != "cohort":
+        breakdown_values = [series["breakdown_value"] for series in cached["series"]]
+        # A value that wasn't among the top ones before may be now, in which case the cached series can't be reused
+        top_values = TrendsBreakdown(
+            entity, query_filter, team, person_on_events_mode=team.person_on_events_mode
+        ).get_top_breakdown_values()
+        if any(value not in breakdown_values for value in top_values):
+            return refresh
+
+    refresh.query_filter = query_filter
+    refresh.breakdown_values = breakdown_values
+    refresh.reused_days = days[first : last + 1]
+    refresh.reused_series = {
+        _series_key(series): {
+            **series,
+            "data": series["data"][first : last + 1],
+            "labels": series["labels"][first : last + 1],
+            "days": refresh.reused_days,
+            "persons_urls": series.get("persons_urls", [])[first : last + 1],
+        }
+        for series in cached["series"]
+    }
+
+    return refresh
+
+
+def merge_incremental_refresh(
+    refresh: IncrementalRefresh, filter: Filter, series: List[Dict[str, Any]]
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Prepends the reused intervals to the series queried for `refresh`. Returns None if the queried series don't line
+    up with the cached ones, in which case the whole date range needs to be queried again.
+    """
+    if not refresh.reused_days:
+        return series
+
+    expected_first_day = _format_day(
+        parser.parse(refresh.reused_days[-1]) + INTERVAL_DELTAS[filter.interval], filter.interval
+    )
+    if len(series) != len(refresh.reused_series):
+        return None
+
+    merged = []
+    for fresh in series:
+        cached = refresh.reused_series.get(_series_key(fresh))
+        if cached is None or not fresh["days"] or fresh["days"][0] != expected_first_day:
+            return None
+
+        data = cached["data"] + fresh["data"]
+        merged.append(
+            {
+                **fresh,
+                "data": data,
+                "count": float(sum(data)),
+                "labels": cached["labels"] + fresh["labels"],
+                "days": cached["days"] + fresh["days"],
+                "persons_urls": cached["persons_urls"] + fresh.get("persons_urls", []),
+                "filter": filter.to_dict(),
+            }
+        )
+
+    return merged
+
+
+def record_incremental_results(refresh: IncrementalRefresh, series: List[Dict[str, Any]]) -> None:
+    if refresh.state is None or not series:
+        return
+
+    refresh.state.fresh[refresh.entity_key] = {"days": series[0]["days"], "series": series}
+
+
+def save_incremental_state(state: IncrementalState, team: Team) -> None:
+    if state.cache_key is None or not state.fresh:
+        return
+
+    cache.set(
+        state.cache_key,
+        {
+            "version": INCREMENTAL_STATE_VERSION,
+            "timezone": team.timezone,
+            "computed_at": timezone.now(),
+            "entities": state.fresh,
+        },
+        settings.CACHED_RESULTS_TTL,
+    )
+
+
+def _is_usable_state(state: Any, team: Team) -> bool:
+    if not isinstance(state, dict) or state.get("version") != INCREMENTAL_STATE_VERSION:
+        return False
+    return state.get("timezone") == team.timezone and isinstance(state.get("entities"), dict)
+
+
+def _is_usable_entity_state(cached: Any, filter: Filter) -> bool:
+    if not isinstance(cached, dict) or not cached.get("days") or not cached.get("series"):
+        return False
+    if filter.breakdown and filter.breakdown_type != "cohort":
+        if any("breakdown_value" not in series for series in cached["series"]):
+            return False
+    return all(len(series["data"]) == len(cached["days"]) for series in cached["series"])
+
+
+def _series_key(series: Dict[str, Any]) -> str:
+    return str(series["breakdown_value"]) if "breakdown_value" in series else series["label"]
+
+
+def _to_team_time(value: datetime.datetime, team: Team) -> datetime.datetime:
+    """Returns `value` as a naive datetime in the team's timezone, which is how interval starts are reported."""
+    if value.tzinfo is not None:
+        value = value.astimezone(pytz.timezone(team.timezone)).replace(tzinfo=None)
+    return value
+
+
+def _format_day(value: datetime.datetime, interval: str) -> str:
+    return value.strftime("%Y-%m-%d{}".format(" %H:%M:%S" if interval == "hour" else ""))
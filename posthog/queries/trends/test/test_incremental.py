@@ -0,0 +1,163 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from freezegun import freeze_time
+
+from posthog.constants import TRENDS_CUMULATIVE
+from posthog.models import Person
+from posthog.models.filters.filter import Filter
+from posthog.models.instance_setting import override_instance_config
+from posthog.queries.trends.incremental import load_incremental_state, plan_incremental_refresh
+from posthog.queries.trends.trends import Trends
+from posthog.test.base import APIBaseTest, ClickhouseTestMixin, _create_event, flush_persons_and_events
+from posthog.utils import get_safe_cache
+
+
+class TestIncrementalTrends(ClickhouseTestMixin, APIBaseTest):
+    CLASS_DATA_LEVEL_SETUP = False
+
+    def setUp(self):
+        super().setUp()
+        Person.objects.create(team_id=self.team.pk, distinct_ids=["person1"])
+
+    def _create_pageview(self, timestamp: str, key: str = "a"):
+        _create_event(
+            team=self.team, event="$pageview", distinct_id="person1", timestamp=timestamp, properties={"key": key}
+        )
+        flush_persons_and_events()
+
+    def _filter(self, **kwargs) -> Filter:
+        return Filter(
+            data={"date_from": "-7d", "events": [{"id": "$pageview", "name": "$pageview"}], **kwargs}, team=self.team
+        )
+
+    def _plan(self, filter: Filter):
+        with freeze_time("2012-01-15T04:01:34.000Z"):
+            return plan_incremental_refresh(
+                filter, self.team, filter.entities[0], load_incremental_state(filter, self.team)
+            )
+
+    def _run(self, filter: Filter):
+        with freeze_time("2012-01-15T04:01:34.000Z"):
+            return Trends().run(filter, self.team)
+
+    def test_refresh_only_queries_intervals_that_may_still_change(self):
+        self._create_pageview("2012-01-10T03:00:00Z")
+        self._create_pageview("2012-01-15T03:00:00Z")
+
+        with override_instance_config("STRICT_CACHING_TEAMS", "all"):
+            result = self._run(self._filter())
+            assert result[0]["data"] == [0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0]
+
+            self._create_pageview("2012-01-10T05:00:00Z")  # already complete, so not picked up
+            self._create_pageview("2012-01-14T05:00:00Z")  # within the lookback
+            self._create_pageview("2012-01-15T04:00:00Z")
+
+            refresh = self._plan(self._filter())
+            assert refresh.reused_days == [
+                "2012-01-08",
+                "2012-01-09",
+                "2012-01-10",
+                "2012-01-11",
+                "2012-01-12",
+                "2012-01-13",
+            ]
+            assert refresh.query_filter._date_from == "2012-01-14"
+
+            result = self._run(self._filter())
+
+        assert result[0]["days"][0] == "2012-01-08"
+        assert result[0]["data"] == [0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0, 2.0]
+        assert result[0]["count"] == 4.0
+
+    def test_lookback_is_configurable(self):
+        self._create_pageview("2012-01-10T03:00:00Z")
+
+        with override_instance_config("STRICT_CACHING_TEAMS", "all"), override_instance_config(
+            "STRICT_CACHING_LOOKBACK_HOURS", 24 * 7
+        ):
+            self._run(self._filter())
+            self._create_pageview("2012-01-10T05:00:00Z")
+            result = self._run(self._filter())
+
+        assert result[0]["data"] == [0.0, 0.0, 2.0, 0.0, 0.0, 0.0, 0.0, 0.0]
+
+    def test_breakdown_refresh_keeps_breakdown_values(self):
+        self._create_pageview("2012-01-10T03:00:00Z", key="a")
+        self._create_pageview("2012-01-11T03:00:00Z", key="b")
+
+        with override_instance_config("STRICT_CACHING_TEAMS", "all"):
+            self._run(self._filter(breakdown="key"))
+            self._create_pageview("2012-01-15T03:00:00Z", key="b")
+
+            refresh = self._plan(self._filter(breakdown="key"))
+            assert sorted(refresh.breakdown_values or []) == ["a", "b"]
+            assert len(refresh.reused_days) == 6
+
+            result = self._run(self._filter(breakdown="key"))
+
+        assert {series["breakdown_value"]: series["data"] for series in result} == {
+            "a": [0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 0.0],
+            "b": [0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0],
+        }
+
+    def test_breakdown_refresh_picks_up_new_breakdown_values(self):
+        self._create_pageview("2012-01-10T03:00:00Z", key="a")
+        self._create_pageview("2012-01-11T03:00:00Z", key="b")
+
+        with override_instance_config("STRICT_CACHING_TEAMS", "all"):
+            self._run(self._filter(breakdown="key"))
+            self._create_pageview("2012-01-15T03:00:00Z", key="b")
+            self._create_pageview("2012-01-15T03:00:00Z", key="c")
+
+            refresh = self._plan(self._filter(breakdown="key"))
+            assert refresh.reused_days == []
+
+            result = self._run(self._filter(breakdown="key"))
+
+        assert {series["breakdown_value"]: series["data"] for series in result} == {
+            "a": [0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 0.0],
+            "b": [0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0],
+            "c": [0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 1.0],
+        }
+
+    def test_cumulative_refresh_accumulates_merged_intervals(self):
+        self._create_pageview("2012-01-10T03:00:00Z")
+
+        with override_instance_config("STRICT_CACHING_TEAMS", "all"):
+            self._run(self._filter(display=TRENDS_CUMULATIVE))
+            self._create_pageview("2012-01-15T03:00:00Z")
+            result = self._run(self._filter(display=TRENDS_CUMULATIVE))
+
+        assert result[0]["data"] == [0.0, 0.0, 1.0, 1.0, 1.0, 1.0, 1.0, 2.0]
+
+    def test_multiple_series_refresh_in_parallel(self):
+        self._create_pageview("2012-01-10T03:00:00Z")
+        filter = self._filter(
+            events=[
+                {"id": "$pageview", "name": "$pageview", "order": 0},
+                {"id": "$pageview", "math": "dau", "order": 1},
+            ]
+        )
+
+        with override_instance_config("STRICT_CACHING_TEAMS", "all"):
+            self._run(filter)
+            self._create_pageview("2012-01-15T03:00:00Z")
+            with patch("posthog.queries.trends.incremental.get_safe_cache", wraps=get_safe_cache) as cache_get, patch(
+                "posthog.queries.trends.incremental.cache.set", wraps=cache.set
+            ) as cache_set:
+                result = self._run(filter)
+
+        assert [series["data"] for series in result] == [[0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0]] * 2
+        # The series of both entities are kept together
+        assert cache_get.call_count == 1
+        assert cache_set.call_count == 1
+
+    def test_not_incremental_without_strict_caching(self):
+        self._create_pageview("2012-01-10T03:00:00Z")
+        self._run(self._filter())
+
+        refresh = self._plan(self._filter())
+
+        assert refresh.state is None
+        assert refresh.reused_days == []
@@ -1,21 +1,17 @@
 import copy
-import threading
-from datetime import datetime, timedelta
+from functools import partial
 from itertools import accumulate
 from typing import Any, Callable, Dict, List, Optional, Tuple, cast
 
-import pytz
-from dateutil import parser
 from django.db.models.query import Prefetch
 from sentry_sdk import push_scope
 
-from posthog.clickhouse.query_tagging import get_query_tags, tag_queries
+from posthog.clickhouse.client.parallel import run_parallel_queries
 from posthog.constants import (
     NON_BREAKDOWN_DISPLAY_TYPES,
     TREND_FILTER_TYPE_ACTIONS,
     TRENDS_CUMULATIVE,
     TRENDS_LIFECYCLE,
-    TRENDS_LINEAR,
 )
 from posthog.models.action import Action
 from posthog.models.action_step import ActionStep
@@ -26,17 +22,31 @@ from posthog.queries.base import handle_compare
 from posthog.queries.insight import insight_sync_execute
 from posthog.queries.trends.breakdown import TrendsBreakdown
 from posthog.queries.trends.formula import TrendsFormula
+from posthog.queries.trends.incremental import (
+    IncrementalRefresh,
+    IncrementalState,
+    load_incremental_state,
+    merge_incremental_refresh,
+    plan_incremental_refresh,
+    record_incremental_results,
+    save_incremental_state,
+)
 from posthog.queries.trends.lifecycle import Lifecycle
 from posthog.queries.trends.total_volume import TrendsTotalVolume
-from posthog.utils import generate_cache_key, get_safe_cache
 
 
 class Trends(TrendsTotalVolume, Lifecycle, TrendsFormula):
-    def _get_sql_for_entity(self, filter: Filter, team: Team, entity: Entity) -> Tuple[str, str, Dict, Callable]:
+    def _get_sql_for_entity(
+        self, filter: Filter, team: Team, entity: Entity, breakdown_values: Optional[List[Any]] = None
+    ) -> Tuple[str, str, Dict, Callable]:
         if filter.breakdown and filter.display not in NON_BREAKDOWN_DISPLAY_TYPES:
             query_type = "trends_breakdown"
             sql, params, parse_function = TrendsBreakdown(
-                entity, filter, team, person_on_events_mode=team.person_on_events_mode
+                entity,
+                filter,
+                team,
+                person_on_events_mode=team.person_on_events_mode,
+                breakdown_values=breakdown_values,
             ).get_query()
         elif filter.shown_as == TRENDS_LIFECYCLE:
             query_type = "trends_lifecycle"
@@ -47,140 +57,75 @@ class Trends(TrendsTotalVolume, Lifecycle, TrendsFormula):
 
         return query_type, sql, params, parse_function
 
-    # Use cached result even on refresh if team has strict caching enabled
-    def get_cached_result(self, filter: Filter, team: Team) -> Optional[List[Dict[str, Any]]]:
-
-        if not team.strict_caching_enabled or filter.breakdown or filter.display != TRENDS_LINEAR:
-            return None
-
-        cache_key = generate_cache_key(f"{filter.toJSON()}_{team.pk}")
-        cached_result_package = get_safe_cache(cache_key)
-        cached_result = (
-            cached_result_package.get("result")
-            if cached_result_package and isinstance(cached_result_package, dict)
-            else None
-        )
-
-        if not cached_result:
-            return None
+    def _finalize_results(
+        self, filter: Filter, team: Team, entity: Entity, refresh: IncrementalRefresh, serialized_data: List
+    ) -> List[Dict[str, Any]]:
+        merged_results = merge_incremental_refresh(refresh, filter, serialized_data)
+        if merged_results is None:
+            # The cached intervals didn't line up with the fresh ones, so start over for the whole date range
+            return self._run_entity_query(filter, team, entity, cast(IncrementalState, refresh.state), use_cache=False)
 
-        _is_present = self.is_present_timerange(cached_result, filter, team)
-
-        return cached_result if _is_present else None
-
-    # Determine if the current timerange is present in the cache
-    def is_present_timerange(self, cached_result: List[Dict[str, Any]], filter: Filter, team: Team) -> bool:
-        if (
-            len(cached_result) > 0
-            and cached_result[0].get("days")
-            and cached_result[0].get("data")
-            and len(cached_result[0]["days"]) > 0
-            and len(cached_result[0]["days"]) == len(cached_result[0]["data"])
-        ):
-            latest_date = cached_result[0]["days"][len(cached_result[0]["days"]) - 1]
-
-            parsed_latest_date = parser.parse(latest_date)
-            parsed_latest_date = parsed_latest_date.replace(tzinfo=pytz.timezone(team.timezone))
-            _is_present = is_filter_date_present(filter, parsed_latest_date)
-        else:
-            _is_present = False
+        record_incremental_results(refresh, merged_results)
 
-        return _is_present
-
-    # Use a condensed filter if a cached result exists in the current timerange
-    def adjusted_filter(self, filter: Filter, team: Team) -> Tuple[Filter, Optional[Dict[str, Any]]]:
-        cached_result = self.get_cached_result(filter, team)
-
-        new_filter = filter.shallow_clone({"date_from": interval_unit(filter.interval)}) if cached_result else filter
-
-        label_to_payload = {}
-        if cached_result:
-            for payload in cached_result:
-                label_to_payload[f'{payload["label"]}_{payload["action"]["order"]}'] = payload
-
-        return new_filter, label_to_payload
-
-    def merge_results(
-        self, result, cached_result: Optional[Dict[str, Any]], entity_order: int, filter: Filter, team: Team
-    ):
-        if cached_result and filter.display != TRENDS_CUMULATIVE:
-            new_res = []
-
-            for payload in result:
-                cached_series = cached_result.pop(f'{payload["label"]}_{entity_order}')
-                data = cached_series["data"]
-                data.pop()
-                data.append(payload["data"].pop())
-                cached_series["data"] = data
-                new_res.append(cached_series)
+        if filter.display == TRENDS_CUMULATIVE:
+            return self._handle_cumulative(copy.deepcopy(merged_results))
+        return merged_results
 
-            return new_res, cached_result
-        elif filter.display == TRENDS_CUMULATIVE:
-            return self._handle_cumulative(result), {}
-        else:
-            return result, {}
+    def _run_query(
+        self, filter: Filter, team: Team, entity: Entity, incremental_states: Dict[str, IncrementalState]
+    ) -> List[Dict[str, Any]]:
+        return self._run_entity_query(filter, team, entity, load_incremental_state(filter, team, incremental_states))
 
-    def _run_query(self, filter: Filter, team: Team, entity: Entity) -> List[Dict[str, Any]]:
-        adjusted_filter, cached_result = self.adjusted_filter(filter, team)
+    def _run_entity_query(
+        self, filter: Filter, team: Team, entity: Entity, state: IncrementalState, use_cache: bool = True
+    ) -> List[Dict[str, Any]]:
+        refresh = plan_incremental_refresh(filter, team, entity, state, use_cache=use_cache)
+        query_filter = refresh.query_filter
         with push_scope() as scope:
-            query_type, sql, params, parse_function = self._get_sql_for_entity(adjusted_filter, team, entity)
+            query_type, sql, params, parse_function = self._get_sql_for_entity(
+                query_filter, team, entity, refresh.breakdown_values
+            )
             scope.set_context("filter", filter.to_dict())
             scope.set_tag("team", team)
-            query_params = {**params, **adjusted_filter.hogql_context.values}
+            query_params = {**params, **query_filter.hogql_context.values}
             scope.set_context("query", {"sql": sql, "params": query_params})
             result = insight_sync_execute(
                 sql,
                 query_params,
                 settings={"timeout_before_checking_execution_speed": 60},
                 query_type=query_type,
-                filter=adjusted_filter,
+                filter=query_filter,
             )
             result = parse_function(result)
             serialized_data = self._format_serialized(entity, result)
-            merged_results, cached_result = self.merge_results(
-                serialized_data, cached_result, entity.order or entity.index, filter, team
-            )
-
-        if cached_result:
-            for value in cached_result.values():
-                merged_results.append(value)
 
-        return merged_results
+        return self._finalize_results(filter, team, entity, refresh, serialized_data)
 
-    def _run_query_for_threading(
-        self, result: List, index: int, query_type, sql, params, query_tags: Dict, filter: Filter
-    ):
-        tag_queries(**query_tags)
+    def _run_query_for_threading(self, query_type, sql, params, filter: Filter):
         with push_scope() as scope:
             scope.set_context("query", {"sql": sql, "params": params})
-            result[index] = insight_sync_execute(sql, params, query_type=query_type, filter=filter)
+            return insight_sync_execute(sql, params, query_type=query_type, filter=filter)
 
     def _run_parallel(self, filter: Filter, team: Team) -> List[Dict[str, Any]]:
-        result: List[Optional[List[Dict[str, Any]]]] = [None] * len(filter.entities)
+        refreshes: List[Optional[IncrementalRefresh]] = [None] * len(filter.entities)
         parse_functions: List[Optional[Callable]] = [None] * len(filter.entities)
         sql_statements_with_params: List[Tuple[Optional[str], Dict]] = [(None, {})] * len(filter.entities)
-        cached_result = None
-        jobs = []
+        tasks: List[Optional[Callable]] = [None] * len(filter.entities)
 
+        state = load_incremental_state(filter, team)
         for entity in filter.entities:
-            adjusted_filter, cached_result = self.adjusted_filter(filter, team)
-            query_type, sql, params, parse_function = self._get_sql_for_entity(adjusted_filter, team, entity)
+            refresh = plan_incremental_refresh(filter, team, entity, state)
+            query_filter = refresh.query_filter
+            query_type, sql, params, parse_function = self._get_sql_for_entity(
+                query_filter, team, entity, refresh.breakdown_values
+            )
+            refreshes[entity.index] = refresh
             parse_functions[entity.index] = parse_function
-            query_params = {**params, **adjusted_filter.hogql_context.values}
+            query_params = {**params, **query_filter.hogql_context.values}
             sql_statements_with_params[entity.index] = (sql, query_params)
-            thread = threading.Thread(
-                target=self._run_query_for_threading,
-                args=(result, entity.index, query_type, sql, query_params, get_query_tags(), adjusted_filter),
-            )
-            jobs.append(thread)
-
-        # Start the threads (i.e. calculate the random number lists)
-        for j in jobs:
-            j.start()
+            tasks[entity.index] = partial(self._run_query_for_threading, query_type, sql, query_params, query_filter)
 
-        # Ensure all of the threads have finished
-        for j in jobs:
-            j.join()
+        result: List[Any] = run_parallel_queries(cast(List[Callable], tasks), team_id=team.pk)
 
         # Parse results for each thread
         with push_scope() as scope:
@@ -192,10 +137,10 @@ class Trends(TrendsTotalVolume, Lifecycle, TrendsFormula):
                 )
                 serialized_data = cast(List[Callable], parse_functions)[entity.index](result[entity.index])
                 serialized_data = self._format_serialized(entity, serialized_data)
-                merged_results, cached_result = self.merge_results(
-                    serialized_data, cached_result, entity.order or entity.index, filter, team
+                result[entity.index] = self._finalize_results(
+                    filter, team, entity, cast(IncrementalRefresh, refreshes[entity.index]), serialized_data
                 )
-                result[entity.index] = merged_results
+        save_incremental_state(state, team)
 
         # flatten results
         flat_results: List[Dict[str, Any]] = []
@@ -203,10 +148,6 @@ class Trends(TrendsTotalVolume, Lifecycle, TrendsFormula):
             for flat in cast(List[Dict[str, Any]], item):
                 flat_results.append(flat)
 
-            if cached_result:
-                for value in cached_result.values():
-                    flat_results.append(value)
-
         return flat_results
 
     def run(self, filter: Filter, team: Team, *args, **kwargs) -> List[Dict[str, Any]]:
@@ -226,9 +167,15 @@ class Trends(TrendsTotalVolume, Lifecycle, TrendsFormula):
                     return []
 
         if len(filter.entities) == 1 or filter.compare:
+            # The cached series of every entity are kept together, so load them once and save them once at the end
+            incremental_states: Dict[str, IncrementalState] = {}
             result = []
             for entity in filter.entities:
-                result.extend(handle_compare(filter, self._run_query, team, entity=entity))
+                result.extend(
+                    handle_compare(filter, self._run_query, team, entity=entity, incremental_states=incremental_states)
+                )
+            for state in incremental_states.values():
+                save_incremental_state(state, team)
         else:
             result = self._run_parallel(filter, team)
 
@@ -257,29 +204,3 @@ class Trends(TrendsTotalVolume, Lifecycle, TrendsFormula):
         for metrics in entity_metrics:
             metrics.update(data=list(accumulate(metrics["data"])))
         return entity_metrics
-
-
-def is_filter_date_present(filter: Filter, latest_cached_datetime: datetime) -> bool:
-    diff = filter.date_to - latest_cached_datetime
-
-    if filter.interval == "hour":
-        return diff < timedelta(hours=1)
-    elif filter.interval == "day":
-        return diff < timedelta(days=1)
-    elif filter.interval == "week":
-        return diff < timedelta(weeks=1)
-    elif filter.interval == "month":
-        return diff < timedelta(days=30)
-
-
-def interval_unit(interval: str) -> str:
-    if interval == "hour":
-        return "-1hr"
-    if interval == "day":
-        return "-1d"
-    elif interval == "week":
-        return "-1w"
-    elif interval == "month":
-        return "-1m"
-    else:
-        raise ValueError("Invalid interval")
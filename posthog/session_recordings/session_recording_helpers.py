@@ -1,11 +1,24 @@
 import base64
+import codecs
 import dataclasses
 import gzip
+import io
 import json
+import re
 from collections import defaultdict
 from datetime import datetime, timedelta, timezone
-from typing import Any, DefaultDict, Dict, Generator, List, Optional
+from typing import (
+    Any,
+    DefaultDict,
+    Dict,
+    Generator,
+    Iterable,
+    List,
+    Match,
+    Optional,
+)
 
+from django.conf import settings
 from sentry_sdk.api import capture_exception, capture_message
 
 from posthog.models import utils
@@ -20,6 +33,16 @@ from posthog.models.session_recording.metadata import (
 
 FULL_SNAPSHOT = 2
 
+# Gzipped, base64 encoded UTF-16 JSON. This is what all chunks were written with historically.
+SNAPSHOT_COMPRESSION_GZIP_BASE64 = "gzip-base64"
+# Gzipped, base64 encoded UTF-8 JSON. Roughly half the size to compress for mostly-ascii snapshot data.
+SNAPSHOT_COMPRESSION_GZIP_BASE64_UTF8 = "gzip-base64-utf8"
+
+SNAPSHOT_COMPRESSION_TEXT_ENCODINGS = {
+    SNAPSHOT_COMPRESSION_GZIP_BASE64: "utf-16",
+    SNAPSHOT_COMPRESSION_GZIP_BASE64_UTF8: "utf-8",
+}
+
 
 # NOTE: For reference here are some helpful enum mappings from rrweb
 # https://github.com/rrweb-io/rrweb/blob/master/packages/rrweb/src/types.ts
@@ -106,16 +129,19 @@ def preprocess_session_recording_events_for_clickhouse(events: List[Event]) -> L
     return result
 
 
-def compress_and_chunk_snapshots(events: List[Event], chunk_size=512 * 1024) -> Generator[Event, None, None]:
+def compress_and_chunk_snapshots(
+    events: List[Event], chunk_size=512 * 1024, compression: Optional[str] = None
+) -> Generator[Event, None, None]:
+    compression = compression or settings.SESSION_RECORDING_SNAPSHOT_COMPRESSION
     data_list = [event["properties"]["$snapshot_data"] for event in events]
     session_id = events[0]["properties"]["$session_id"]
     has_full_snapshot = any(snapshot_data["type"] == RRWEB_MAP_EVENT_TYPE.FullSnapshot for snapshot_data in data_list)
     window_id = events[0]["properties"].get("$window_id")
 
-    compressed_data = compress_to_string(json.dumps(data_list))
-
     id = str(utils.UUIDT())
-    chunks = chunk_string(compressed_data, chunk_size)
+    # NOTE: Every chunk carries the total chunk count, so chunks are collected before being turned into events. Only
+    # the compressed output is ever held in memory, not the intermediate JSON, encoded or uncompressed copies.
+    chunks = list(stream_compressed_chunks(_iter_json_list(data_list), chunk_size, compression))
 
     for index, chunk in enumerate(chunks):
         yield {
@@ -130,7 +156,7 @@ def compress_and_chunk_snapshots(events: List[Event], chunk_size=512 * 1024) ->
                     "chunk_index": index,
                     "chunk_count": len(chunks),
                     "data": chunk,
-                    "compression": "gzip-base64",
+                    "compression": compression,
                     "has_full_snapshot": has_full_snapshot,
                     # We only store this field on the first chunk as it contains all events, not just this chunk
                     "events_summary": get_events_summary_from_snapshot_data(data_list) if index == 0 else None,
@@ -139,6 +165,52 @@ def compress_and_chunk_snapshots(events: List[Event], chunk_size=512 * 1024) ->
         }
 
 
+def _iter_json_list(items: List[Any]) -> Generator[str, None, None]:
+    """Yields the same output as `json.dumps(items)`, one item at a time."""
+    yield "["
+    for index, item in enumerate(items):
+        if index > 0:
+            yield ", "
+        yield json.dumps(item)
+    yield "]"
+
+
+def stream_compressed_chunks(
+    parts: Iterable[str], chunk_size: int, compression: str = SNAPSHOT_COMPRESSION_GZIP_BASE64
+) -> Generator[str, None, None]:
+    """
+    Incrementally encodes, gzips and base64 encodes the given string parts, yielding chunks of `chunk_size` base64
+    characters as soon as enough compressed output is available.
+
+    The concatenation of all chunks is identical to `compress_to_string("".join(parts))` for the legacy format.
+    """
+    encoder = codecs.getincrementalencoder(SNAPSHOT_COMPRESSION_TEXT_ENCODINGS[compression])("surrogatepass")
+    compressed_buffer = io.BytesIO()
+    base64_buffer = ""
+
+    def drain(final: bool) -> Generator[str, None, None]:
+        nonlocal base64_buffer
+        compressed = compressed_buffer.getvalue()
+        # base64 encodes 3 bytes at a time, so anything beyond that has to wait for more output
+        encodable_length = len(compressed) if final else len(compressed) - len(compressed) % 3
+        base64_buffer += base64.b64encode(compressed[:encodable_length]).decode("utf-8")
+        compressed_buffer.seek(0)
+        compressed_buffer.truncate()
+        compressed_buffer.write(compressed[encodable_length:])
+
+        while len(base64_buffer) >= chunk_size or (final and base64_buffer):
+            yield base64_buffer[:chunk_size]
+            base64_buffer = base64_buffer[chunk_size:]
+
+    with gzip.GzipFile(fileobj=compressed_buffer, mode="wb") as gzip_file:
+        for part in parts:
+            gzip_file.write(encoder.encode(part))
+            if compressed_buffer.tell() >= chunk_size:
+                yield from drain(final=False)
+
+    yield from drain(final=True)
+
+
 def chunk_string(string: str, chunk_length: int) -> List[str]:
     """Split a string into chunk_length-sized elements. Reversal operation: `''.join()`."""
     return [string[0 + offset : chunk_length + offset] for offset in range(0, len(string), chunk_length)]
@@ -163,9 +235,11 @@ def compress_to_string(json_string: str) -> str:
     return base64.b64encode(compressed_data).decode("utf-8")
 
 
-def decompress(base64data: str) -> str:
+def decompress(base64data: str, compression: str = SNAPSHOT_COMPRESSION_GZIP_BASE64) -> str:
     compressed_bytes = base64.b64decode(base64data)
-    return gzip.decompress(compressed_bytes).decode("utf-16", "surrogatepass")
+    # Anything that isn't explicitly marked as UTF-8 was written in the legacy UTF-16 format
+    text_encoding = SNAPSHOT_COMPRESSION_TEXT_ENCODINGS.get(compression, "utf-16")
+    return gzip.decompress(compressed_bytes).decode(text_encoding, "surrogatepass")
 
 
 def decompress_chunked_snapshot_data(
@@ -234,7 +308,11 @@ def decompress_chunked_snapshot_data(
         b64_compressed_data = "".join(
             chunk["snapshot_data"]["data"] for chunk in sorted(chunks, key=lambda c: c["snapshot_data"]["chunk_index"])
         )
-        decompressed_data = json.loads(decompress(b64_compressed_data))
+        decompressed_data = json.loads(
+            decompress(
+                b64_compressed_data, chunks[0]["snapshot_data"].get("compression", SNAPSHOT_COMPRESSION_GZIP_BASE64)
+            )
+        )
 
         # Decompressed data can be large, and in metadata calculations, we only care if the event is "active"
         # This pares down the data returned, so we're not passing around a massive object
@@ -246,6 +324,153 @@ def decompress_chunked_snapshot_data(
     return DecompressedRecordingData(has_next=has_next, snapshot_data_by_window_id=snapshot_data_by_window_id)
 
 
+NON_ASCII_PATTERN = re.compile(r"[^\x00-\x7f]")
+
+
+def _escape_non_ascii(match: Match[str]) -> str:
+    """Escapes a code point the way `json.dumps` does, as a surrogate pair if outside of the basic plane."""
+    code_point = ord(match.group())
+    if code_point > 0xFFFF:
+        code_point -= 0x10000
+        return "\\u%04x\\u%04x" % (0xD800 | (code_point >> 10), 0xDC00 | (code_point & 0x3FF))
+    return "\\u%04x" % code_point
+
+
+@dataclasses.dataclass
+class LazyRecordingData:
+    """
+    A page of recording snapshots that hasn't been decompressed yet. Chunk groups are only joined and decompressed
+    when iterated, and are yielded as raw JSON array text rather than parsed into Python objects.
+    """
+
+    has_next: bool
+    chunk_groups_by_window_id: Dict[WindowId, List[List[SnapshotDataTaggedWithWindowId]]]
+
+    def paginate(self, limit: int) -> Generator["LazyRecordingData", None, None]:
+        """Splits the chunk groups into pages of at most `limit` groups, keeping their order within each window."""
+        all_chunk_groups = [
+            (window_id, chunks)
+            for window_id, chunk_groups in self.chunk_groups_by_window_id.items()
+            for chunks in chunk_groups
+        ]
+        for offset in range(0, len(all_chunk_groups), limit):
+            chunk_groups_by_window_id: DefaultDict[WindowId, List[List[SnapshotDataTaggedWithWindowId]]] = defaultdict(
+                list
+            )
+            for window_id, chunks in all_chunk_groups[offset : offset + limit]:
+                chunk_groups_by_window_id[window_id].append(chunks)
+            yield LazyRecordingData(
+                has_next=offset + limit < len(all_chunk_groups),
+                chunk_groups_by_window_id=dict(chunk_groups_by_window_id),
+            )
+
+    def iter_json_arrays(self, window_id: WindowId) -> Generator[str, None, None]:
+        for chunks in self.chunk_groups_by_window_id[window_id]:
+            snapshot_data = chunks[0]["snapshot_data"]
+            if "chunk_id" not in snapshot_data:
+                yield json.dumps([snapshot_data])
+                continue
+
+            b64_compressed_data = "".join(
+                chunk["snapshot_data"]["data"]
+                for chunk in sorted(chunks, key=lambda c: c["snapshot_data"]["chunk_index"])
+            )
+            json_array = decompress(
+                b64_compressed_data, snapshot_data.get("compression", SNAPSHOT_COMPRESSION_GZIP_BASE64)
+            )
+            # The response is sent as utf-8, so anything that isn't plain ascii (including lone surrogates) gets
+            # escaped, same as Django's JsonResponse would do. Outside of strings JSON is always ascii, so this is
+            # done on the text without parsing it.
+            if not json_array.isascii():
+                json_array = NON_ASCII_PATTERN.sub(_escape_non_ascii, json_array)
+            yield json_array
+
+
+def lazy_chunked_snapshot_data(
+    team_id: int,
+    session_recording_id: str,
+    all_recording_events: List[SnapshotDataTaggedWithWindowId],
+    limit: Optional[int] = None,
+    offset: int = 0,
+    window_id: Optional[WindowId] = None,
+) -> LazyRecordingData:
+    """
+    The lazy counterpart of `decompress_chunked_snapshot_data`. Pagination (and the optional window_id filter) is
+    applied to the chunk groups before anything is decompressed, so only the requested page is ever decoded.
+    """
+
+    if window_id is not None:
+        all_recording_events = [event for event in all_recording_events if event["window_id"] == window_id]
+
+    chunk_groups: List[List[SnapshotDataTaggedWithWindowId]]
+    if len(all_recording_events) == 0:
+        chunk_groups = []
+    elif "chunk_id" not in all_recording_events[0]["snapshot_data"]:
+        # Handle backward compatibility to the days of uncompressed and unchunked snapshots
+        chunk_groups = [[event] for event in all_recording_events]
+    else:
+        chunks_collector: DefaultDict[str, List[SnapshotDataTaggedWithWindowId]] = defaultdict(list)
+        for event in all_recording_events:
+            chunks_collector[event["snapshot_data"]["chunk_id"]].append(event)
+        chunk_groups = list(chunks_collector.values())
+
+    paginated_chunk_list = paginate_list(chunk_groups, limit, offset)
+
+    chunk_groups_by_window_id: DefaultDict[WindowId, List[List[SnapshotDataTaggedWithWindowId]]] = defaultdict(list)
+    for chunks in paginated_chunk_list.paginated_list:
+        snapshot_data = chunks[0]["snapshot_data"]
+        if "chunk_id" in snapshot_data and len(chunks) != snapshot_data["chunk_count"]:
+            capture_message(
+                "Did not find all session recording chunks! Team: {}, Session: {}, Chunk-id: {}. Found {} of {} expected chunks".format(
+                    team_id, session_recording_id, snapshot_data["chunk_id"], len(chunks), snapshot_data["chunk_count"]
+                )
+            )
+            continue
+        chunk_groups_by_window_id[chunks[0]["window_id"]].append(chunks)
+
+    return LazyRecordingData(
+        has_next=paginated_chunk_list.has_next, chunk_groups_by_window_id=dict(chunk_groups_by_window_id)
+    )
+
+
+def iter_snapshot_data_by_window_id_json(lazy_data: LazyRecordingData) -> Generator[str, None, None]:
+    """
+    Writes the `snapshot_data_by_window_id` object for a page of lazy recording data piece by piece. The decompressed
+    JSON arrays are stitched together as text, so the snapshots are never materialised as Python objects.
+    """
+
+    yield "{"
+    for index, window_id in enumerate(lazy_data.chunk_groups_by_window_id):
+        # Matches how json.dumps serializes a None dict key
+        window_key = json.dumps("null" if window_id is None else str(window_id))
+        yield "%s%s: [" % (", " if index else "", window_key)
+
+        is_first_array = True
+        for json_array in lazy_data.iter_json_arrays(window_id):
+            json_array_contents = json_array.strip()[1:-1].strip()
+            if not json_array_contents:
+                continue
+            yield json_array_contents if is_first_array else ", " + json_array_contents
+            is_first_array = False
+
+        yield "]"
+    yield "}"
+
+
+def stream_snapshot_data_response(lazy_data: LazyRecordingData, next_url: Optional[str]) -> Generator[str, None, None]:
+    """Writes the snapshots API response body for a page of lazy recording data piece by piece."""
+
+    yield '{"next": %s, "snapshot_data_by_window_id": ' % json.dumps(next_url)
+    yield from iter_snapshot_data_by_window_id_json(lazy_data)
+
+    # TODO: Remove this once the frontend is migrated to use the above values
+    # :TRICKY: The chunks are decompressed a second time rather than kept around, so that at most one chunk group is
+    # held in memory at any time.
+    yield ', "result": {"next": %s, "snapshot_data_by_window_id": ' % json.dumps(next_url)
+    yield from iter_snapshot_data_by_window_id_json(lazy_data)
+    yield "}}"
+
+
 def is_active_event(event: SessionRecordingEventSummary) -> bool:
     """
     Determines which rr-web events are "active" - meaning user generated
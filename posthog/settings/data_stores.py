@@ -97,6 +97,22 @@ CLICKHOUSE_ENABLE_STORAGE_POLICY = get_from_env("CLICKHOUSE_ENABLE_STORAGE_POLIC
 
 CLICKHOUSE_CONN_POOL_MIN = get_from_env("CLICKHOUSE_CONN_POOL_MIN", 20, type_cast=int)
 CLICKHOUSE_CONN_POOL_MAX = get_from_env("CLICKHOUSE_CONN_POOL_MAX", 1000, type_cast=int)
+# How long queries wait for a connection when all of them are in use, in seconds. By default they fail right away, only
+# the offline workload, where latency matters less than getting the query through, waits
+CLICKHOUSE_CONN_POOL_CHECKOUT_TIMEOUT = get_from_env("CLICKHOUSE_CONN_POOL_CHECKOUT_TIMEOUT", 0.0, type_cast=float)
+CLICKHOUSE_CONN_POOL_OFFLINE_CHECKOUT_TIMEOUT = get_from_env(
+    "CLICKHOUSE_CONN_POOL_OFFLINE_CHECKOUT_TIMEOUT", 30.0, type_cast=float
+)
+# If set, pools grow up to this many connections while queries are waiting for one, rather than making them wait
+CLICKHOUSE_CONN_POOL_ADAPTIVE_MAX = get_from_env("CLICKHOUSE_CONN_POOL_ADAPTIVE_MAX", optional=True, type_cast=int)
+
+# Bounds for insights running several ClickHouse queries in parallel, e.g. one per trends series
+CLICKHOUSE_PARALLEL_QUERY_WORKERS = get_from_env("CLICKHOUSE_PARALLEL_QUERY_WORKERS", 50, type_cast=int)
+CLICKHOUSE_PARALLEL_QUERIES_PER_REQUEST = get_from_env("CLICKHOUSE_PARALLEL_QUERIES_PER_REQUEST", 4, type_cast=int)
+CLICKHOUSE_PARALLEL_QUERIES_PER_TEAM = get_from_env("CLICKHOUSE_PARALLEL_QUERIES_PER_TEAM", 10, type_cast=int)
+CLICKHOUSE_PARALLEL_QUERIES_TEAM_WAIT_SECONDS = get_from_env(
+    "CLICKHOUSE_PARALLEL_QUERIES_TEAM_WAIT_SECONDS", 30.0, type_cast=float
+)
 
 CLICKHOUSE_STABLE_HOST = get_from_env("CLICKHOUSE_STABLE_HOST", CLICKHOUSE_HOST)
 # If enabled, some queries will use system.cluster table to query each shard
@@ -76,6 +76,11 @@ CONSTANCE_CONFIG = {
         "Whether to always try to find cached data for historical intervals on trends",
         str,
     ),
+    "STRICT_CACHING_LOOKBACK_HOURS": (
+        get_from_env("STRICT_CACHING_LOOKBACK_HOURS", 24, type_cast=int),
+        "How many hours of cached trends intervals to query again on refresh, to pick up late-arriving events",
+        int,
+    ),
     "EMAIL_ENABLED": (
         get_from_env("EMAIL_ENABLED", True, type_cast=str_to_bool),
         "Whether email service is enabled or not.",
@@ -204,6 +209,7 @@ SETTINGS_ALLOWING_API_OVERRIDE = (
     "PERSON_ON_EVENTS_ENABLED",
     "GROUPS_ON_EVENTS_ENABLED",
     "STRICT_CACHING_TEAMS",
+    "STRICT_CACHING_LOOKBACK_HOURS",
     "SLACK_APP_CLIENT_ID",
     "SLACK_APP_CLIENT_SECRET",
     "SLACK_APP_SIGNING_SECRET",
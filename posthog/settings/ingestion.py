@@ -1,8 +1,13 @@
 import os
 
+import structlog
+
+from posthog.settings.base_variables import TEST
 from posthog.settings.utils import get_from_env, get_list
 from posthog.utils import str_to_bool
 
+logger = structlog.get_logger(__name__)
+
 INGESTION_LAG_METRIC_TEAM_IDS = get_list(os.getenv("INGESTION_LAG_METRIC_TEAM_IDS", ""))
 
 # KEEP IN SYNC WITH plugin-server/src/config/config.ts
@@ -17,6 +22,30 @@ EVENT_PARTITION_KEYS_TO_OVERRIDE = get_list(os.getenv("EVENT_PARTITION_KEYS_TO_O
 LIGHTWEIGHT_CAPTURE_ENDPOINT_ENABLED_TOKENS = get_list(os.getenv("LIGHTWEIGHT_CAPTURE_ENDPOINT_ENABLED_TOKENS", ""))
 LIGHTWEIGHT_CAPTURE_ENDPOINT_ALL = "*" in LIGHTWEIGHT_CAPTURE_ENDPOINT_ENABLED_TOKENS
 
+# When enabled, capture builds all Kafka records for a request up front, produces them as a
+# single batch and waits once for the combined acknowledgement.
+CAPTURE_KAFKA_BATCH_PRODUCE_ENABLED = get_from_env("CAPTURE_KAFKA_BATCH_PRODUCE_ENABLED", False, type_cast=str_to_bool)
+
+# In-process cache of token -> ingestion context lookups done by capture, so that we don't hit Postgres for
+# every request. Unknown tokens are cached for a shorter time.
+INGESTION_CONTEXT_CACHE_ENABLED = get_from_env("INGESTION_CONTEXT_CACHE_ENABLED", not TEST, type_cast=str_to_bool)
+INGESTION_CONTEXT_CACHE_SIZE = get_from_env("INGESTION_CONTEXT_CACHE_SIZE", 10_000, type_cast=int)
+INGESTION_CONTEXT_CACHE_TTL_SECONDS = get_from_env("INGESTION_CONTEXT_CACHE_TTL_SECONDS", 60, type_cast=int)
+INGESTION_CONTEXT_CACHE_NEGATIVE_TTL_SECONDS = get_from_env(
+    "INGESTION_CONTEXT_CACHE_NEGATIVE_TTL_SECONDS", 10, type_cast=int
+)
+
+# Format session recording snapshot chunks are written in by capture, either "gzip-base64" (UTF-16 JSON) or
+# "gzip-base64-utf8". Both are always readable.
+SESSION_RECORDING_SNAPSHOT_COMPRESSION = os.getenv("SESSION_RECORDING_SNAPSHOT_COMPRESSION", "gzip-base64")
+if SESSION_RECORDING_SNAPSHOT_COMPRESSION not in ("gzip-base64", "gzip-base64-utf8"):
+    logger.warning(
+        "session_recording_snapshot_compression_unknown",
+        value=SESSION_RECORDING_SNAPSHOT_COMPRESSION,
+        fallback="gzip-base64",
+    )
+    SESSION_RECORDING_SNAPSHOT_COMPRESSION = "gzip-base64"
+
 # Keep in sync with plugin-server
 EVENTS_DEAD_LETTER_QUEUE_STATSD_METRIC = "events_added_to_dead_letter_queue"
 
@@ -25,3 +25,10 @@ OBJECT_STORAGE_BUCKET = os.getenv("OBJECT_STORAGE_BUCKET", "posthog")
 OBJECT_STORAGE_SESSION_RECORDING_FOLDER = os.getenv("OBJECT_STORAGE_SESSION_RECORDING_FOLDER", "session_recordings")
 OBJECT_STORAGE_EXPORTS_FOLDER = os.getenv("OBJECT_STORAGE_EXPORTS_FOLDER", "exports")
 OBJECT_STORAGE_MEDIA_UPLOADS_FOLDER = os.getenv("OBJECT_STORAGE_MEDIA_UPLOADS_FOLDER", "media_uploads")
+
+# Finished recordings are claimed in batches and persisted with a bounded thread pool within one task run
+SESSION_RECORDING_PERSISTENCE_BATCH_SIZE = get_from_env("SESSION_RECORDING_PERSISTENCE_BATCH_SIZE", 100, type_cast=int)
+SESSION_RECORDING_PERSISTENCE_WORKERS = get_from_env("SESSION_RECORDING_PERSISTENCE_WORKERS", 8, type_cast=int)
+SESSION_RECORDING_PERSISTENCE_MAX_PER_RUN = get_from_env(
+    "SESSION_RECORDING_PERSISTENCE_MAX_PER_RUN", 50_000, type_cast=int
+)
@@ -1,5 +1,5 @@
 import abc
-from typing import Optional, Union
+from typing import Iterable, Iterator, List, Optional, Union
 
 import structlog
 from boto3 import client
@@ -9,6 +9,9 @@ from sentry_sdk import capture_exception
 
 logger = structlog.get_logger(__name__)
 
+# S3 rejects multipart uploads where any part other than the last is smaller than this
+MULTIPART_MIN_PART_SIZE = 5 * 1024 * 1024
+
 
 class ObjectStorageError(Exception):
     pass
@@ -26,13 +29,19 @@ class ObjectStorageClient(metaclass=abc.ABCMeta):
         pass
 
     @abc.abstractmethod
-    def read_bytes(self, bucket: str, key: str) -> Optional[bytes]:
+    def read_bytes(
+        self, bucket: str, key: str, offset: Optional[int] = None, length: Optional[int] = None
+    ) -> Optional[bytes]:
         pass
 
     @abc.abstractmethod
     def write(self, bucket: str, key: str, content: Union[str, bytes]) -> None:
         pass
 
+    @abc.abstractmethod
+    def write_multipart(self, bucket: str, key: str, content: Iterable[bytes]) -> None:
+        pass
+
 
 class UnavailableStorage(ObjectStorageClient):
     def head_bucket(self, bucket: str):
@@ -41,12 +50,17 @@ class UnavailableStorage(ObjectStorageClient):
     def read(self, bucket: str, key: str) -> Optional[str]:
         pass
 
-    def read_bytes(self, bucket: str, key: str) -> Optional[bytes]:
+    def read_bytes(
+        self, bucket: str, key: str, offset: Optional[int] = None, length: Optional[int] = None
+    ) -> Optional[bytes]:
         pass
 
     def write(self, bucket: str, key: str, content: Union[str, bytes]) -> None:
         pass
 
+    def write_multipart(self, bucket: str, key: str, content: Iterable[bytes]) -> None:
+        pass
+
 
 class ObjectStorage(ObjectStorageClient):
     def __init__(self, aws_client) -> None:
@@ -66,10 +80,18 @@ class ObjectStorage(ObjectStorageClient):
         else:
             return None
 
-    def read_bytes(self, bucket: str, key: str) -> Optional[bytes]:
+    def read_bytes(
+        self, bucket: str, key: str, offset: Optional[int] = None, length: Optional[int] = None
+    ) -> Optional[bytes]:
         s3_response = {}
         try:
-            s3_response = self.aws_client.get_object(Bucket=bucket, Key=key)
+            if offset is not None and length is not None:
+                # HTTP byte ranges are inclusive of the last byte
+                s3_response = self.aws_client.get_object(
+                    Bucket=bucket, Key=key, Range=f"bytes={offset}-{offset + length - 1}"
+                )
+            else:
+                s3_response = self.aws_client.get_object(Bucket=bucket, Key=key)
             return s3_response["Body"].read()
         except Exception as e:
             logger.error("object_storage.read_failed", bucket=bucket, file_name=key, error=e, s3_response=s3_response)
@@ -85,6 +107,66 @@ class ObjectStorage(ObjectStorageClient):
             capture_exception(e)
             raise ObjectStorageError("write failed") from e
 
+    def write_multipart(self, bucket: str, key: str, content: Iterable[bytes]) -> None:
+        """
+        Writes content to a single object with a multipart upload, so that it never has to be held in memory at once.
+        The pieces of content are buffered up to the minimum part size S3 accepts. Errors raised while producing the
+        content abort the upload and are re-raised as they are, rather than as an `ObjectStorageError`.
+        """
+        upload_id = None
+        content_error: Optional[Exception] = None
+
+        def guarded_content() -> Iterator[bytes]:
+            nonlocal content_error
+            pieces = iter(content)
+            while True:
+                try:
+                    piece = next(pieces)
+                except StopIteration:
+                    return
+                except Exception as e:
+                    content_error = e
+                    raise
+                yield piece
+
+        try:
+            upload_id = self.aws_client.create_multipart_upload(Bucket=bucket, Key=key)["UploadId"]
+            uploaded_parts: List[dict] = []
+
+            def upload_part(body: bytes) -> None:
+                part_number = len(uploaded_parts) + 1
+                s3_response = self.aws_client.upload_part(
+                    Bucket=bucket, Key=key, UploadId=upload_id, PartNumber=part_number, Body=body
+                )
+                uploaded_parts.append({"ETag": s3_response["ETag"], "PartNumber": part_number})
+
+            buffer = bytearray()
+            for piece in guarded_content():
+                buffer.extend(piece)
+                if len(buffer) >= MULTIPART_MIN_PART_SIZE:
+                    upload_part(bytes(buffer))
+                    buffer.clear()
+            if buffer or not uploaded_parts:
+                upload_part(bytes(buffer))
+
+            self.aws_client.complete_multipart_upload(
+                Bucket=bucket, Key=key, UploadId=upload_id, MultipartUpload={"Parts": uploaded_parts}
+            )
+        except Exception as e:
+            if content_error is None:
+                logger.error("object_storage.multipart_write_failed", bucket=bucket, file_name=key, error=e)
+                capture_exception(e)
+            if upload_id:
+                try:
+                    self.aws_client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+                except Exception as abort_error:
+                    logger.error(
+                        "object_storage.multipart_abort_failed", bucket=bucket, file_name=key, error=abort_error
+                    )
+            if content_error is not None:
+                raise
+            raise ObjectStorageError("multipart write failed") from e
+
 
 _client: ObjectStorageClient = UnavailableStorage()
 
@@ -113,12 +195,20 @@ def write(file_name: str, content: Union[str, bytes]) -> None:
     return object_storage_client().write(bucket=settings.OBJECT_STORAGE_BUCKET, key=file_name, content=content)
 
 
+def write_multipart(file_name: str, content: Iterable[bytes]) -> None:
+    return object_storage_client().write_multipart(
+        bucket=settings.OBJECT_STORAGE_BUCKET, key=file_name, content=content
+    )
+
+
 def read(file_name: str) -> Optional[str]:
     return object_storage_client().read(bucket=settings.OBJECT_STORAGE_BUCKET, key=file_name)
 
 
-def read_bytes(file_name: str) -> Optional[bytes]:
-    return object_storage_client().read_bytes(bucket=settings.OBJECT_STORAGE_BUCKET, key=file_name)
+def read_bytes(file_name: str, offset: Optional[int] = None, length: Optional[int] = None) -> Optional[bytes]:
+    return object_storage_client().read_bytes(
+        bucket=settings.OBJECT_STORAGE_BUCKET, key=file_name, offset=offset, length=length
+    )
 
 
 def health_check() -> bool:
@@ -10,7 +10,7 @@ from posthog.settings import (
     OBJECT_STORAGE_ENDPOINT,
     OBJECT_STORAGE_SECRET_ACCESS_KEY,
 )
-from posthog.storage.object_storage import health_check, read, write
+from posthog.storage.object_storage import health_check, read, read_bytes, write, write_multipart
 from posthog.test.base import APIBaseTest
 
 TEST_BUCKET = "test_storage_bucket"
@@ -52,3 +52,20 @@ class TestStorage(APIBaseTest):
             file_name = f"{TEST_BUCKET}/test_write_and_read_works_with_known_content/{name}"
             write(file_name, "my content".encode("utf-8"))
             self.assertEqual(read(file_name), "my content")
+
+    def test_write_multipart_and_range_read(self) -> None:
+        with self.settings(OBJECT_STORAGE_ENABLED=True):
+            file_name = f"{TEST_BUCKET}/test_write_multipart_and_range_read/{uuid.uuid4()}"
+            write_multipart(file_name, (piece.encode("utf-8") for piece in ["my ", "multipart ", "content"]))
+            self.assertEqual(read(file_name), "my multipart content")
+            self.assertEqual(read_bytes(file_name, offset=3, length=9), b"multipart")
+
+    def test_write_multipart_reraises_content_errors_as_they_are(self) -> None:
+        def failing_content():
+            yield b"my "
+            raise ValueError("query failed")
+
+        with self.settings(OBJECT_STORAGE_ENABLED=True):
+            file_name = f"{TEST_BUCKET}/test_write_multipart_reraises_content_errors_as_they_are/{uuid.uuid4()}"
+            with self.assertRaises(ValueError):
+                write_multipart(file_name, failing_content())
@@ -3,7 +3,7 @@ from time import sleep
 from typing import Optional
 from unittest.mock import Mock
 
-from posthog.cache_utils import cache_for
+from posthog.cache_utils import MISSING, TTLCache, cache_for
 from posthog.test.base import APIBaseTest
 
 mocked_dependency = Mock()
@@ -93,3 +93,38 @@ class TestCacheUtils(APIBaseTest):
             "Background task finished",
             "Post refresh call 1",
         ]
+
+
+class TestTTLCache(APIBaseTest):
+    def test_evicts_least_recently_used(self) -> None:
+        cache: TTLCache[int] = TTLCache(maxsize=2, ttl=timedelta(minutes=1))
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is MISSING
+        assert cache.get("c") == 3
+        assert len(cache) == 2
+
+    def test_expires_entries(self) -> None:
+        cache: TTLCache[Optional[int]] = TTLCache(maxsize=10, ttl=timedelta(minutes=1))
+        cache.set("a", None, ttl=timedelta(seconds=0))
+        cache.set("b", 2)
+
+        assert cache.get("a") is MISSING
+        assert cache.get("b") == 2
+
+    def test_delete(self) -> None:
+        cache: TTLCache[int] = TTLCache(maxsize=10, ttl=timedelta(minutes=1))
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.set("c", 3)
+
+        cache.delete("a")
+        cache.delete_where(lambda value: value > 2)
+
+        assert cache.get("a") is MISSING
+        assert cache.get("b") == 2
+        assert cache.get("c") is MISSING
@@ -1,21 +1,28 @@
 import concurrent.futures
+import hashlib
 from typing import cast
+from unittest.mock import patch
 
 from django.core.cache import cache
 from django.db import connection
 from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from posthog.models import Cohort, FeatureFlag, GroupTypeMapping, Person
 from posthog.models.feature_flag import get_feature_flags_for_team_in_cache
 from posthog.models.feature_flag.flag_matching import (
+    ROLLOUT_HASH_CACHE_FLAGS_PER_IDENTIFIER,
     FeatureFlagHashKeyOverride,
     FeatureFlagMatch,
     FeatureFlagMatcher,
     FeatureFlagMatchReason,
     FlagsMatcherCache,
     get_all_feature_flags,
+    get_feature_flags_for_distinct_ids,
+    get_rollout_hash,
     hash_key_overrides,
+    rollout_hash_cache,
     set_feature_flag_hash_key_overrides,
 )
 from posthog.models.group import Group
@@ -560,6 +567,46 @@ class TestModelCache(BaseTest):
         assert cached_flags is not None
         self.assertEqual(0, len(cached_flags))
 
+    def test_parsed_flags_are_reused_until_flags_change(self):
+        flag = FeatureFlag.objects.create(
+            team=self.team,
+            key="beta-feature",
+            created_by=self.user,
+            filters={
+                "groups": [{"properties": [{"key": "email", "value": "tim@posthog.com", "type": "person"}]}],
+                "multivariate": {"variants": [{"key": "test", "rollout_percentage": 100}]},
+            },
+        )
+
+        cached_flags = get_feature_flags_for_team_in_cache(self.team.pk)
+        assert cached_flags is not None
+        self.assertEqual(cached_flags[0].condition_properties[0][0].key, "email")
+        self.assertEqual(cached_flags[0].variant_lookup_table, [{"value_min": 0, "value_max": 1, "key": "test"}])
+        self.assertIs(get_feature_flags_for_team_in_cache(self.team.pk), cached_flags)
+
+        flag.name = "New name"
+        flag.save()
+
+        updated_flags = get_feature_flags_for_team_in_cache(self.team.pk)
+        assert updated_flags is not None
+        self.assertIsNot(updated_flags, cached_flags)
+        self.assertEqual(updated_flags[0].name, "New name")
+
+    def test_parsed_flags_are_reused_when_cached_without_version(self):
+        FeatureFlag.objects.create(
+            team=self.team,
+            key="beta-feature",
+            created_by=self.user,
+            filters={"groups": [{"properties": [], "rollout_percentage": None}]},
+        )
+        cache.delete(f"team_feature_flags_version_{self.team.pk}")
+
+        cached_flags = get_feature_flags_for_team_in_cache(self.team.pk)
+        assert cached_flags is not None
+        self.assertEqual(cached_flags[0].key, "beta-feature")
+        self.assertIsNotNone(cache.get(f"team_feature_flags_version_{self.team.pk}"))
+        self.assertIs(get_feature_flags_for_team_in_cache(self.team.pk), cached_flags)
+
 
 class TestFeatureFlagMatcher(BaseTest, QueryMatchingTest):
     maxDiff = None
@@ -1776,6 +1823,97 @@ class TestFeatureFlagMatcher(BaseTest, QueryMatchingTest):
             team=self.team, group_type_index=1, group_key="group_key", group_properties={"name": "var.inc"}, version=1
         )
 
+    def test_compiled_conditions(self):
+        feature_flag = self.create_feature_flag(
+            filters={
+                "groups": [
+                    {
+                        "properties": [
+                            {"key": "email", "value": "posthog.com", "operator": "icontains", "type": "person"},
+                            {"key": "plan", "value": ["pro", "enterprise"], "type": "person"},
+                        ]
+                    },
+                    {"properties": [{"key": "beta", "operator": "is_not_set", "type": "person"}]},
+                    {"rollout_percentage": 50},
+                ]
+            }
+        )
+
+        self.assertEqual(feature_flag.property_keys, {"email", "plan", "beta"})
+
+        first, second, third = feature_flag.compiled_conditions
+        self.assertEqual(first.property_keys, {"email", "plan"})
+        self.assertFalse(first.can_compute_locally({"email": "tim@posthog.com"}))
+        self.assertTrue(first.can_compute_locally({"email": "tim@posthog.com", "plan": "pro"}))
+        self.assertTrue(first.predicate({"email": "tim@posthog.com", "plan": "pro"}))
+        self.assertFalse(first.predicate({"email": "tim@posthog.com", "plan": "free"}))
+        self.assertFalse(second.can_compute_locally({"beta": True}))
+        self.assertTrue(third.can_compute_locally({}))
+
+        # Matching with overrides only goes through the compiled conditions, without querying the database
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                FeatureFlagMatcher(
+                    [feature_flag],
+                    "example_id",
+                    property_value_overrides={"email": "tim@posthog.com", "plan": "enterprise"},
+                ).get_match(feature_flag),
+                FeatureFlagMatch(True, None, FeatureFlagMatchReason.CONDITION_MATCH, 0),
+            )
+
+    def test_rollout_hashes_are_reused(self):
+        feature_flag = self.create_feature_flag(
+            filters={
+                "groups": [{"properties": [], "rollout_percentage": 50}],
+                "multivariate": {
+                    "variants": [
+                        {"key": "first-variant", "name": "First Variant", "rollout_percentage": 50},
+                        {"key": "second-variant", "name": "Second Variant", "rollout_percentage": 25},
+                        {"key": "third-variant", "name": "Third Variant", "rollout_percentage": 25},
+                    ]
+                },
+            }
+        )
+        rollout_hash_cache.clear()
+
+        with patch("posthog.models.feature_flag.flag_matching.hashlib.sha1", wraps=hashlib.sha1) as sha1:
+            for _ in range(3):
+                self.assertEqual(
+                    FeatureFlagMatcher([feature_flag], "some_id").get_match(feature_flag),
+                    FeatureFlagMatch(True, "second-variant", FeatureFlagMatchReason.CONDITION_MATCH, 0),
+                )
+
+        # One hash for the rollout and one for the variant, computed by the first matcher only
+        self.assertEqual(sha1.call_count, 2)
+        self.assertEqual(get_rollout_hash("beta-feature", "some_id"), 0.3845375652936022)
+        self.assertEqual(get_rollout_hash("beta-feature", "some_id", "variant"), 0.7319986676139941)
+
+    def test_rollout_hashes_of_many_flags_stay_cached(self):
+        rollout_hash_cache.clear()
+        flag_keys = [f"flag-{index}" for index in range(ROLLOUT_HASH_CACHE_FLAGS_PER_IDENTIFIER)]
+        expected = {key: get_rollout_hash(key, "some_id", team_id=1) for key in flag_keys}
+        get_rollout_hash("other-flag", "other_id", team_id=1)
+
+        with patch("posthog.models.feature_flag.flag_matching.hashlib.sha1", wraps=hashlib.sha1) as sha1:
+            self.assertEqual({key: get_rollout_hash(key, "some_id", team_id=1) for key in flag_keys}, expected)
+
+        self.assertEqual(sha1.call_count, 0)
+
+    def test_rollout_hashes_are_bounded_per_identifier(self):
+        rollout_hash_cache.clear()
+        get_rollout_hash("beta-feature", "some_id", team_id=1)
+        get_rollout_hash("beta-feature", "some_id", team_id=2)
+        flag_keys = [f"flag-{index}" for index in range(ROLLOUT_HASH_CACHE_FLAGS_PER_IDENTIFIER + 10)]
+        for key in flag_keys:
+            get_rollout_hash(key, "some_id", team_id=2)
+
+        # Each team has its own hashes of the identifier, and no more of them than the cap are kept
+        self.assertEqual(len(rollout_hash_cache.hashes_for(1, "some_id")[""]), 1)
+        self.assertEqual(len(rollout_hash_cache.hashes_for(2, "some_id")[""]), ROLLOUT_HASH_CACHE_FLAGS_PER_IDENTIFIER)
+        self.assertEqual(
+            get_rollout_hash(flag_keys[-1], "some_id", team_id=2), get_rollout_hash(flag_keys[-1], "some_id")
+        )
+
     def create_feature_flag(self, key="beta-feature", **kwargs):
         return FeatureFlag.objects.create(team=self.team, name="Beta feature", key=key, created_by=self.user, **kwargs)
 
@@ -1913,6 +2051,135 @@ class TestFeatureFlagHashKeyOverrides(BaseTest, QueryMatchingTest):
         self.assertEqual(payloads, {})
 
 
+class TestBulkFeatureFlagEvaluation(BaseTest):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        GroupTypeMapping.objects.create(team=cls.team, group_type="organization", group_type_index=0)
+        FeatureFlag.objects.create(
+            team=cls.team,
+            filters={"groups": [{"properties": [{"key": "email", "value": "tim@posthog.com", "type": "person"}]}]},
+            key="person-flag",
+            created_by=cls.user,
+        )
+        FeatureFlag.objects.create(
+            team=cls.team,
+            filters={
+                "aggregation_group_type_index": 0,
+                "groups": [
+                    {"properties": [{"key": "name", "value": "foo.inc", "type": "group", "group_type_index": 0}]}
+                ],
+            },
+            key="group-flag",
+            created_by=cls.user,
+        )
+        FeatureFlag.objects.create(
+            team=cls.team,
+            filters={
+                "groups": [{"properties": [], "rollout_percentage": 50}],
+                "multivariate": {
+                    "variants": [
+                        {"key": "first-variant", "name": "First Variant", "rollout_percentage": 50},
+                        {"key": "second-variant", "name": "Second Variant", "rollout_percentage": 50},
+                    ]
+                },
+            },
+            key="continuity-flag",
+            created_by=cls.user,
+            ensure_experience_continuity=True,
+        )
+
+        Group.objects.create(
+            team=cls.team, group_type_index=0, group_key="foo", group_properties={"name": "foo.inc"}, version=0
+        )
+        Group.objects.create(
+            team=cls.team, group_type_index=0, group_key="bar", group_properties={"name": "bar.inc"}, version=0
+        )
+        person = Person.objects.create(
+            team=cls.team, distinct_ids=["tim", "tim_2"], properties={"email": "tim@posthog.com"}
+        )
+        Person.objects.create(team=cls.team, distinct_ids=["other"], properties={"email": "other@posthog.com"})
+        FeatureFlagHashKeyOverride.objects.create(
+            team=cls.team, person=person, feature_flag_key="continuity-flag", hash_key="anonymous_id"
+        )
+
+    def test_matches_evaluating_each_distinct_id(self):
+        groups = {"tim": {"organization": "foo"}, "other": {"organization": "bar"}, "unknown": {"organization": "foo"}}
+        distinct_ids = ["tim", "tim_2", "other", "unknown", "no_groups"]
+
+        results = get_feature_flags_for_distinct_ids(self.team.pk, distinct_ids, groups)
+
+        self.assertEqual(list(results.keys()), distinct_ids)
+        for distinct_id in distinct_ids:
+            self.assertEqual(
+                results[distinct_id], get_all_feature_flags(self.team.pk, distinct_id, groups.get(distinct_id, {}))
+            )
+        self.assertEqual(results["tim"][0]["person-flag"], True)
+        self.assertEqual(results["tim"][0]["group-flag"], True)
+        self.assertEqual(results["tim_2"][0]["group-flag"], False)
+        self.assertEqual(results["other"][0]["person-flag"], False)
+        self.assertEqual(results["other"][0]["group-flag"], False)
+        # Both distinct ids of the person share the hash key override
+        self.assertEqual(results["tim"][0]["continuity-flag"], results["tim_2"][0]["continuity-flag"])
+
+    def test_property_overrides(self):
+        results = get_feature_flags_for_distinct_ids(
+            self.team.pk,
+            ["tim", "other", "unknown"],
+            {"unknown": {"organization": "bar"}},
+            property_value_overrides={
+                "tim": {"email": "someone@example.com"},
+                "other": {"email": "tim@posthog.com"},
+                "unknown": {"email": "tim@posthog.com"},
+            },
+            group_property_value_overrides={"organization": {"name": "foo.inc"}},
+        )
+
+        self.assertEqual(results["tim"][0]["person-flag"], False)
+        self.assertEqual(results["other"][0]["person-flag"], True)
+        self.assertEqual(results["unknown"][0]["person-flag"], True)
+        self.assertEqual(results["unknown"][0]["group-flag"], True)
+
+    def test_queries_dont_grow_with_distinct_ids(self):
+        get_feature_flags_for_distinct_ids(self.team.pk, ["tim"])
+
+        with CaptureQueriesContext(connection) as few_distinct_ids:
+            get_feature_flags_for_distinct_ids(self.team.pk, ["tim", "other"], {"tim": {"organization": "foo"}})
+        with CaptureQueriesContext(connection) as many_distinct_ids:
+            get_feature_flags_for_distinct_ids(
+                self.team.pk,
+                ["tim", "tim_2", "other", *[f"anonymous_{index}" for index in range(50)]],
+                {"tim": {"organization": "foo"}, "other": {"organization": "bar"}},
+            )
+
+        self.assertEqual(len(few_distinct_ids), len(many_distinct_ids))
+
+    def test_queries_dont_grow_with_per_distinct_id_property_overrides(self):
+        def overrides_for(distinct_ids):
+            # Overrides of properties no condition reads don't split the batch
+            return {distinct_id: {"name": f"user {index}"} for index, distinct_id in enumerate(distinct_ids)}
+
+        few_ids = ["tim", "other"]
+        many_ids = ["tim", "tim_2", "other", *[f"anonymous_{index}" for index in range(50)]]
+        get_feature_flags_for_distinct_ids(self.team.pk, ["tim"])
+
+        with CaptureQueriesContext(connection) as few_distinct_ids:
+            results = get_feature_flags_for_distinct_ids(
+                self.team.pk, few_ids, property_value_overrides=overrides_for(few_ids)
+            )
+        with CaptureQueriesContext(connection) as many_distinct_ids:
+            get_feature_flags_for_distinct_ids(self.team.pk, many_ids, property_value_overrides=overrides_for(many_ids))
+
+        self.assertEqual(len(few_distinct_ids), len(many_distinct_ids))
+        self.assertEqual(results["tim"][0]["person-flag"], True)
+        self.assertEqual(results["other"][0]["person-flag"], False)
+
+    def test_no_flags(self):
+        FeatureFlag.objects.filter(team=self.team).delete()
+
+        self.assertEqual(get_feature_flags_for_distinct_ids(self.team.pk, ["tim", "tim"]), {"tim": ({}, {}, {}, False)})
+
+
 class TestHashKeyOverridesRaceConditions(TransactionTestCase):
     def test_hash_key_overrides_with_race_conditions(self):
         org = Organization.objects.create(name="test")
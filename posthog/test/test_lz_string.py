@@ -0,0 +1,59 @@
+import json
+import random
+import string
+from unittest import TestCase
+
+import lzstring
+
+from posthog.lz_string import BASE64_ALPHABET, decompress_from_base64
+
+
+def _reference(compressed):
+    try:
+        return lzstring.LZString().decompressFromBase64(compressed)
+    except (KeyError, IndexError, UnboundLocalError):
+        return ValueError
+
+
+def _decompress(compressed):
+    try:
+        return decompress_from_base64(compressed)
+    except ValueError:
+        return ValueError
+
+
+class TestLZString(TestCase):
+    def test_decompresses_capture_payload(self):
+        payload = json.dumps(
+            [{"event": "$pageview", "properties": {"distinct_id": f"user-{i}", "emoji": "💻"}} for i in range(100)]
+        )
+
+        self.assertEqual(decompress_from_base64(lzstring.LZString().compressToBase64(payload)), payload)
+
+    def test_edge_cases_match_reference(self):
+        for compressed in [None, "", "foo", "A", "====", "a!b", "N4Ig", "hello world", "éabc"]:
+            self.assertEqual(_decompress(compressed), _reference(compressed), compressed)
+
+    def test_fuzz_against_reference(self):
+        random.seed(0)
+        alphabet = string.printable + "éü💻中"
+
+        for _ in range(500):
+            text = "".join(random.choice(alphabet) for _ in range(random.randint(0, 300))) * random.randint(1, 3)
+            compressed = lzstring.LZString().compressToBase64(text)
+
+            if compressed and random.random() < 0.3:
+                index = random.randrange(len(compressed))
+                compressed = compressed[:index] + random.choice(BASE64_ALPHABET + "!é ") + compressed[index + 1 :]
+            if random.random() < 0.2:
+                compressed = compressed[: random.randint(0, len(compressed))]
+
+            self.assertEqual(_decompress(compressed), _reference(compressed), compressed)
+
+    def test_fuzz_random_input_against_reference(self):
+        random.seed(0)
+
+        for _ in range(500):
+            compressed = "".join(random.choice(BASE64_ALPHABET + "!é") for _ in range(random.randint(0, 50)))
+
+            self.assertEqual(_decompress(compressed), _reference(compressed), compressed)
@@ -1,3 +1,6 @@
+import base64
+import gzip
+import json
 from datetime import datetime
 from unittest.mock import call, patch
 
@@ -15,8 +18,11 @@ from posthog.models import EventDefinition
 from posthog.settings.utils import get_from_env
 from posthog.test.base import BaseTest
 from posthog.utils import (
+    PayloadEncoding,
     PotentialSecurityProblemException,
     absolute_uri,
+    classify_payload,
+    decompress,
     format_query_params_absolute_url,
     get_available_timezones_with_offsets,
     get_compare_period_dates,
@@ -303,6 +309,41 @@ class TestLoadDataFromRequest(TestCase):
         self.assertEqual({"what is it": "the decompressed value"}, data)
 
 
+class TestDecompress(TestCase):
+    payload = [{"event": "$pageview", "properties": {"distinct_id": "abc", "emoji": "💻", "nan": None}}]
+
+    def test_classify_payload(self):
+        raw = json.dumps(self.payload).encode()
+
+        self.assertEqual(classify_payload(raw), PayloadEncoding.JSON)
+        self.assertEqual(classify_payload("  " + raw.decode()), PayloadEncoding.JSON)
+        self.assertEqual(classify_payload(gzip.compress(raw)), PayloadEncoding.GZIP)
+        self.assertEqual(classify_payload(base64.b64encode(raw)), PayloadEncoding.BASE64)
+        self.assertEqual(classify_payload(b"\x00\x01"), PayloadEncoding.UNKNOWN)
+
+    def test_decompress_payload_shapes(self):
+        raw = json.dumps(self.payload, ensure_ascii=False).encode()
+
+        for data, compression in [
+            (raw, ""),
+            (raw.decode(), ""),
+            (base64.b64encode(raw), ""),
+            (base64.b64encode(raw).decode().replace("+", " "), ""),
+            (gzip.compress(raw), "gzip"),
+            (gzip.compress(raw), "gzip-js"),
+            (gzip.compress(raw), ""),
+        ]:
+            self.assertEqual(decompress(data, compression), self.payload)
+
+    def test_decompress_combines_surrogate_pairs_in_base64_payloads(self):
+        data = base64.b64encode('{"emoji": "\ud83d\udcbb"}'.encode("utf8", "surrogatepass"))
+
+        self.assertEqual(decompress(data, ""), {"emoji": "💻"})
+
+    def test_decompress_replaces_constants_with_none(self):
+        self.assertEqual(decompress(b'{"a": NaN, "b": Infinity}', ""), {"a": None, "b": None})
+
+
 class TestShouldRefresh(TestCase):
     def test_refresh_requested_by_client_with_refresh_true(self):
         request = HttpRequest()
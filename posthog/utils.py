@@ -29,7 +29,7 @@ from typing import (
 )
 from urllib.parse import urljoin, urlparse
 
-import lzstring
+import orjson
 import posthoganalytics
 import pytz
 import structlog
@@ -49,6 +49,7 @@ from sentry_sdk.api import capture_exception
 from posthog.cloud_utils import is_cloud
 from posthog.constants import AvailableFeature
 from posthog.exceptions import RequestParsingError
+from posthog.lz_string import decompress_from_base64
 from posthog.redis import get_client
 
 if TYPE_CHECKING:
@@ -589,6 +590,71 @@ def base64_decode(data):
     return data.decode("utf8", "surrogatepass").encode("utf-16", "surrogatepass")
 
 
+GZIP_MAGIC_BYTES = b"\x1f\x8b"
+# How many leading characters of a payload are inspected when classifying it
+PAYLOAD_SNIFF_LENGTH = 64
+# Spaces are allowed as `+` gets turned into a space when the payload is sent form-urlencoded
+BASE64_CHARACTERS = frozenset(string.ascii_letters + string.digits + "+/=-_ \r\n")
+JSON_LEADING_CHARACTERS = frozenset("{[")
+SURROGATE_REGEX = re.compile("[\ud800-\udfff]")
+
+
+class PayloadEncoding(str, Enum):
+    GZIP = "gzip"
+    JSON = "json"
+    BASE64 = "base64"
+    UNKNOWN = "unknown"
+
+
+def classify_payload(data: Union[str, bytes]) -> PayloadEncoding:
+    """
+    Classifies a request payload from its leading bytes, so that it can be decoded with exactly one decode path.
+    """
+    if isinstance(data, bytes):
+        if data.startswith(GZIP_MAGIC_BYTES):
+            return PayloadEncoding.GZIP
+        head = data[:PAYLOAD_SNIFF_LENGTH].decode("latin-1")
+    else:
+        head = data[:PAYLOAD_SNIFF_LENGTH]
+
+    stripped_head = head.lstrip()
+    if stripped_head[:1] in JSON_LEADING_CHARACTERS:
+        return PayloadEncoding.JSON
+    if stripped_head and BASE64_CHARACTERS.issuperset(head):
+        return PayloadEncoding.BASE64
+    return PayloadEncoding.UNKNOWN
+
+
+def _base64_decode_to_str(data: Union[str, bytes]) -> str:
+    """
+    Same as `base64_decode`, but returns a string instead of UTF-16 bytes. The UTF-16 round trip, which is needed
+    to combine surrogate pairs sent by older clients, is only done if the payload actually contains surrogates.
+    """
+    if not isinstance(data, str):
+        data = data.decode()
+
+    decoded = base64.b64decode(data.replace(" ", "+") + "===").decode("utf8", "surrogatepass")
+
+    if SURROGATE_REGEX.search(decoded):
+        decoded = decoded.encode("utf-16", "surrogatepass").decode("utf-16", "surrogatepass")
+
+    return decoded
+
+
+def _json_loads(data: Union[str, bytes]) -> Any:
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        # orjson is stricter than the standard library (e.g. NaN, surrogates, huge integers) so fall back to
+        # it, which also keeps our error messages stable
+        pass
+
+    # parse_constant gets called in case of NaN, Infinity etc
+    # default behaviour is to put those into the DB directly
+    # but we just want it to return None
+    return json.loads(data, parse_constant=lambda x: None)
+
+
 def decompress(data: Any, compression: str):
     if not data:
         return None
@@ -609,27 +675,29 @@ def decompress(data: Any, compression: str):
             data = data.decode()
         data = data.replace(" ", "+")
 
-        data = lzstring.LZString().decompressFromBase64(data)
+        try:
+            data = decompress_from_base64(data)
+        except ValueError as error:
+            raise RequestParsingError("Failed to decompress data. %s" % (str(error)))
 
         if not data:
             raise RequestParsingError("Failed to decompress data.")
 
         data = data.encode("utf-16", "surrogatepass").decode("utf-16")
 
-    base64_decoded = None
-    try:
-        base64_decoded = base64_decode(data)
-    except Exception:
-        pass
+    payload_encoding = classify_payload(data)
 
-    if base64_decoded:
-        data = base64_decoded
+    if payload_encoding == PayloadEncoding.GZIP and compression == "":
+        return decompress(data, "gzip")
+
+    if payload_encoding == PayloadEncoding.BASE64:
+        try:
+            data = _base64_decode_to_str(data) or data
+        except Exception:
+            pass
 
     try:
-        # parse_constant gets called in case of NaN, Infinity etc
-        # default behaviour is to put those into the DB directly
-        # but we just want it to return None
-        data = json.loads(data, parse_constant=lambda x: None)
+        data = _json_loads(data)
     except (json.JSONDecodeError, UnicodeDecodeError) as error_main:
         if compression == "":
             try:
@@ -939,6 +1007,19 @@ def get_safe_cache(cache_key: str):
     return None
 
 
+def get_safe_cache_many(cache_keys: List[str]) -> Dict[str, Any]:
+    """Like `get_safe_cache`, but fetches many keys in one round trip. Missing keys are left out of the result."""
+    try:
+        return cache.get_many(cache_keys)
+    except Exception:  # a single corrupted value fails the whole batch, so fall back to fetching one by one
+        cached_results = {}
+        for cache_key in cache_keys:
+            cached_result = get_safe_cache(cache_key)
+            if cached_result is not None:
+                cached_results[cache_key] = cached_result
+        return cached_results
+
+
 def is_anonymous_id(distinct_id: str) -> bool:
     # Our anonymous ids are _not_ uuids, but a random collection of strings
     return bool(re.match(ANONYMOUS_REGEX, distinct_id))